@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+"""
+Benchmarks for the ingestion and diagnostic hot paths.
+
+Run from the repository root:
+
+    python benchmarks/bench_economizer.py --output results.json
+    python benchmarks/bench_economizer.py --output new.json --compare results.json
+
+Every measurement is stored as one entry of the "results" list, keyed by the
+benchmark name and its parameters, so two result files from different commits
+can be compared entry by entry.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from datetime import datetime, timedelta as td, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests"))
+
+from economizer import constants, evaluator
+from economizer.diagnostics.EconCorrectlyOff import EconCorrectlyOff
+from economizer.diagnostics.EconCorrectlyOn import EconCorrectlyOn
+from economizer.diagnostics.ExcessOutsideAir import ExcessOutsideAir
+from economizer.diagnostics.InsufficientOutsideAir import InsufficientOutsideAir
+from economizer.diagnostics.TemperatureSensor import TemperatureSensor
+
+from economizer_helpers import POINTS, build_agent, generate_samples
+
+START = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def unit_config(units):
+    """Device configuration with the given number of units"""
+    return {"campus": "campus", "building": "building",
+            "unit": {"rtu{}".format(unit): {"subdevices": []} for unit in range(units)}}
+
+
+def device_messages(columns):
+    """Headers and "all" payloads for every row of generate_samples columns"""
+    messages = []
+    for row in range(len(columns[0])):
+        message = {point: float(column[row]) for point, column in zip(POINTS, columns[1:])}
+        headers = {"Date": datetime.fromtimestamp(int(columns[0][row]), timezone.utc).isoformat()}
+        messages.append((headers, [message]))
+    return messages
+
+
+def bench_ingest(samples, devices, window_statistics=False):
+    """new_data_message throughput, samples spread round robin over the devices"""
+    agent = build_agent({"window_statistics": window_statistics}, unit_config(devices))
+    topics = list(agent.device_list)
+    messages = device_messages(generate_samples(samples // devices, 11))
+    start = time.perf_counter()
+    for headers, message in messages:
+        for topic in topics:
+            agent.new_data_message(None, None, None, topic, headers, message)
+    elapsed = time.perf_counter() - start
+    agent.publish_queue.flush()
+    count = len(messages) * len(topics)
+    return {"value": count / elapsed, "unit": "samples/s", "published": len(agent.vip.pubsub.published)}
+
+
+def fill_diagnostic(name, window):
+    """A configured diagnostic holding one full window of accepted samples"""
+    results = []
+    data_window = td(minutes=window)
+    required = max(1, window // 2)
+    if name == "temperature_sensor":
+        diagnostic = TemperatureSensor()
+        diagnostic.set_class_values("bench", results, data_window, required, 4.0, 0, 90)
+    elif name == "econ_correctly_on":
+        diagnostic = EconCorrectlyOn()
+        diagnostic.set_class_values("bench", results, data_window, required, 20.0, 80.0, 6000.0, 10.0)
+    elif name == "econ_correctly_off":
+        diagnostic = EconCorrectlyOff()
+        diagnostic.set_class_values("bench", results, data_window, required, 20.0, 10.0, 6000.0, 10.0)
+    elif name == "excess_outside_air":
+        diagnostic = ExcessOutsideAir()
+        diagnostic.set_class_values("bench", results, data_window, required, 20.0, 10.0, 6000.0, 10.0)
+    else:
+        diagnostic = InsufficientOutsideAir()
+        diagnostic.set_class_values("bench", results, data_window, required, 10.0)
+    rng = np.random.default_rng(window)
+    for minute in range(window):
+        cur_time = START + td(minutes=minute)
+        oat, rat, mat, oad = rng.uniform(40.0, 55.0), rng.uniform(68.0, 74.0), rng.uniform(55.0, 65.0), 30.0
+        if name == "temperature_sensor":
+            diagnostic.temperature_algorithm(oat, rat, mat, oad, cur_time)
+        elif name == "econ_correctly_on":
+            diagnostic.economizer_on_algorithm(1, oat, rat, mat, oad, True, cur_time, 75.0)
+        elif name == "econ_correctly_off":
+            diagnostic.economizer_off_algorithm(oat, rat, mat, oad, False, cur_time, 75.0)
+        elif name == "excess_outside_air":
+            diagnostic.excess_ouside_air_algorithm(oat, rat, mat, oad, False, cur_time, 75.0)
+        else:
+            diagnostic.insufficient_outside_air_algorithm(oat, rat, mat, cur_time)
+    return diagnostic, START + td(minutes=window)
+
+
+DIAGNOSTICS = ("temperature_sensor", "econ_correctly_on", "econ_correctly_off", "excess_outside_air",
+               "insufficient_outside_air")
+IMPORT_MODULES = ("economizer.diagnostics.EconCorrectlyOn", "economizer.device", "economizer.sharding",
+                  "economizer.replay", "economizer.economizer_agent")
+
+
+def bench_run_diagnostic(name, window, repeat):
+    """run_diagnostic latency with a full window, the window is refilled outside the timing"""
+    timings = []
+    for _ in range(repeat):
+        diagnostic, current_time = fill_diagnostic(name, window)
+        start = time.perf_counter()
+        diagnostic.run_diagnostic(current_time)
+        timings.append(time.perf_counter() - start)
+    return {"value": statistics.median(timings) * 1e6, "unit": "us", "min": min(timings) * 1e6}
+
+
+def bench_publish(publish_devices, results, repeat):
+    """publish_analysis_results (queueing) and queue drain cost for one device publishing to publish_devices topics"""
+    agent = build_agent({})
+    device = next(iter(agent.devices.values()))
+    device.publish_list = ["campus/building/rtu4/sub{}".format(index) for index in range(publish_devices)]
+    timings = []
+    drain_timings = []
+    for _ in range(repeat):
+        for index in range(results):
+            diagnostic = constants.DX_LIST[index % len(constants.DX_LIST)]
+            device.results_publish.append(constants.table_publish_format(
+                agent.analysis_name, START + td(minutes=index), diagnostic, constants.DX,
+                {"low": 0.0, "normal": 0.0, "high": 0.0}))
+        agent.vip.pubsub.published.clear()
+        start = time.perf_counter()
+        agent.publish_analysis_results(device)
+        timings.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        agent.publish_queue.flush()
+        drain_timings.append(time.perf_counter() - start)
+    return {"value": statistics.median(timings) * 1e6, "unit": "us", "drain": statistics.median(drain_timings) * 1e6,
+            "messages": publish_devices * results}
+
+
+def bench_close(devices, batched, repeat):
+    """Cost per device of closing the windows of many devices due on the same tick"""
+    samples = generate_samples(31, 13)
+    # every sample passes the preconditions
+    samples[1][:], samples[2][:], samples[3][:], samples[5][:], samples[6][:] = 55.0, 72.0, 65.0, 1.0, 1.0
+    messages = device_messages([column[1:] for column in samples])
+    timings = []
+    for _ in range(repeat):
+        agent = build_agent({"evaluation_limit": devices}, unit_config(devices))
+        # the first window clears the temperature sensors, the second is timed with every diagnostic
+        for row, (headers, message) in enumerate(messages):
+            for topic in agent.device_list:
+                agent.new_data_message(None, None, None, topic, headers, message)
+            if row == 14:
+                agent.evaluate_devices(list(agent.devices.values()))
+        due = [device for device in agent.devices.values() if device.close_due is not None]
+        start = time.perf_counter()
+        if batched:
+            evaluator.close_pending_windows(due)
+        else:
+            for device in due:
+                device.close_pending_window()
+        timings.append((time.perf_counter() - start) / len(due))
+    return {"value": statistics.median(timings) * 1e6, "unit": "us/device"}
+
+
+def bench_memory(devices, samples, window_statistics=False):
+    """Traced memory per device after creation and peak while ingesting"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    agent = build_agent({"window_statistics": window_statistics, "data_window": 60, "no_required_data": 30},
+                        unit_config(devices))
+    created = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    for headers, message in device_messages(generate_samples(samples, 12)):
+        for topic in agent.device_list:
+            agent.new_data_message(None, None, None, topic, headers, message)
+        agent.vip.pubsub.published.clear()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"value": (peak - before) / devices, "unit": "bytes/device", "idle": (created - before) / devices}
+
+
+def bench_import(module, repeat):
+    """Time to import a module in a fresh interpreter, as a spawned worker or CLI tool does"""
+    code = "import time; start = time.perf_counter(); import {}; print(time.perf_counter() - start)".format(module)
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        timings.append(float(output))
+    return {"value": statistics.median(timings) * 1e3, "unit": "ms", "min": min(timings) * 1e3}
+
+
+def run_benchmarks(quick):
+    """Run every benchmark and return the list of result entries"""
+    scale = 1 if quick else 5
+    repeat = 20 if quick else 100
+    entries = []
+
+    def record(name, params, function, *args):
+        result = function(*args)
+        entry = {"name": name, "params": params}
+        entry.update(result)
+        entries.append(entry)
+        print("{:<16} {:<50} {:>14.1f} {}".format(name, json.dumps(params, sort_keys=True), result["value"],
+                                                  result["unit"]))
+
+    for devices in (1, 10):
+        for window_statistics in (False, True):
+            samples = 2000 * scale
+            record("ingest", {"samples": samples, "devices": devices, "window_statistics": window_statistics},
+                   bench_ingest, samples, devices, window_statistics)
+    for name in DIAGNOSTICS:
+        for window in (5, 30, 120, 600):
+            record("run_diagnostic", {"diagnostic": name, "window": window}, bench_run_diagnostic, name, window,
+                   repeat)
+    for publish_devices in (1, 4, 16, 64):
+        record("publish", {"publish_list": publish_devices, "results": 10}, bench_publish, publish_devices, 10,
+               repeat)
+    for devices in (10, 100):
+        for batched in (False, True):
+            record("close", {"devices": devices, "batched": batched}, bench_close, devices, batched,
+                   max(3, repeat // 10))
+    for window_statistics in (False, True):
+        record("memory", {"devices": 50, "samples": 120, "window_statistics": window_statistics}, bench_memory,
+               50, 120, window_statistics)
+    if not quick:
+        # the footprint of a large site
+        record("memory", {"devices": 5000, "samples": 10, "window_statistics": True}, bench_memory, 5000, 10, True)
+    # the diagnostics core, the worker and replay modules, and the agent on top of VOLTTRON
+    for module in IMPORT_MODULES:
+        record("import", {"module": module}, bench_import, module, max(3, repeat // 10))
+    return entries
+
+
+def metadata():
+    """Environment the results were measured in"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"commit": commit, "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "date": datetime.now(timezone.utc).isoformat()}
+
+
+def entry_key(entry):
+    return entry["name"], json.dumps(entry["params"], sort_keys=True)
+
+
+def compare(entries, baseline_path):
+    """Print the ratio of every entry to the matching entry of a baseline file"""
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    previous = {entry_key(entry): entry for entry in baseline["results"]}
+    print("\nCompared with {} ({})".format(baseline_path, baseline["metadata"].get("commit", "")))
+    for entry in entries:
+        old = previous.get(entry_key(entry))
+        if old is None or not old["value"]:
+            continue
+        print("{:<16} {:<50} {:>8.2f}x".format(entry["name"], entry_key(entry)[1], entry["value"] / old["value"]))
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Benchmark the economizer ingestion and diagnostic hot paths.")
+    arg_parser.add_argument("-o", "--output", help="JSON file the results are written to")
+    arg_parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    arg_parser.add_argument("--quick", action="store_true", help="smaller inputs and fewer repetitions")
+    args = arg_parser.parse_args(argv)
+
+    # the diagnostics log every sample, keep the handlers out of the measurements
+    logging.disable(logging.CRITICAL)
+    entries = run_benchmarks(args.quick)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"metadata": metadata(), "results": entries}, output, indent=2)
+    if args.compare:
+        compare(entries, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,634 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+from datetime import datetime, timedelta as td, timezone
+
+import numpy as np
+
+from economizer import constants
+from economizer.diagnostics.SampleBuffer import derive_features, window_energy_impact
+from economizer.diagnostics.TemperatureSensor import TemperatureSensor
+from economizer.diagnostics.EconCorrectlyOn import EconCorrectlyOn
+from economizer.diagnostics.EconCorrectlyOff import EconCorrectlyOff
+from economizer.diagnostics.ExcessOutsideAir import ExcessOutsideAir
+from economizer.diagnostics.InsufficientOutsideAir import InsufficientOutsideAir
+from economizer.timestamps import offset_changes_within_hour, utc_offset
+
+
+def energy_impact(mat, oat, fan_spd, cfm, eer, elapsed_minutes):
+    """Vectorized energy impact for the samples of one window
+    mat: numpy array
+    oat: numpy array (or mixed-air reference temperature for the desired OAF)
+    fan_spd: numpy array, fraction of full speed
+    cfm: float
+    eer: float
+    elapsed_minutes: float, time between the first and last sample of the window
+
+    returns float
+    """
+    return window_energy_impact(mat - oat, fan_spd, cfm, eer, elapsed_minutes)
+
+
+def local_minutes(epoch, tz):
+    """Minute of the hour in the local timezone for every epoch timestamp
+    epoch: numpy int64 array of epoch seconds
+    tz: tzinfo
+
+    returns numpy int64 array
+    """
+    if not len(epoch):
+        return np.zeros(0, dtype=np.int64)
+    # Resolve the offset once per UTC hour, and per sample in the hours that contain a transition.
+    hours, inverse = np.unique(epoch // 3600, return_inverse=True)
+    offsets = np.array([utc_offset(int(hour) * 3600, tz).total_seconds() for hour in hours], dtype=np.int64)
+    offsets = offsets[inverse]
+    changing = np.array([offset_changes_within_hour(int(hour) * 3600, tz) for hour in hours])
+    for index in np.flatnonzero(changing[inverse]):
+        offsets[index] = utc_offset(int(epoch[index]), tz).total_seconds()
+    return ((epoch + offsets) // 60) % 60
+
+
+def next_index(mask):
+    """Index of the first set entry at or after every position
+    mask: numpy bool array
+
+    returns numpy int64 array of len(mask) + 1, len(mask) where no entry is set
+    """
+    size = len(mask)
+    index = np.where(mask, np.arange(size), size)
+    return np.append(np.minimum.accumulate(index[::-1])[::-1], size)
+
+
+def steady_damper_rows(rows, times, damper_open, open_damper_time):
+    """Rows the damper has been open for at least open_damper_time, mirrors TemperatureSensor.damper_check
+    rows: numpy int64 array of the samples since the last temperature sensor diagnostic
+    times: numpy int64 array of epoch seconds
+    damper_open: numpy bool array
+    open_damper_time: seconds
+
+    returns numpy int64 array
+    """
+    is_open = damper_open[rows]
+    run_start = is_open & ~np.append(False, is_open[:-1])
+    # time the damper opened for the run every row belongs to
+    opened = times[rows][np.maximum.accumulate(np.where(run_start, np.arange(len(rows)), 0))]
+    return rows[is_open & ~run_start & (times[rows] - opened >= open_damper_time)]
+
+
+class BatchEngine(object):
+    """
+    Vectorized economizer diagnostics for columnar device data.
+    BatchEngine evaluates the precondition checks and all five diagnostics
+    over arrays of historical samples and produces the same diagnostic
+    codes and energy impacts as the per-message agent path.  Per-sample
+    conditions are computed as array masks and every window is reduced with
+    NumPy, only the window bookkeeping is walked in order.
+    """
+
+    def __init__(self):
+        self.analysis_name = ""
+        self.results_publish = None
+        self.timezone = None
+        # number of results published when each window closed
+        self.window_ends = []
+        # minutes the window boundaries are shifted by, DeviceState.window_offset with stagger_windows
+        self.window_offset = 0
+
+        # Application thresholds (Configurable)
+        self.data_window = None
+        self.run_interval = None
+        self.no_required_data = None
+        self.open_damper_time = None
+        self.device_type = None
+        self.economizer_type = None
+        self.econ_hl_temp = None
+        self.temp_band = None
+        self.low_supply_fan_threshold = None
+        self.cooling_enabled_threshold = None
+        self.oaf_temperature_threshold = None
+        self.oat_low_threshold = None
+        self.oat_high_threshold = None
+        self.mat_low_threshold = None
+        self.mat_high_threshold = None
+        self.rat_low_threshold = None
+        self.rat_high_threshold = None
+        self.temp_damper_threshold = None
+        self.desired_oaf = None
+        self.cfm = None
+        self.eer = None
+        self.max_dx_time = None
+
+        # Diagnostics used as threshold and result tables
+        self.temp_sensor = TemperatureSensor()
+        self.econ_correctly_on = EconCorrectlyOn()
+        self.econ_correctly_off = EconCorrectlyOff()
+        self.excess_outside_air = ExcessOutsideAir()
+        self.insufficient_outside_air = InsufficientOutsideAir()
+
+    def set_class_values(self, analysis_name, results_publish, timezone_info=timezone.utc, data_window=td(minutes=30),
+                         no_required_data=15, open_damper_time=td(minutes=5), device_type="ahu", economizer_type="ddb",
+                         econ_hl_temp=None, temp_band=1.0, low_supply_fan_threshold=15.0, cooling_enabled_threshold=5.0,
+                         oaf_temperature_threshold=5.0, oat_low_threshold=30.0, oat_high_threshold=110.0,
+                         mat_low_threshold=50.0, mat_high_threshold=90.0, rat_low_threshold=50.0,
+                         rat_high_threshold=90.0, temp_difference_threshold=4.0, temp_damper_threshold=90.0,
+                         open_damper_threshold=80.0, minimum_damper_setpoint=20.0, desired_oaf=10.0, cfm=6000.0,
+                         eer=10.0):
+        """Set the values needed for doing the diagnostics, defaults match the agent defaults
+        analysis_name: string
+        results_publish: list
+        timezone_info: tzinfo used to stamp results and find window boundaries
+        data_window: datetime time delta
+        no_required_data: integer
+        open_damper_time: datetime time delta
+        remaining arguments: float thresholds as read by the agent
+
+        No return
+        """
+        self.analysis_name = analysis_name
+        self.results_publish = results_publish
+        self.timezone = timezone_info
+        self.data_window = data_window
+        self.run_interval = int(data_window.total_seconds() // 60)
+        self.no_required_data = no_required_data
+        self.open_damper_time = open_damper_time
+        self.device_type = device_type.lower()
+        self.economizer_type = economizer_type.lower()
+        self.econ_hl_temp = econ_hl_temp
+        self.temp_band = temp_band
+        self.low_supply_fan_threshold = low_supply_fan_threshold
+        self.cooling_enabled_threshold = cooling_enabled_threshold
+        self.oaf_temperature_threshold = oaf_temperature_threshold
+        self.oat_low_threshold = oat_low_threshold
+        self.oat_high_threshold = oat_high_threshold
+        self.mat_low_threshold = mat_low_threshold
+        self.mat_high_threshold = mat_high_threshold
+        self.rat_low_threshold = rat_low_threshold
+        self.rat_high_threshold = rat_high_threshold
+        self.temp_damper_threshold = temp_damper_threshold
+        self.desired_oaf = desired_oaf
+        self.cfm = float(cfm)
+        self.eer = eer
+        self.max_dx_time = td(minutes=60) if td(minutes=60) > data_window else data_window * 3 / 2
+        self.temp_sensor.set_class_values(analysis_name, results_publish, data_window, no_required_data,
+                                          temp_difference_threshold, open_damper_time, temp_damper_threshold)
+        self.econ_correctly_on.set_class_values(analysis_name, results_publish, data_window, no_required_data,
+                                                minimum_damper_setpoint, open_damper_threshold, self.cfm, eer)
+        self.econ_correctly_off.set_class_values(analysis_name, results_publish, data_window, no_required_data,
+                                                 minimum_damper_setpoint, desired_oaf, self.cfm, eer)
+        self.excess_outside_air.set_class_values(analysis_name, results_publish, data_window, no_required_data,
+                                                 minimum_damper_setpoint, desired_oaf, self.cfm, eer)
+        self.insufficient_outside_air.set_class_values(analysis_name, results_publish, data_window,
+                                                       no_required_data, desired_oaf)
+
+    @staticmethod
+    def epoch_seconds(timestamp):
+        """Convert a timestamp column to epoch seconds
+        timestamp: numpy datetime64 array or numeric epoch seconds
+
+        returns numpy int64 array
+        """
+        timestamp = np.asarray(timestamp)
+        if np.issubdtype(timestamp.dtype, np.datetime64):
+            return timestamp.astype("datetime64[s]").astype(np.int64)
+        return timestamp.astype(np.int64)
+
+    def run(self, timestamp, oat, rat, mat, oad, cool_call, fan_status=None, fan_speed=None):
+        """Run the preconditions and diagnostics over one device's samples
+        timestamp: datetime64 or epoch seconds, sorted ascending
+        oat, rat, mat, oad, cool_call: array of float, NaN marks a missing value
+        fan_status: array of float or None
+        fan_speed: array of float or None
+
+        returns list of results in the agent publish format
+        """
+        epoch = self.epoch_seconds(timestamp)
+        size = len(epoch)
+        self.window_ends = []
+        oat = np.asarray(oat, dtype=float)
+        rat = np.asarray(rat, dtype=float)
+        mat = np.asarray(mat, dtype=float)
+        oad = np.asarray(oad, dtype=float)
+        cooling = np.asarray(cool_call, dtype=float)
+        fan_status = np.full(size, np.nan) if fan_status is None else np.asarray(fan_status, dtype=float)
+        fan_speed = np.full(size, np.nan) if fan_speed is None else np.asarray(fan_speed, dtype=float)
+
+        # Per-sample masks for every precondition and economizer condition.
+        missing = (np.isnan(oat) | np.isnan(rat) | np.isnan(mat) | np.isnan(oad) | np.isnan(cooling)
+                   | (np.isnan(fan_status) & np.isnan(fan_speed)))
+        has_status = ~np.isnan(fan_status)
+        fan_on = np.where(has_status, np.trunc(np.nan_to_num(fan_status)) != 0,
+                          np.nan_to_num(fan_speed) > self.low_supply_fan_threshold)
+        oaf_fail = np.abs(oat - rat) < self.oaf_temperature_threshold
+        sensor_limit = np.select(
+            [(oat < self.oat_low_threshold) | (oat > self.oat_high_threshold),
+             (mat < self.mat_low_threshold) | (mat > self.mat_high_threshold),
+             (rat < self.rat_low_threshold) | (rat > self.rat_high_threshold)],
+            [constants.OAT_LIMIT, constants.MAT_LIMIT, constants.RAT_LIMIT], default=0.0)
+        if self.device_type == "ahu":
+            cooling_on = cooling > self.cooling_enabled_threshold
+        else:
+            cooling_on = np.trunc(np.nan_to_num(cooling)) != 0
+        if self.economizer_type == "ddb":
+            econ_condition = (rat - oat) > self.temp_band
+        else:
+            econ_condition = (self.econ_hl_temp - oat) > self.temp_band
+        damper_open = oad > self.temp_damper_threshold
+        on_boundary = (local_minutes(epoch, self.timezone) - self.window_offset) % self.run_interval == 0
+        fan_spd = np.where(np.isnan(fan_speed), 1.0, fan_speed / 100.0)
+        self._columns = (epoch, oat, rat, mat, oad, fan_spd)
+        with np.errstate(invalid="ignore"):
+            self._features = derive_features(oat, rat, mat, self.desired_oaf / 100.0)
+
+        # Only samples without a missing value reach the preconditions; the scan works on those.
+        valid = np.flatnonzero(~missing)
+        size = len(valid)
+        times = epoch[valid]
+        boundary = on_boundary[valid]
+        damper_open = damper_open[valid]
+        cooling_on = cooling_on[valid]
+        econ_condition = econ_condition[valid]
+        # A sample is counted for the first precondition it fails and stops there.
+        fan_off = ~fan_on[valid]
+        oaf_failed = ~fan_off & oaf_fail[valid]
+        sensor_limit = np.where(fan_off | oaf_failed, 0.0, sensor_limit[valid])
+        limit_failed = sensor_limit != 0
+        accepted = ~fan_off & ~oaf_failed & ~limit_failed
+        # first sample more than data_window after every sample
+        past = np.searchsorted(times, times + self.data_window.total_seconds(), side="right")
+        no_required_data = self.no_required_data
+        # in the order DeviceState.process_message checks them
+        preconditions = (
+            _Precondition(fan_off, np.full(size, constants.FAN_OFF), np.ones(size, dtype=bool), boundary, past,
+                          no_required_data),
+            _Precondition(oaf_failed, np.full(size, constants.OAF), ~fan_off, boundary, past, no_required_data),
+            _Precondition(limit_failed, sensor_limit, accepted | limit_failed, boundary, past, no_required_data))
+        next_accepted = next_index(accepted)
+        next_accepted_boundary = next_index(accepted & boundary)
+        open_damper_time = self.open_damper_time.total_seconds()
+        # a precondition that closes the window on an accepted sample keeps it from the diagnostics
+        reached = accepted.copy()
+
+        window = _Window()
+        # first sample of the open window and first sample since the temperature sensor diagnostic last ran
+        start = 0
+        span = 0
+        while start < size:
+            # The window closes on the first sample any check closes it on, on the same sample the
+            # earlier check wins. closing stays None when the diagnostics close the window.
+            end = size
+            closing = None
+            for precondition in preconditions:
+                row = precondition.close_row(start)
+                if row < end:
+                    end, closing = row, precondition
+            first = next_accepted[start]
+            if first < size:
+                row = min(next_accepted_boundary[first], next_accepted[past[first]])
+                if row < end:
+                    end, closing = row, None
+            if end == size:
+                break
+            cur_time = int(times[end])
+            if closing is not None:
+                reached[end] = False
+                self.pre_conditions(closing.message(end), cur_time)
+                self.close_window(window)
+                start = end + 1
+                continue
+
+            rows = start + np.flatnonzero(accepted[start:end + 1])
+            temp_sensor_problem = window.temp_sensor_problem
+            if not temp_sensor_problem:
+                # the damper must stay open across the windows the preconditions closed in between
+                span_rows = span + np.flatnonzero(reached[span:end + 1])
+                window.damper_rows = valid[steady_damper_rows(span_rows, times, damper_open, open_damper_time)]
+            window.temp_rows = valid[rows]
+            if temp_sensor_problem is not None and not temp_sensor_problem:
+                cooling = cooling_on[rows]
+                economizing = econ_condition[rows]
+                window.econ_rows = window.temp_rows
+                window.not_cooling = int(np.count_nonzero(~cooling))
+                window.on_rows = window.temp_rows[cooling & economizing]
+                window.economizing = int(np.count_nonzero(economizing))
+                window.off_rows = window.temp_rows[~economizing]
+            self.temperature_sensor_run(window, cur_time)
+            if temp_sensor_problem is not None and not temp_sensor_problem:
+                self.econ_correctly_on_run(window, cur_time)
+                self.econ_correctly_off_run(window, cur_time, self.econ_correctly_off, constants.ECON3)
+                self.econ_correctly_off_run(window, cur_time, self.excess_outside_air, constants.ECON4)
+                self.insufficient_outside_air_run(window, cur_time)
+            elif temp_sensor_problem:
+                self.pre_conditions(constants.TEMP_SENSOR, cur_time)
+            self.close_window(window)
+            start = end + 1
+            span = start
+        self._columns = None
+        self._features = None
+        return self.results_publish
+
+    def close_window(self, window):
+        """Record where the results of the closing window end and start a new window
+        window: _Window
+
+        no return
+        """
+        self.window_ends.append(len(self.results_publish))
+        window.clear_all()
+
+    def to_datetime(self, epoch):
+        """Convert epoch seconds to a datetime in the configured timezone"""
+        return datetime.fromtimestamp(epoch, self.timezone)
+
+    def publish(self, epoch, diagnostic, kind, data):
+        """Append one result in the agent publish format"""
+        self.results_publish.append(
+            constants.table_publish_format(self.analysis_name, self.to_datetime(epoch), diagnostic, kind, data))
+
+    def pre_conditions(self, message, cur_time):
+        """Publish Pre conditions not met
+        message: float
+        cur_time: epoch seconds
+
+        no return
+        """
+        dx_msg = {sensitivity: message for sensitivity in ("low", "normal", "high")}
+        for diagnostic in constants.DX_LIST:
+            self.publish(cur_time, diagnostic, constants.DX, str(dx_msg))
+
+    def window_columns(self, rows):
+        """Return the time, oat, rat, mat, oad and fan speed columns for rows"""
+        rows = np.asarray(rows, dtype=np.int64)
+        return tuple(column[rows] for column in self._columns)
+
+    def window_features(self, rows, *names):
+        """Return the derived feature columns named for rows"""
+        rows = np.asarray(rows, dtype=np.int64)
+        return tuple(self._features[name][rows] for name in names)
+
+    def elapsed(self, times):
+        """Seconds between the first and last sample"""
+        return float(times[-1] - times[0]) if len(times) else 0.0
+
+    def temperature_sensor_run(self, window, cur_time):
+        """Vectorized TemperatureSensor.run_diagnostic
+        window: _Window
+        cur_time: epoch seconds
+
+        No return
+        """
+        dx = self.temp_sensor
+        damper_result = False
+        if len(window.damper_rows) > self.no_required_data:
+            times = self.window_columns(window.damper_rows)[0]
+            oa_ma, = self.window_features(window.damper_rows, "oa_ma")
+            open_damper_check = float(np.mean(np.abs(oa_ma)))
+            diagnostic_msg = {sensitivity: 0.1 if open_damper_check > threshold else 0.0
+                              for sensitivity, threshold in dx.sensor_damper_dx.oat_mat_check.items()}
+            self.publish(times[-1], constants.ECON1, constants.DX, diagnostic_msg)
+            damper_result = True
+        window.damper_rows = []
+
+        count = len(window.temp_rows)
+        if count >= self.no_required_data and not damper_result:
+            times = self.window_columns(window.temp_rows)[0]
+            if self.elapsed(times) > self.max_dx_time.total_seconds():
+                self.publish(times[-1], constants.ECON1, constants.DX, dx.inconsistent_date)
+                return
+            oa_ma, ra_ma = self.window_features(window.temp_rows, "oa_ma", "ra_ma")
+            avg_oa_ma = float(np.mean(oa_ma))
+            avg_ra_ma = float(np.mean(ra_ma))
+            diagnostic_msg = {}
+            for sensitivity, threshold in dx.temp_diff_thr.items():
+                if avg_oa_ma > threshold and avg_ra_ma > threshold:
+                    result = 1.1
+                elif -avg_oa_ma > threshold and -avg_ra_ma > threshold:
+                    result = 2.1
+                else:
+                    result = 0.0
+                    window.temp_sensor_problem = False
+                diagnostic_msg[sensitivity] = result
+            if diagnostic_msg["normal"] > 0.0:
+                window.temp_sensor_problem = None
+            self.publish(times[-1], constants.ECON1, constants.DX, diagnostic_msg)
+        elif count < self.no_required_data:
+            self.publish(cur_time, constants.ECON1, constants.DX, dx.insufficient_data)
+
+    def econ_correctly_on_run(self, window, cur_time):
+        """Vectorized EconCorrectlyOn.run_diagnostic
+        window: _Window
+        cur_time: epoch seconds
+
+        No return
+        """
+        dx = self.econ_correctly_on
+        diagnostic = constants.ECON2
+        if window.not_cooling >= len(window.econ_rows) * 0.5:
+            self.publish(cur_time, diagnostic, constants.DX, dx.not_cooling_dict)
+            return
+        if len(window.on_rows) < self.no_required_data:
+            self.publish(cur_time, diagnostic, constants.DX, dx.insufficient_data)
+            return
+        times, _, _, _, oad, fan_spd = self.window_columns(window.on_rows)
+        elapsed = self.elapsed(times)
+        if elapsed > self.max_dx_time.total_seconds():
+            self.publish(times[-1], diagnostic, constants.DX, dx.inconsistent_date)
+            return
+        oaf, = self.window_features(window.on_rows, "oaf")
+        avg_oaf = max(0.0, min(100.0, float(np.mean(oaf)) * 100.0))
+        avg_damper_signal = float(np.mean(oad))
+        energy = None
+        diagnostic_msg = {}
+        energy_impact_msg = {}
+        thresholds = zip(dx.open_damper_threshold.items(), dx.oaf_economizing_threshold.values())
+        for (sensitivity, damper_thr), oaf_thr in thresholds:
+            if avg_damper_signal < damper_thr or avg_oaf < oaf_thr:
+                result = 11.1 if avg_damper_signal < damper_thr else 12.1
+                if energy is None:
+                    oa_ma, = self.window_features(window.on_rows, "oa_ma")
+                    step = elapsed / 60 if len(times) > 1 else 1
+                    energy = window_energy_impact(-oa_ma, fan_spd, self.cfm, self.eer, step)
+                energy_impact_msg[sensitivity] = energy
+            else:
+                result = 10.0
+                energy_impact_msg[sensitivity] = 0.0
+            diagnostic_msg[sensitivity] = result
+        self.publish(times[-1], diagnostic, constants.DX, diagnostic_msg)
+        self.publish(times[-1], diagnostic, constants.EI, energy_impact_msg)
+
+    def econ_correctly_off_run(self, window, cur_time, dx, diagnostic):
+        """Vectorized run_diagnostic for EconCorrectlyOff and ExcessOutsideAir
+        window: _Window
+        cur_time: epoch seconds
+        dx: configured EconCorrectlyOff or ExcessOutsideAir
+        diagnostic: constants.ECON3 or constants.ECON4
+
+        No return
+        """
+        if window.economizing >= len(window.econ_rows) * 0.5:
+            self.publish(cur_time, diagnostic, constants.DX, dx.economizing_dict)
+            return
+        if len(window.off_rows) < self.no_required_data:
+            self.publish(cur_time, diagnostic, constants.DX, dx.insufficient_data)
+            return
+        times, _, _, _, oad, fan_spd = self.window_columns(window.off_rows)
+        elapsed = self.elapsed(times)
+        if elapsed > self.max_dx_time.total_seconds():
+            self.publish(times[-1], diagnostic, constants.DX, dx.inconsistent_date)
+            return
+        step = elapsed / 60 if len(times) > 1 else 1
+        avg_damper = float(np.mean(oad))
+        diagnostic_msg = {}
+        energy_impact_msg = {}
+        ma_desired, = self.window_features(window.off_rows, "ma_desired")
+        if diagnostic == constants.ECON3:
+            energy = None
+            for sensitivity, threshold in dx.excess_damper_threshold.items():
+                if avg_damper > threshold:
+                    if energy is None:
+                        energy = window_energy_impact(ma_desired, fan_spd, self.cfm, self.eer, step)
+                    diagnostic_msg[sensitivity] = 21.1
+                    energy_impact_msg[sensitivity] = energy
+                else:
+                    diagnostic_msg[sensitivity] = 20.0
+                    energy_impact_msg[sensitivity] = 0.0
+        else:
+            oaf, = self.window_features(window.off_rows, "oaf")
+            avg_oaf = float(np.mean(oaf)) * 100.0
+            if avg_oaf < 0 or avg_oaf > 125.0:
+                self.publish(times[-1], diagnostic, constants.DX, dx.invalid_oaf_dict)
+                return
+            avg_oaf = max(0.0, min(100.0, avg_oaf))
+            excess_energy = None
+            energy = 0.0
+            thresholds = zip(dx.excess_damper_threshold.items(), dx.excess_oaf_threshold.values())
+            for (sensitivity, damper_thr), oaf_thr in thresholds:
+                excess_oaf = avg_oaf - self.desired_oaf > oaf_thr
+                if excess_oaf and excess_energy is None:
+                    excess_energy = window_energy_impact(ma_desired, fan_spd, self.cfm, self.eer, step)
+                if avg_damper > damper_thr:
+                    # Energy is carried over from the previous sensitivity unless excess OA is found.
+                    result = 34.1 if excess_oaf else 32.1
+                    energy = excess_energy if excess_oaf else energy
+                elif excess_oaf:
+                    result = 33.1
+                    energy = excess_energy
+                else:
+                    result = 30.0
+                    energy = 0.0
+                diagnostic_msg[sensitivity] = result
+                energy_impact_msg[sensitivity] = energy
+        self.publish(times[-1], diagnostic, constants.DX, diagnostic_msg)
+        self.publish(times[-1], diagnostic, constants.EI, energy_impact_msg)
+
+    def insufficient_outside_air_run(self, window, cur_time):
+        """Vectorized InsufficientOutsideAir.run_diagnostic
+        window: _Window
+        cur_time: epoch seconds
+
+        No return
+        """
+        dx = self.insufficient_outside_air
+        diagnostic = constants.ECON5
+        rows = window.econ_rows
+        if len(rows) < self.no_required_data:
+            self.publish(cur_time, diagnostic, constants.DX, dx.insufficient_data)
+            return
+        times = self.window_columns(rows)[0]
+        if self.elapsed(times) > self.max_dx_time.total_seconds():
+            self.publish(times[-1], diagnostic, constants.DX, dx.inconsistent_date)
+            return
+        oaf, = self.window_features(rows, "oaf")
+        avg_oaf = float(np.mean(oaf)) * 100.0
+        if avg_oaf < 0 or avg_oaf > 125.0:
+            self.publish(times[-1], diagnostic, constants.DX, dx.invalid_oaf_dict)
+            return
+        avg_oaf = max(0.0, min(100.0, avg_oaf))
+        diagnostic_msg = {sensitivity: 43.1 if self.desired_oaf - avg_oaf > threshold else 40.0
+                          for sensitivity, threshold in dx.ventilation_oaf_threshold.items()}
+        self.publish(times[-1], diagnostic, constants.DX, diagnostic_msg)
+
+
+class _Window(object):
+    """Bookkeeping for the window that is currently open in BatchEngine.run"""
+
+    def __init__(self):
+        self.temp_sensor_problem = None
+        self.damper_rows = []
+        self.clear_all()
+
+    def clear_all(self):
+        """Reinitialize the window, mirrors EconomizerAgent.clear_all"""
+        self.temp_rows = []
+        self.on_rows = []
+        self.off_rows = []
+        self.econ_rows = []
+        self.not_cooling = 0
+        self.economizing = 0
+
+
+class _Precondition(object):
+    """Finds where one precondition closes the window, mirrors the checks in DeviceState.process_message"""
+
+    def __init__(self, failed, messages, checked, boundary, past, no_required_data):
+        """
+        failed: numpy bool array, samples that fail the precondition
+        messages: numpy float array, pre condition message of every failing sample
+        checked: numpy bool array, samples that reach the check
+        boundary: numpy bool array, samples on a run_interval boundary
+        past: numpy int64 array, first sample more than data_window after every sample
+        no_required_data: int
+        """
+        self.messages = messages
+        self.past = past
+        self.no_required_data = no_required_data
+        self.count = np.append(0, np.cumsum(failed))
+        self.first = next_index(failed)
+        self.checked = next_index(checked)
+        self.checked_off_boundary = next_index(checked & ~boundary)
+
+    def close_row(self, start):
+        """First sample the precondition closes a window opened at start on
+        start: int
+
+        returns int, len(past) if the window does not close
+        """
+        size = len(self.past)
+        first = self.first[start]
+        if first == size:
+            return size
+        # more than no_required_data failures off a boundary, or failures older than data_window
+        close = self.checked[self.past[first]]
+        target = self.count[start] + self.no_required_data + 1
+        if target <= self.count[-1]:
+            row = np.searchsorted(self.count, target) - 1
+            close = min(close, self.checked_off_boundary[row])
+        return int(close)
+
+    def message(self, row):
+        """Pre condition message of the last failing sample at or before row
+        row: int
+
+        returns float
+        """
+        return float(self.messages[np.searchsorted(self.count, self.count[row + 1]) - 1])
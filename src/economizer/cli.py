@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import sys
+
+
+def main():
+    """Entry point of the volttron-economizer-rcx script.
+    The replay subcommand runs without importing VOLTTRON, anything else starts the agent.
+    returns int exit status
+    """
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        from economizer import replay
+        return replay.main(sys.argv[2:])
+    from economizer import economizer_agent
+    return economizer_agent.main()
+
+
+if __name__ == "__main__":
+    """Entry point for script"""
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import sys
+import logging
+
+from datetime import timedelta as td
+
+from economizer.device import RESULT_FANOUTS, compile_point_index
+from economizer.timestamps import LocalClock
+
+_log = logging.getLogger(__name__)
+
+
+class EconomizerConfig(object):
+    """
+    Analysis settings, thresholds and point mapping read from the agent
+    configuration.  The agent and the offline replay share this class so
+    both run the diagnostics with exactly the same configuration; it is
+    also the config object DeviceState reads its thresholds from.
+    """
+    def __init__(self):
+        #list of class attributes.  Default values will be filled in from reading config file
+        #string attributes
+        self.config = None
+        self.device_type = ""
+        self.economizer_type = ""
+        self.sensitivity = ""
+        self.analysis_name = ""
+        self.fan_status_name = ""
+        self.fan_sp_name = ""
+        self.oat_name = ""
+        self.rat_name = ""
+        self.mat_name = ""
+        self.oad_sig_name = ""
+        self.cool_call_name = ""
+        self.timezone = ""
+        self.clock = None
+
+        #list attributes
+        self.arguments = []
+        self.point_mapping = {}
+        # payload point name -> DeviceState data list, compiled from the point mapping
+        self.point_index = {}
+
+        #int attributes
+        self.data_window = 0
+        self.no_required_data = 0
+        self.open_damper_time = 0
+        self.run_interval = 0
+
+        #bool attributes
+        self.constant_volume = False
+        self.window_statistics = False
+        self.consolidated_results = False
+        self.result_fanout = "full"
+
+        #heartbeat interval of the stage metrics in seconds, 0 disables the heartbeat
+        self.metrics_interval = 0
+
+        #outbound publish queue
+        self.publish_queue_size = 10000
+        self.publish_policy = "block"
+        self.publish_batch_size = 100
+
+        #worker processes the devices are sharded across, 0 processes them in the agent
+        self.worker_processes = 0
+        self.shard_batch_size = 50
+        self.shard_flush_interval = 1.0
+
+        #spread the window boundaries of the devices and evaluate due windows on a timer wheel
+        self.stagger_windows = False
+        self.evaluation_limit = 0
+        self.evaluation_tick = 1.0
+
+        #seconds between the checks for windows past data_window without a closing message, 0 disables them
+        self.window_check_interval = 60
+
+        #file the window state of every device is saved to, empty disables snapshots
+        self.snapshot_path = ""
+        self.snapshot_interval = 300
+
+        #float attributes
+        self.econ_hl_temp = 0.0
+        self.temp_band = 0.0
+        self.oaf_temperature_threshold = 0.0
+        self.oaf_economizing_threshold = 0.0
+        self.cooling_enabled_threshold = 0.0
+        self.temp_difference_threshold = 0.0
+        self.mat_low_threshold = 0.0
+        self.mat_high_threshold = 0.0
+        self.rat_low_threshold = 0.0
+        self.rat_high_threshold = 0.0
+        self.oat_low_threshold = 0.0
+        self.oat_high_threshold = 0.0
+        self.oat_mat_check = 0.0
+        self.open_damper_threshold = 0.0
+        self.minimum_damper_setpoint = 0.0
+        self.desired_oaf = 0.0
+        self.low_supply_fan_threshold = 0.0
+        self.excess_damper_threshold = 0.0
+        self.excess_oaf_threshold = 0.0
+        self.ventilation_oaf_threshold = 0.0
+        self.insufficient_damper_threshold = 0.0
+        self.temp_damper_threshold = 0.0
+        self.rated_cfm = 0.0
+        self.eer = 0.0
+        self.temp_deadband = 0.0
+
+    def load_config(self, config):
+        """Read and check every analysis setting from a configuration dictionary
+        config: dictionary, same format as the agent configuration
+        no return
+        """
+        self.config = config
+        self.read_analysis_config()
+        self.read_argument_config()
+        self.read_point_mapping()
+        self.configuration_value_check()
+
+    def read_analysis_config(self):
+        """read the analysis name and the local timezone
+        no return
+        """
+        self.analysis_name = self.config.get("analysis_name", "analysis_name")
+        self.timezone = self.config.get("local_timezone", "US/Pacific")
+        self.clock = LocalClock(self.timezone)
+
+    def read_argument_config(self):
+        """read all the config arguments section
+        no return
+        """
+
+        self.arguments = self.config.get("arguments", {})
+
+        self.econ_hl_temp = self.read_argument("econ_hl_temp", 65.0)
+        self.constant_volume = self.read_argument("constant_volume", False)
+        self.temp_band = self.read_argument("temp_band", 1.0)
+        self.oaf_temperature_threshold = self.read_argument("oaf_temperature_threshold", 5.0)
+        self.oaf_economizing_threshold = self.read_argument("oaf_economizing_threshold", 25.0)
+        self.cooling_enabled_threshold = self.read_argument("cooling_enabled_threshold", 5.0)
+        self.temp_difference_threshold = self.read_argument("temp_difference_threshold", 4.0)
+        self.mat_low_threshold = self.read_argument("mat_low_threshold", 50.0)
+        self.mat_high_threshold = self.read_argument("mat_high_threshold", 90.0)
+        self.rat_low_threshold = self.read_argument("rat_low_threshold", 50.0)
+        self.rat_high_threshold = self.read_argument("rat_high_threshold", 90.0)
+        self.oat_low_threshold = self.read_argument("oat_low_threshold", 30.0)
+        self.oat_high_threshold = self.read_argument("oat_high_threshold", 110.0)
+        self.oat_mat_check = self.read_argument("oat_mat_check", 5.0)
+        self.open_damper_threshold = self.read_argument("open_damper_threshold", 80.0)
+        self.minimum_damper_setpoint = self.read_argument("minimum_damper_setpoint", 20.0)
+        self.desired_oaf = self.read_argument("desired_oaf", 10.0)
+        self.low_supply_fan_threshold = self.read_argument("low_supply_fan_threshold", 15.0)
+        self.excess_damper_threshold = self.read_argument("excess_damper_threshold", 20.0)
+        self.excess_oaf_threshold = self.read_argument("excess_oaf_threshold", 20.0)
+        self.ventilation_oaf_threshold = self.read_argument("ventilation_oaf_threshold", 5.0)
+        self.insufficient_damper_threshold = self.read_argument("insufficient_damper_threshold", 15.0)
+        self.temp_damper_threshold = self.read_argument("temp_damper_threshold", 90.0)
+        self.rated_cfm = self.read_argument("rated_cfm", 6000.0)
+        self.eer = self.read_argument("eer", 10.0)
+        self.temp_deadband = self.read_argument("temp_band", 1.0)
+        self.run_interval = self.read_argument("data_window", 30)
+        self.data_window = td(minutes=self.read_argument("data_window", 30))
+        self.no_required_data = self.read_argument("no_required_data", 15)
+        self.open_damper_time = td(minutes=self.read_argument("open_damper_time", 5))
+        self.device_type = self.read_argument("device_type", "ahu").lower()
+        self.economizer_type = self.read_argument("economizer_type", "DDB").lower()
+        self.sensitivity = self.read_argument("sensitivity", ["low", "normal", "high"])
+        self.point_mapping = self.read_argument("point_mapping", {})
+        self.window_statistics = self.read_argument("window_statistics", False)
+        self.consolidated_results = self.read_argument("consolidated_results", False)
+        self.result_fanout = self.read_argument("result_fanout", "full").lower()
+        self.metrics_interval = self.read_argument("metrics_interval", 0)
+        self.publish_queue_size = self.read_argument("publish_queue_size", 10000)
+        self.publish_policy = self.read_argument("publish_policy", "block").lower()
+        self.publish_batch_size = self.read_argument("publish_batch_size", 100)
+        self.worker_processes = self.read_argument("worker_processes", 0)
+        self.shard_batch_size = self.read_argument("shard_batch_size", 50)
+        self.shard_flush_interval = self.read_argument("shard_flush_interval", 1.0)
+        self.stagger_windows = self.read_argument("stagger_windows", False)
+        self.evaluation_limit = self.read_argument("evaluation_limit", 0)
+        self.evaluation_tick = self.read_argument("evaluation_tick", 1.0)
+        self.window_check_interval = self.read_argument("window_check_interval", 60)
+        self.snapshot_path = self.read_argument("snapshot_path", "")
+        self.snapshot_interval = self.read_argument("snapshot_interval", 300)
+
+    def setup_default_config(self):
+        """Setup a default configuration object"""
+        default_config = {
+            "application": "economizer.economizer_rcx.Application",
+            "device": {
+                "campus": "campus",
+                "building": "building",
+                "unit": {
+                    "rtu4": {
+                        "subdevices": []
+                    }
+                }
+            },
+            "analysis_name": "Economizer_AIRCx",
+            "actuation_mode": "PASSIVE",
+            "arguments": {
+                "point_mapping": {
+                    "supply_fan_status": "FanStatus",
+                    "outdoor_air_temperature": "outsideairtemp",
+                    "return_air_temperature": "ReturnAirTemp",
+                    "mixed_air_temperature": "MixedAirTemp",
+                    "outdoor_damper_signal": "Damper",
+                    "cool_call": "CompressorStatus",
+                    "supply_fan_speed": "SupplyFanSpeed"
+                },
+                "device_type": "rtu",
+                "economizer_type": "DDB",
+                "data_window": 30,
+                "no_required_data": 15,
+                "open_damper_time": 5,
+                "econ_hl_temp": 65.0,
+                "sensitivity": ["low", "normal", "high"],
+                "constant_volume": False,
+                "low_supply_fan_threshold": 15.0,
+                "mat_low_threshold": 50.0,
+                "mat_high_threshold": 90.0,
+                "oat_low_threshold": 30.0,
+                "oat_high_threshold": 110.0,
+                "oat_mat_check": 5.0,
+                "rat_low_threshold": 50.0,
+                "rat_high_threshold": 90.0,
+                "temp_difference_threshold": 4.0,
+                "open_damper_threshold": 80.0,
+                "oaf_economizing_threshold": 25.0,
+                "oaf_temperature_threshold": 5.0,
+                "cooling_enabled_threshold": 5.0,
+                "minimum_damper_setpoint": 20.0,
+                "excess_damper_threshold": 20.0,
+                "insufficient_damper_threshold": 15.0,
+                "excess_oaf_threshold": 20.0,
+                "ventilation_oaf_threshold": 5.0,
+                "temp_damper_threshold": 90,
+                "desired_oaf": 10.0,
+                "rated_cfm": 6000.0,
+                "eer": 10.0,
+                "temp_band": 1.0,
+                "window_statistics": False,
+                "consolidated_results": False,
+                "result_fanout": "full",
+                "metrics_interval": 0,
+                "publish_queue_size": 10000,
+                "publish_policy": "block",
+                "publish_batch_size": 100,
+                "worker_processes": 0,
+                "shard_batch_size": 50,
+                "shard_flush_interval": 1.0,
+                "stagger_windows": False,
+                "evaluation_limit": 0,
+                "evaluation_tick": 1.0,
+                "window_check_interval": 60,
+                "snapshot_path": "",
+                "snapshot_interval": 300
+            }
+        }
+        return default_config
+
+    def read_argument(self, config_key, default_value):
+        """Method that reads an argument from the config file and returns the value or returns the default value if key is not present in config file
+        return mixed (string or float or int or dict)
+        """
+        return_value = default_value
+        if config_key in self.arguments:
+            return_value = self.arguments[config_key]
+        return return_value
+
+    def read_point_mapping(self):
+        """Method that reads the point mapping and sets the values
+        no return
+        """
+        self.fan_status_name = self.get_point_mapping_or_none("supply_fan_status")
+        self.fan_sp_name = self.get_point_mapping_or_none("supply_fan_speed")
+        self.oat_name = self.get_point_mapping_or_none("outdoor_air_temperature")
+        self.rat_name = self.get_point_mapping_or_none("return_air_temperature")
+        self.mat_name = self.get_point_mapping_or_none("mixed_air_temperature")
+        self.oad_sig_name = self.get_point_mapping_or_none("outdoor_damper_signal")
+        self.cool_call_name = self.get_point_mapping_or_none("cool_call")
+        self.point_index = compile_point_index(self)
+
+    def get_point_mapping_or_none(self, name):
+        """ Get the item from the point mapping, or return None
+        return mixed (string or float or int or dic
+        """
+        value = self.point_mapping.get(name, None)
+        if value is not None and isinstance(value, str):
+            value = [value]
+        return value
+
+    def configuration_value_check(self):
+        """Method goes through the configuration values and checks them for correctness.  Will error if values are not correct. Some may change based on specific settings
+        no return
+        """
+        if self.sensitivity is not None and self.sensitivity == "custom":
+            self.oaf_temperature_threshold = max(5.0, min(self.oaf_temperature_threshold, 15.0))
+            self.cooling_enabled_threshold = max(5.0, min(self.cooling_enabled_threshold, 50.0))
+            self.temp_difference_threshold = max(2.0, min(self.temp_difference_threshold, 6.0))
+            self.mat_low_threshold = max(40.0, min(self.mat_low_threshold, 60.0))
+            self.mat_high_threshold = max(80.0, min(self.mat_high_threshold, 90.0))
+            self.rat_low_threshold = max(40.0, min(self.rat_low_threshold, 60.0))
+            self.rat_high_threshold = max(80.0, min(self.rat_high_threshold, 90.0))
+            self.oat_low_threshold = max(20.0, min(self.oat_low_threshold, 40.0))
+            self.oat_high_threshold = max(90.0, min(self.oat_high_threshold, 125.0))
+            self.open_damper_threshold = max(60.0, min(self.open_damper_threshold, 90.0))
+            self.minimum_damper_setpoint = max(0.0, min(self.minimum_damper_setpoint, 50.0))
+            self.desired_oaf = max(5.0, min(self.desired_oaf, 30.0))
+        else:
+            self.oaf_temperature_threshold = 5.0
+            self.cooling_enabled_threshold = 5.0
+            self.temp_difference_threshold = 4.0
+            self.mat_low_threshold = 50.0
+            self.mat_high_threshold = 90.0
+            self.rat_low_threshold = 50.0
+            self.rat_high_threshold = 90.0
+            self.oat_low_threshold = 30.0
+            self.oat_high_threshold = 110.0
+            self.open_damper_threshold = 80.0
+            self.minimum_damper_setpoint = 20.0
+            self.desired_oaf = 10.0
+        self.sensitivity = ["low", "normal", "high"]
+        if self.economizer_type == "hl":
+            self.econ_hl_temp = max(50.0, min(self.econ_hl_temp, 75.0))
+        else:
+            self.econ_hl_temp = None
+        self.temp_band = max(0.5, min(self.temp_band, 10.0))
+        if self.device_type not in ("ahu", "rtu"):
+            _log.error("device_type must be specified as AHU or RTU in configuration file.")
+            sys.exit()
+
+        if self.economizer_type.lower() not in ("ddb", "hl"):
+            _log.error("economizer_type must be specified as DDB or HL in configuration file.")
+            sys.exit()
+
+        if self.result_fanout not in RESULT_FANOUTS:
+            _log.error("result_fanout must be one of {}, using full.".format(", ".join(RESULT_FANOUTS)))
+            self.result_fanout = "full"
+
+        if self.fan_sp_name is None and self.fan_status_name is None:
+            _log.error("SupplyFanStatus or SupplyFanSpeed are required to verify AHU status.")
+            sys.exit()
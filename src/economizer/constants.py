@@ -22,7 +22,8 @@
 # ===----------------------------------------------------------------------===
 # }}}
 
-from volttron.utils.jsonapi import dumps
+from json import dumps, loads
+from types import MappingProxyType
 
 ECON1 = "Temperature Sensor Dx"
 ECON2 = "Not Economizing When Unit Should Dx"
@@ -34,6 +35,9 @@ EI = "/energy impact"
 
 DX_LIST = [ECON1, ECON2, ECON3, ECON4, ECON5]
 
+# table of the consolidated result document
+RESULTS = "results"
+
 FAN_OFF = -99.3
 OAF = -89.2
 OAT_LIMIT = -79.2
@@ -41,14 +45,116 @@ RAT_LIMIT = -69.2
 MAT_LIMIT = -59.2
 TEMP_SENSOR = -49.2
 
+SENSITIVITIES = ("low", "normal", "high")
+
 
 def table_log_format(name, timestamp, data):
     """ Return a formatted string for use in the log"""
     return str(str(name) + "&" + str(timestamp) + "->[" + str(data) + "]")
 
 
-def table_publish_format(name, timestamp, table, data):
-    """ Return a dictionary for use in the results publish"""
-    table_key = str(str(name) + "&" + str(timestamp))
-    data = dumps(data)
-    return [table_key, [table, data]]
+class EncodedPayload(object):
+    """ A constant result payload serialized once, when the diagnostic is configured"""
+    __slots__ = ("value", "text")
+
+    def __init__(self, value):
+        self.value = value
+        self.text = dumps(value)
+
+    def __eq__(self, other):
+        if isinstance(other, EncodedPayload):
+            return self.value == other.value
+        return NotImplemented
+
+    def __str__(self):
+        return str(self.value)
+
+    __repr__ = __str__
+
+
+_sensitivity_tables = {}
+_sensitivity_payloads = {}
+
+
+def sensitivity_table(low, normal, high):
+    """ Return a read-only low/normal/high threshold table.  Diagnostics
+    configured with the same thresholds share one table."""
+    key = (low, normal, high, type(low), type(normal), type(high))
+    table = _sensitivity_tables.get(key)
+    if table is None:
+        table = _sensitivity_tables[key] = MappingProxyType(dict(zip(SENSITIVITIES, (low, normal, high))))
+    return table
+
+
+def sensitivity_payload(value):
+    """ Return the shared EncodedPayload of one result code for every sensitivity"""
+    key = (value, type(value))
+    payload = _sensitivity_payloads.get(key)
+    if payload is None:
+        payload = _sensitivity_payloads[key] = EncodedPayload({sensitivity: value for sensitivity in SENSITIVITIES})
+    return payload
+
+
+class ResultRecord(object):
+    """ One diagnostic result.  The values are serialized when the result is
+    published, constant payloads are EncodedPayloads serialized up front."""
+    __slots__ = ("analysis", "device", "timestamp", "diagnostic", "kind", "values")
+
+    def __init__(self, analysis, timestamp, diagnostic, kind, values, device=None):
+        self.analysis = analysis
+        self.device = device
+        self.timestamp = timestamp
+        self.diagnostic = diagnostic
+        self.kind = kind
+        self.values = values
+
+    @property
+    def table(self):
+        """ Result table, the diagnostic name followed by DX or EI"""
+        return self.diagnostic + self.kind
+
+    @property
+    def date(self):
+        """ Timestamp as published in the Date header"""
+        return str(self.timestamp)
+
+    def payload(self):
+        """ Return the serialized values"""
+        if isinstance(self.values, EncodedPayload):
+            return self.values.text
+        return dumps(self.values)
+
+    def decoded(self):
+        """ Return the values as they are read back from the serialized payload"""
+        if isinstance(self.values, EncodedPayload):
+            return loads(self.values.text)
+        return loads(dumps(self.values))
+
+    def __eq__(self, other):
+        if not isinstance(other, ResultRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return "ResultRecord({}&{}, {}, {})".format(self.analysis, self.timestamp, self.table, self.values)
+
+
+def table_publish_format(name, timestamp, diagnostic, kind, data):
+    """ Return a ResultRecord for use in the results publish"""
+    return ResultRecord(name, timestamp, diagnostic, kind, data)
+
+
+def consolidated_publish_format(results):
+    """ Return the timestamp and one document holding every result of a window.
+    The document is keyed by diagnostic, then by result table.  A diagnostic
+    reports at most once per table, later entries for the same table (the
+    pre condition codes after a temperature sensor fault) are not added."""
+    timestamp = None
+    document = {}
+    for record in results:
+        timestamp = record.date
+        entry = document.setdefault(record.diagnostic, {"timestamp": timestamp})
+        result_table = record.kind.lstrip("/")
+        if result_table not in entry:
+            entry[result_table] = record.decoded()
+    return timestamp, document
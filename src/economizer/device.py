@@ -0,0 +1,643 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import logging
+import time
+
+from economizer import constants
+from economizer.metrics import DeviceMetrics
+from economizer.preconditions import PreconditionTracker
+from economizer.wheel import topic_offset
+from economizer.diagnostics.TemperatureSensor import TemperatureSensor
+from economizer.diagnostics.EconCorrectlyOn import EconCorrectlyOn
+from economizer.diagnostics.EconCorrectlyOff import EconCorrectlyOff
+from economizer.diagnostics.ExcessOutsideAir import ExcessOutsideAir
+from economizer.diagnostics.InsufficientOutsideAir import InsufficientOutsideAir
+from economizer.diagnostics.SampleBuffer import SampleBuffer
+from economizer.diagnostics.WindowStatistics import WindowStatistics
+
+_log = logging.getLogger(__name__)
+
+# (config point name attribute, DeviceState data list) in the order a point
+# mapped to more than one role is resolved
+POINT_ROLES = (
+    ("fan_status_name", "fan_status_data"),
+    ("oad_sig_name", "damper_data"),
+    ("oat_name", "oat_data"),
+    ("mat_name", "mat_data"),
+    ("rat_name", "rat_data"),
+    ("cool_call_name", "cooling_data"),
+    ("fan_sp_name", "fan_sp_data")
+)
+
+
+# where a unit's results are published: the unit and every subdevice, the unit
+# only, or the unit plus one index topic listing its subdevices
+RESULT_FANOUTS = ("full", "unit", "index")
+# table of the subdevice index published with the "index" fan-out
+SUBDEVICE_INDEX = "subdevices"
+# results are published on the VOLTTRON record topics (topics.RECORD)
+RECORD_TOPIC = "record/{subtopic}"
+
+
+def mean(data):
+    """Arithmetic mean of the values of one point role
+    data: list of float
+
+    returns float
+    """
+    if not data:
+        raise ValueError("mean requires at least one data point")
+    return sum(data) / len(data)
+
+
+def compile_point_index(config):
+    """Build the lookup from payload point name to DeviceState data list
+    config: object with the point name attributes listed in POINT_ROLES
+
+    returns dictionary
+    """
+    point_index = {}
+    for name_attribute, role in POINT_ROLES:
+        for point in getattr(config, name_attribute) or []:
+            point_index.setdefault(point, role)
+    return point_index
+
+
+class DeviceState(object):
+    """
+    Diagnostic state for a single device topic.
+    DeviceState owns the precondition lists, the window timestamps and the
+    five diagnostics for one AHU/RTU so that samples from different devices
+    are never mixed into the same window.  Thresholds are read from the
+    shared config object (the agent).
+    """
+
+    def __init__(self, topic, publish_list, config):
+        self.topic = topic
+        self.publish_list = publish_list
+        self.config = config
+
+        # Parsed data from the last message
+        self.damper_data = []
+        self.oat_data = []
+        self.mat_data = []
+        self.rat_data = []
+        self.cooling_data = []
+        self.fan_sp_data = []
+        self.fan_status_data = []
+        self.missing_data = []
+        self.ignored_points = 0
+        self.results_publish = []
+        # result table -> record topics, built on first use
+        self.topic_cache = {}
+        # pre condition code -> encoded payload
+        self.pre_condition_payloads = {}
+        # epoch seconds of the first and last sample in the current window
+        self.window_start = None
+        self.window_end = None
+        # sample epoch and wall-clock arrival of the last message
+        self.last_epoch = None
+        self.last_arrival = None
+        # device seconds between the last two messages
+        self.scrape_interval = None
+        # minutes the window boundaries of this device are shifted by
+        self.window_offset = 0
+        # leave due windows in close_due for the owner to close with close_pending_window
+        self.defer_close = False
+        self.close_due = None
+        self.set_window_offset()
+
+        self.fan_speed = None
+        self.oat = 0.0
+        self.rat = 0.0
+        self.mat = 0.0
+        self.oad = 0.0
+
+        # Precondition flags
+        self.oaf_condition = PreconditionTracker()
+        self.unit_status = PreconditionTracker()
+        self.sensor_limit = PreconditionTracker()
+        self.sensor_limit_msg = ""
+        self.temp_sensor_problem = None
+
+        # per-stage timers and counters, kept across windows
+        self.metrics = DeviceMetrics()
+
+        # diagnostics, sharing one buffer of accepted samples
+        self.buffer = SampleBuffer()
+        self.temp_sensor = None
+        self.econ_correctly_on = None
+        self.econ_correctly_off = None
+        self.excess_outside_air = None
+        self.insufficient_outside_air = None
+        self.create_diagnostics()
+
+    def create_diagnostics(self):
+        """creates the diagnostic classes
+        No return
+        """
+        self.temp_sensor = TemperatureSensor(self.buffer)
+        self.econ_correctly_on = EconCorrectlyOn(self.buffer)
+        self.econ_correctly_off = EconCorrectlyOff(self.buffer)
+        self.excess_outside_air = ExcessOutsideAir(self.buffer)
+        self.insufficient_outside_air = InsufficientOutsideAir(self.buffer)
+        if self.config.window_statistics:
+            self.temp_sensor.use_statistics(WindowStatistics())
+            self.temp_sensor.sensor_damper_dx.use_statistics(WindowStatistics())
+            self.econ_correctly_on.use_statistics(WindowStatistics())
+            self.econ_correctly_off.use_statistics(WindowStatistics())
+            self.excess_outside_air.use_statistics(WindowStatistics())
+            self.insufficient_outside_air.use_statistics(WindowStatistics())
+        self.configure_diagnostics()
+
+    def configure_diagnostics(self):
+        """Set the thresholds of the config on the diagnostics, keeping the samples of their windows
+        No return
+        """
+        config = self.config
+        cfm = float(config.rated_cfm)
+        self.buffer.clock = config.clock
+        self.temp_sensor.set_class_values(config.analysis_name, self.results_publish, config.data_window, config.no_required_data, config.temp_difference_threshold, config.open_damper_time, config.temp_damper_threshold)
+        self.econ_correctly_on.set_class_values(config.analysis_name, self.results_publish, config.data_window, config.no_required_data, config.minimum_damper_setpoint, config.open_damper_threshold, cfm, config.eer)
+        self.econ_correctly_off.set_class_values(config.analysis_name, self.results_publish, config.data_window, config.no_required_data, config.minimum_damper_setpoint, config.desired_oaf, cfm, config.eer)
+        self.excess_outside_air.set_class_values(config.analysis_name, self.results_publish, config.data_window, config.no_required_data, config.minimum_damper_setpoint, config.desired_oaf, cfm, config.eer)
+        self.insufficient_outside_air.set_class_values(config.analysis_name, self.results_publish, config.data_window, config.no_required_data, config.desired_oaf)
+        if config.window_statistics:
+            desired_oaf = config.desired_oaf / 100.0
+            for diagnostic, statistics_oaf in ((self.econ_correctly_on, None), (self.econ_correctly_off, desired_oaf),
+                                               (self.excess_outside_air, desired_oaf)):
+                statistics = diagnostic.statistics
+                statistics.cfm = cfm
+                statistics.eer = config.eer
+                statistics.desired_oaf = statistics_oaf
+
+    def update_config(self, publish_list):
+        """Apply changed thresholds and publish paths without discarding the open windows
+        publish_list: list of string
+
+        No return
+        """
+        self.publish_list = publish_list
+        self.topic_cache = {}
+        self.pre_condition_payloads = {}
+        self.configure_diagnostics()
+        self.set_window_offset()
+
+    def set_window_offset(self):
+        """Shift the window boundaries by a per-topic number of minutes when stagger_windows is set,
+        so that devices do not all close their windows on the same minute
+        No return
+        """
+        config = self.config
+        self.window_offset = topic_offset(self.topic, min(config.run_interval, 60)) if config.stagger_windows else 0
+
+    def result_topics(self, table):
+        """Record topics a result table is published on for the configured fan-out
+        table: string
+
+        returns list of string
+        """
+        result_topics = self.topic_cache.get(table)
+        if result_topics is None:
+            publish_list = self.publish_list if self.config.result_fanout == "full" else self.publish_list[:1]
+            result_topics = [RECORD_TOPIC.format(subtopic="/".join([self.config.analysis_name, publish_device, table]))
+                             for publish_device in publish_list]
+            self.topic_cache[table] = result_topics
+        return result_topics
+
+    def subdevice_index(self):
+        """Index topic and subdevice list published with the "index" fan-out
+        returns (string, list of string) or None when there is nothing to index
+        """
+        if self.config.result_fanout != "index" or len(self.publish_list) < 2:
+            return None
+        return self.result_topics(SUBDEVICE_INDEX)[0], self.publish_list[1:]
+
+    def take_publishes(self):
+        """Format the pending results as publishes and clear them.
+        The agent adds the bus headers for the Date of each publish.
+        returns list of (topic, Date header, message)
+        """
+        results = self.results_publish
+        if not results:
+            return []
+        publishes = []
+        if self.config.consolidated_results:
+            timestamp, document = constants.consolidated_publish_format(results)
+            for result_topic in self.result_topics(constants.RESULTS):
+                publishes.append((result_topic, timestamp, document))
+        else:
+            for record in results:
+                # serialized once, whatever the number of topics it goes to
+                result = record.payload()
+                date = record.date
+                for result_topic in self.result_topics(record.table):
+                    publishes.append((result_topic, date, result))
+        index = self.subdevice_index()
+        if index is not None:
+            index_topic, subdevices = index
+            publishes.append((index_topic, results[-1].date, subdevices))
+        results.clear()
+        return publishes
+
+    def parse_data_message(self, message):
+        """Breaks down the passed VOLTTRON message
+        message: dictionary
+        no return
+        """
+        data_message = message[0]
+        # reset the data arrays on new message
+        self.fan_status_data = []
+        self.damper_data = []
+        self.oat_data = []
+        self.mat_data = []
+        self.rat_data = []
+        self.cooling_data = []
+        self.fan_sp_data = []
+        self.missing_data = []
+
+        # only visit the mapped point names, not every point of the payload
+        mapped = 0
+        for point, role in self.config.point_index.items():
+            if point not in data_message:
+                continue
+            mapped += 1
+            value = data_message[point]
+            if value is not None:
+                getattr(self, role).append(value)
+        self.ignored_points = len(data_message) - mapped
+        _log.debug("Ignored {} of {} points from publish".format(self.ignored_points, len(data_message)))
+
+    def check_for_missing_data(self):
+        """Method that checks the parsed message results for any missing data
+        return bool
+        """
+        config = self.config
+        if not self.oat_data:
+            self.missing_data.append(config.oat_name)
+        if not self.rat_data:
+            self.missing_data.append(config.rat_name)
+        if not self.mat_data:
+            self.missing_data.append(config.mat_name)
+        if not self.damper_data:
+            self.missing_data.append(config.oad_sig_name)
+        if not self.cooling_data:
+            self.missing_data.append(config.cool_call_name)
+        if not self.fan_status_data and not self.fan_sp_data:
+            self.missing_data.append(config.fan_status_name)
+
+        if self.missing_data:
+            return True
+        return False
+
+    def check_fan_status(self, epoch):
+        """Check the status and speed of the fan
+        epoch: float, epoch seconds of the sample
+
+        return int
+        """
+        if self.fan_status_data:
+            supply_fan_status = int(max(self.fan_status_data))
+        else:
+            supply_fan_status = None
+
+        if self.fan_sp_data:
+            self.fan_speed = mean(self.fan_sp_data)
+        else:
+            self.fan_speed = None
+        if supply_fan_status is None:
+            if self.fan_speed > self.config.low_supply_fan_threshold:
+                supply_fan_status = 1
+            else:
+                supply_fan_status = 0
+
+        if not supply_fan_status:
+            self.unit_status.record(epoch)
+        return supply_fan_status
+
+    def check_temperature_condition(self, epoch):
+        """Ensure the OAT and RAT have minimum difference to allow for a conclusive diagnostic.
+        epoch: float, epoch seconds of the sample
+
+        no return
+        """
+        if abs(self.oat - self.rat) < self.config.oaf_temperature_threshold:
+            self.oaf_condition.record(epoch)
+
+    def check_elapsed_time(self, current_time, epoch, condition, message):
+        """Check on time since last message to see if it is in data window
+        current_time: datetime
+        epoch: float, current_time as epoch seconds
+        condition: PreconditionTracker
+        message: string
+        """
+        config = self.config
+        elapsed_time = epoch - condition.first if condition.count else 0.0
+        if (((current_time.minute - self.window_offset) % config.run_interval and condition.count > config.no_required_data)
+                or elapsed_time > config.data_window.total_seconds()):
+            self.pre_conditions(message, current_time)
+            self.clear_all()
+            return True
+        return False
+
+    def clear_all(self):
+        """Reinitialize all data arrays for diagnostics.
+        no return
+        """
+        self.clear_diagnostics()
+        self.temp_sensor_problem = None
+        self.unit_status.clear()
+        self.oaf_condition.clear()
+        self.sensor_limit.clear()
+        self.sensor_limit_msg = ""
+        self.window_start = None
+        self.window_end = None
+
+    def clear_diagnostics(self):
+        """Clear the diagnositcs
+        no return
+        """
+        self.temp_sensor.clear_data()
+        self.econ_correctly_on.clear_data()
+        self.econ_correctly_off.clear_data()
+        self.excess_outside_air.clear_data()
+        self.insufficient_outside_air.clear_data()
+
+    def pre_conditions(self, message, cur_time):
+        """Publish Pre conditions not met
+        message: string
+        cur_time: datetime time delta
+
+        no return
+        """
+        analysis_name = self.config.analysis_name
+        payload = self.pre_condition_payloads.get(message)
+        if payload is None:
+            dx_msg = {}
+            for sensitivity in self.config.sensitivity:
+                dx_msg[sensitivity] = message
+            payload = self.pre_condition_payloads[message] = constants.EncodedPayload(str(dx_msg))
+
+        for diagnostic in constants.DX_LIST:
+            _log.info(constants.table_log_format(analysis_name, cur_time, (diagnostic + constants.DX + ":" + str(payload))))
+            self.results_publish.append(
+                constants.table_publish_format(analysis_name, cur_time, diagnostic, constants.DX, payload))
+
+    def sensor_limit_check(self, current_time, epoch):
+        """ Check temperature limits on sensors.
+        current_time: datetime time delta
+        epoch: float, current_time as epoch seconds
+
+        return bool
+        """
+        config = self.config
+        if self.oat < config.oat_low_threshold or self.oat > config.oat_high_threshold:
+            self.sensor_limit.record(epoch)
+            self.sensor_limit_msg = constants.OAT_LIMIT
+            _log.info("OAT sensor is outside of bounds: {}".format(current_time))
+        elif self.mat < config.mat_low_threshold or self.mat > config.mat_high_threshold:
+            self.sensor_limit.record(epoch)
+            self.sensor_limit_msg = constants.MAT_LIMIT
+            _log.info("MAT sensor is outside of bounds: {}".format(current_time))
+        elif self.rat < config.rat_low_threshold or self.rat > config.rat_high_threshold:
+            self.sensor_limit.record(epoch)
+            self.sensor_limit_msg = constants.RAT_LIMIT
+            _log.info("RAT sensor is outside of bounds: {}".format(current_time))
+
+    def determine_cooling_condition(self):
+        """Determine if the unit is in a cooling mode and if conditions are favorable for economizing.
+
+        return float
+        return Bool/int
+        """
+        config = self.config
+        cool_call = None
+        if config.device_type == "ahu":
+            clg_vlv_pos = mean(self.cooling_data)
+            cool_call = True if clg_vlv_pos > config.cooling_enabled_threshold else False
+        elif config.device_type == "rtu":
+            cool_call = int(max(self.cooling_data))
+
+        if config.economizer_type == "ddb":
+            econ_condition = (self.rat - self.oat) > config.temp_band
+        else:
+            econ_condition = (config.econ_hl_temp - self.oat) > config.temp_band
+
+        return econ_condition, cool_call
+
+    def new_data_message(self, current_time, message, epoch=None):
+        """Run one device message through the preconditions and diagnostics.
+        Results are left in results_publish for the agent to publish.
+        current_time: datetime
+        message: list, the device "all" publish
+        epoch: float, current_time as epoch seconds
+
+        no return
+        """
+        results_start = len(self.results_publish)
+        self.last_arrival = time.time()
+        self.process_message(current_time, message, epoch)
+        self.label_results(results_start)
+
+    def label_results(self, results_start):
+        """Set the device topic on the results added since results_start
+        results_start: int, index in results_publish
+
+        no return
+        """
+        for index in range(results_start, len(self.results_publish)):
+            self.results_publish[index].device = self.topic
+
+    def process_message(self, current_time, message, epoch):
+        """Preconditions and diagnostics for one device message, see new_data_message
+        current_time: datetime
+        message: list, the device "all" publish
+        epoch: float or None
+
+        no return
+        """
+        config = self.config
+        metrics = self.metrics
+        metrics.count("messages")
+        if self.close_due is not None:
+            # the window must be closed before this sample can open the next one
+            self.close_pending_window()
+        start = metrics.start()
+        if epoch is None:
+            epoch = current_time.timestamp()
+        if self.last_epoch is not None and epoch > self.last_epoch:
+            self.scrape_interval = epoch - self.last_epoch
+        self.last_epoch = epoch
+        self.parse_data_message(message)
+        missing_data = self.check_for_missing_data()
+        start = metrics.lap("parse", start)
+        # want to do no further parsing if data is missing
+        if missing_data:
+            metrics.count("missing_data")
+            _log.info("Missing data from publish: {}".format(self.missing_data))
+            return
+
+        # check on fan status and speed
+        fan_status = self.check_fan_status(epoch)
+        precondition_failed = self.check_elapsed_time(current_time, epoch, self.unit_status, constants.FAN_OFF)
+        start = metrics.lap("fan_status", start)
+        if not fan_status or precondition_failed:
+            metrics.count("fan_off")
+            _log.info("Supply fan is off: {}".format(current_time))
+            return
+        else:
+            _log.info("Supply fan is on: {}".format(current_time))
+
+        if self.fan_speed is None and config.constant_volume:
+            self.fan_speed = 100.0
+
+        self.oat = mean(self.oat_data)
+        self.rat = mean(self.rat_data)
+        self.mat = mean(self.mat_data)
+        self.oad = mean(self.damper_data)
+
+        # check on temperature condition
+        self.check_temperature_condition(epoch)
+        precondition_failed = self.check_elapsed_time(current_time, epoch, self.oaf_condition, constants.OAF)
+        start = metrics.lap("temperature_condition", start)
+        if self.oaf_condition.failed(epoch) or precondition_failed:
+            metrics.count("oaf_condition")
+            _log.info("OAT and RAT readings are too close : {}".format(current_time))
+            return
+
+        self.sensor_limit_check(current_time, epoch)
+        precondition_failed = self.check_elapsed_time(current_time, epoch, self.sensor_limit, self.sensor_limit_msg)
+        start = metrics.lap("sensor_limit", start)
+        # check to see if there was a temperature sensor out of bounds
+        if self.sensor_limit.failed(epoch) or precondition_failed:
+            metrics.count("sensor_limit")
+            return
+        if self.window_start is None:
+            self.window_start = epoch
+        self.window_end = epoch
+        fan_fraction = self.fan_speed / 100.0 if self.fan_speed is not None else 1.0
+        row = self.buffer.append(current_time, self.oat, self.rat, self.mat, self.oad, fan_fraction)
+        self.temp_sensor_problem = self.temp_sensor.temperature_algorithm(self.oat, self.rat, self.mat, self.oad, current_time, row)
+        econ_condition, cool_call = self.determine_cooling_condition()
+        _log.debug("Cool call: {} - Economizer status: {}".format(cool_call, econ_condition))
+
+        if self.temp_sensor_problem is not None and not self.temp_sensor_problem:
+            self.econ_correctly_on.economizer_on_algorithm(cool_call, self.oat, self.rat, self.mat, self.oad, econ_condition, current_time, self.fan_speed, row)
+            self.econ_correctly_off.economizer_off_algorithm(self.oat, self.rat, self.mat, self.oad, econ_condition, current_time, self.fan_speed, row)
+            self.excess_outside_air.excess_ouside_air_algorithm(self.oat, self.rat, self.mat, self.oad, econ_condition, current_time, self.fan_speed, row)
+            self.insufficient_outside_air.insufficient_outside_air_algorithm(self.oat, self.rat, self.mat, current_time, row)
+        start = metrics.lap("algorithms", start)
+
+        elapsed_time = self.window_end - self.window_start
+        if (not (current_time.minute - self.window_offset) % config.run_interval
+                or elapsed_time > config.data_window.total_seconds()):
+            if self.defer_close:
+                self.close_due = current_time
+                return
+            self.close_window(current_time)
+            metrics.lap("run_diagnostic", start)
+
+    def close_pending_window(self):
+        """Close the window left due in close_due when defer_close is set
+        returns bool, False when no window was due
+        """
+        current_time = self.close_due
+        if current_time is None:
+            return False
+        self.close_due = None
+        start = self.metrics.start()
+        results_start = len(self.results_publish)
+        self.close_window(current_time)
+        self.metrics.lap("run_diagnostic", start)
+        self.label_results(results_start)
+        return True
+
+    def close_window(self, current_time):
+        """Run the diagnostics on the current window and start a new one
+        current_time: datetime
+
+        no return
+        """
+        self.temp_sensor.run_diagnostic(current_time)
+        if self.temp_sensor_problem is not None and not self.temp_sensor_problem:
+            self.econ_correctly_on.run_diagnostic(current_time)
+            self.econ_correctly_off.run_diagnostic(current_time)
+            self.excess_outside_air.run_diagnostic(current_time)
+            self.insufficient_outside_air.run_diagnostic(current_time)
+        elif self.temp_sensor_problem:
+            self.pre_conditions(constants.TEMP_SENSOR, current_time)
+        self.clear_all()
+        self.metrics.count("windows")
+
+    def window_opened(self):
+        """Epoch seconds of the oldest sample held for the current window
+        returns float or None when no window is open
+        """
+        opened = [condition.first for condition in (self.unit_status, self.oaf_condition, self.sensor_limit)
+                  if condition.count]
+        if self.window_start is not None:
+            opened.append(self.window_start)
+        return min(opened) if opened else None
+
+    def window_deadline(self):
+        """Wall-clock epoch seconds after which a device with an open window has stopped publishing:
+        data_window and one scrape interval (data_window until the interval is known) after its last message
+        returns float or None when no window is open
+        """
+        if self.window_opened() is None or self.last_arrival is None:
+            return None
+        data_window = self.config.data_window.total_seconds()
+        grace = data_window if self.scrape_interval is None else self.scrape_interval
+        return self.last_arrival + data_window + grace
+
+    def close_expired_window(self, now=None):
+        """Close the open window once it is past its deadline without a message having closed it.
+        The results are timestamped with the device time elapsed since its last message and are
+        left in results_publish; the released samples are dropped from the buffer.
+        now: float, wall-clock epoch seconds
+
+        returns bool, True when a window was closed
+        """
+        if now is None:
+            now = time.time()
+        deadline = self.window_deadline()
+        if deadline is None or now <= deadline or self.close_due is not None:
+            return False
+        current_time = self.config.clock.local_time(self.last_epoch + now - self.last_arrival)
+        results_start = len(self.results_publish)
+        if self.window_start is not None:
+            self.close_window(current_time)
+        else:
+            # only preconditions failed, report the first as the next message would have
+            for condition, message in ((self.unit_status, constants.FAN_OFF), (self.oaf_condition, constants.OAF),
+                                       (self.sensor_limit, self.sensor_limit_msg)):
+                if condition.count:
+                    self.pre_conditions(message, current_time)
+                    break
+            self.clear_all()
+        self.buffer.release()
+        self.metrics.count("expired_windows")
+        self.label_results(results_start)
+        return True
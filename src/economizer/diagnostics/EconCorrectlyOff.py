@@ -26,37 +26,39 @@ import logging
 
 from datetime import timedelta as td
 
-from volttron.utils import setup_logging
-from volttron.utils.math_utils import mean
+import numpy as np
 
 from economizer import constants
+from economizer.diagnostics.SampleBuffer import BufferedDiagnostic, to_microseconds
 
-setup_logging()
 _log = logging.getLogger(__name__)
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s   %(levelname)-8s %(message)s",
-                    datefmt="%m-%d-%y %H:%M:%S")
 
 
-class EconCorrectlyOff(object):
+class EconCorrectlyOff(BufferedDiagnostic):
     """
     Air-side HVAC economizer diagnostic for AHU/RTU systems.
     EconCorrectlyOff uses metered data from a BAS or controller to diagnose
     if an AHU/RTU is economizing when it should not.
     """
-
-    def __init__(self):
-        # Initialize data arrays
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.fan_spd_values = []
-        self.oad_values = []
-        self.timestamp = []
-        self.econ_timestamp = []
+    __slots__ = ("econ_count", "analysis_name", "economizing", "max_dx_time", "data_window",
+                 "no_required_data", "min_damper_sp", "excess_damper_threshold", "economizing_dict",
+                 "inconsistent_date", "desired_oaf", "cfm", "eer", "results_publish", "insufficient_data")
+
+    # Application result messages
+    alg_result_messages = (
+        "The OAD should be at the minimum position but is significantly above this value.",
+        "No problems detected.",
+        "Inconclusive results, could not verify the status of the economizer."
+    )
+
+    def __init__(self, buffer=None):
+        # Accepted rows of the (shared) sample buffer
+        super(EconCorrectlyOff, self).__init__(buffer)
+        self.econ_count = 0
         self.analysis_name = ""
 
-        # Initialize not_cooling and not_economizing flags
-        self.economizing = []
+        # Initialize the economizing count
+        self.economizing = 0
 
         self.max_dx_time = None
         self.data_window = None
@@ -66,18 +68,11 @@ class EconCorrectlyOff(object):
         self.economizing_dict = None
         self.inconsistent_date = None
         self.desired_oaf = None
-        self.analysis = None
         self.cfm = None
         self.eer = None
         self.results_publish = None
         self.insufficient_data = None
 
-        # Application result messages
-        self.alg_result_messages = [
-            "The OAD should be at the minimum position but is significantly above this value.",
-             "No problems detected.",
-             "Inconclusive results, could not verify the status of the economizer."]
-
     def set_class_values(self, analysis_name, results_publish, data_window, no_required_data, minimum_damper_setpoint, desired_oaf, cfm, eer):
         """Set the values needed for doing the diagnostics
         analysis_name: string
@@ -90,49 +85,44 @@ class EconCorrectlyOff(object):
 
         No return
         """
-        self.max_dx_time = td(minutes=60) if td(minutes=60) > data_window else data_window * 3 / 2
+        self.max_dx_time = to_microseconds(td(minutes=60) if td(minutes=60) > data_window else data_window * 3 / 2)
         self.results_publish = results_publish
         self.data_window = data_window
         self.analysis_name = analysis_name
         self.no_required_data = no_required_data
         self.min_damper_sp = minimum_damper_setpoint
-        self.excess_damper_threshold = {
-            "low": minimum_damper_setpoint*2.0,
-            "normal": minimum_damper_setpoint,
-            "high":  minimum_damper_setpoint*0.5
-        }
-        self.economizing_dict = {key: 25.0 for key in self.excess_damper_threshold}
-        self.inconsistent_date = {key: 23.2 for key in self.excess_damper_threshold}
-        self.insufficient_data = {key: 22.2 for key in self.excess_damper_threshold}
+        self.excess_damper_threshold = constants.sensitivity_table(
+            minimum_damper_setpoint*2.0, minimum_damper_setpoint, minimum_damper_setpoint*0.5)
+        self.economizing_dict = constants.sensitivity_payload(25.0)
+        self.inconsistent_date = constants.sensitivity_payload(23.2)
+        self.insufficient_data = constants.sensitivity_payload(22.2)
         self.desired_oaf = desired_oaf
+        self.buffer.set_desired_oaf(desired_oaf / 100.0)
         self.cfm = cfm
         self.eer = eer
 
     def run_diagnostic(self, current_time):
 
-        if self.timestamp:
-            elapsed_time = self.timestamp[-1] - self.timestamp[0]
-        else:
-            elapsed_time = td(minutes=0)
+        elapsed_time = self.elapsed_time()
         if self.economizer_conditions(current_time):
             return
-        if len(self.timestamp) >= self.no_required_data:
+        if self.sample_count() >= self.no_required_data:
             if elapsed_time > self.max_dx_time:
-                _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+                _log.info(constants.table_log_format(self.analysis_name, self.last_time(), (
                         constants.ECON3 + constants.DX + ":" + str(self.inconsistent_date))))
-                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1],
-                                                                           (constants.ECON3 + constants.DX),
+                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.last_time(),
+                                                                           constants.ECON3, constants.DX,
                                                                            self.inconsistent_date))
                 self.clear_data()
                 return
             self.economizing_when_not_needed()
         else:
             self.results_publish.append(constants.table_publish_format(self.analysis_name, current_time,
-                                                                       (constants.ECON3 + constants.DX),
+                                                                       constants.ECON3, constants.DX,
                                                                        self.insufficient_data))
             self.clear_data()
 
-    def economizer_off_algorithm(self, oat, rat, mat, oad, econ_condition, cur_time, fan_sp):
+    def economizer_off_algorithm(self, oat, rat, mat, oad, econ_condition, cur_time, fan_sp, row=None):
         """Perform the Econ Correctly Off class algorithm
         oat: float
         rat: float
@@ -141,32 +131,29 @@ class EconCorrectlyOff(object):
         econ_condition: float
         cur_time: datetime time delta
         fan_sp: float
+        row: int, row of the sample when it is already in the shared buffer
 
         No return
         """
 
         economizing = self.economizing_check(econ_condition, cur_time)
-        self.econ_timestamp.append(cur_time)
+        self.econ_count += 1
         if economizing:
             return
 
-        self.oat_values.append(oat)
-        self.mat_values.append(mat)
-        self.rat_values.append(rat)
-        self.oad_values.append(oad)
-        self.timestamp.append(cur_time)
-
-        fan_sp = fan_sp / 100.0 if fan_sp is not None else 1.0
-        self.fan_spd_values.append(fan_sp)
+        if row is None:
+            fan_sp = fan_sp / 100.0 if fan_sp is not None else 1.0
+            row = self.buffer.append(cur_time, oat, rat, mat, oad, fan_sp)
+        self.accept(row)
 
     def economizer_conditions(self, current_time):
-        if len(self.economizing) >= len(self.econ_timestamp)*0.5:
+        if self.economizing >= self.econ_count*0.5:
             _log.info(constants.table_log_format(self.analysis_name, current_time,
                                                  (constants.ECON3 + constants.DX + ":" + str(self.economizing_dict))))
             self.results_publish.append(
                 constants.table_publish_format(self.analysis_name,
                                                current_time,
-                                               (constants.ECON3 + constants.DX),
+                                               constants.ECON3, constants.DX,
                                                self.economizing_dict))
             self.clear_data()
             return True
@@ -180,7 +167,7 @@ class EconCorrectlyOff(object):
         """
         if econ_condition:
             _log.info("{}: economizing, for data {} --{}.".format(constants.ECON3, econ_condition, cur_time))
-            self.economizing.append(cur_time)
+            self.economizing += 1
             return True
         return False
 
@@ -189,15 +176,22 @@ class EconCorrectlyOff(object):
         No return
         """
         desired_oaf = self.desired_oaf / 100.0
-        avg_damper = mean(self.oad_values)
+        if self.statistics is not None:
+            avg_damper = self.statistics.oad_sum / self.statistics.count
+        else:
+            avg_damper = float(np.mean(self.oad_values))
         diagnostic_msg = {}
         energy_impact = {}
+        # the energy impact is the same for every sensitivity that reports a fault
+        window_energy = None
         for sensitivity, threshold in self.excess_damper_threshold.items():
             if avg_damper > threshold:
                 msg = "{} - {}: {}".format(constants.ECON3, sensitivity, self.alg_result_messages[0])
                 # color_code = "RED"
                 result = 21.1
-                energy = self.energy_impact_calculation(desired_oaf)
+                if window_energy is None:
+                    window_energy = self.energy_impact_calculation(desired_oaf)
+                energy = window_energy
             else:
                 msg = "{} - {}: {}".format(constants.ECON3, sensitivity, self.alg_result_messages[1])
                 # color_code = "GREEN"
@@ -206,48 +200,25 @@ class EconCorrectlyOff(object):
             _log.info(msg)
             diagnostic_msg.update({sensitivity: result})
             energy_impact.update({sensitivity: energy})
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+        last_time = self.last_time()
+        _log.info(constants.table_log_format(self.analysis_name, last_time, (
                     constants.ECON3 + constants.DX + ":" + str(diagnostic_msg))))
         self.results_publish.append(
-            constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON3 + constants.DX), diagnostic_msg))
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+            constants.table_publish_format(self.analysis_name, last_time, constants.ECON3, constants.DX, diagnostic_msg))
+        _log.info(constants.table_log_format(self.analysis_name, last_time, (
                     constants.ECON3 + constants.EI + ":" + str(energy_impact))))
         self.results_publish.append(
-            constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON3 + constants.EI), energy_impact))
+            constants.table_publish_format(self.analysis_name, last_time, constants.ECON3, constants.EI, energy_impact))
         self.clear_data()
 
-    def energy_impact_calculation(self, desired_oaf):
-        """ Calculate the impact the temperature values have
-        desired_oaf: float
-
-        returns float
-        """
-        ei = 0.0
-        energy_calc = [
-            (1.08 * spd * self.cfm * (mat - (oat * desired_oaf + (rat * (1.0 - desired_oaf))))) / (1000.0 * self.eer)
-            for mat, oat, rat, spd in zip(self.mat_values, self.oat_values, self.rat_values, self.fan_spd_values)
-            if (mat - (oat * desired_oaf + (rat * (1.0 - desired_oaf)))) > 0
-        ]
-        if energy_calc:
-            avg_step = (self.timestamp[-1] - self.timestamp[0]).total_seconds() / 60 if len(self.timestamp) > 1 else 1
-            dx_time = (len(energy_calc) - 1) * avg_step if len(energy_calc) > 1 else 1.0
-            ei = (sum(energy_calc) * 60.0) / (len(energy_calc) * dx_time)
-            ei = round(ei, 2)
-        return ei
-
     def clear_data(self):
         """
         Reinitialize data arrays.
 
         No return
         """
-        self.oad_values = []
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.fan_spd_values = []
-        self.timestamp = []
-        self.econ_timestamp = []
-        self.economizing = []
+        self.clear_rows()
+        self.econ_count = 0
+        self.economizing = 0
 
 
@@ -26,37 +26,40 @@ import logging
 
 from datetime import timedelta as td
 
-from volttron.utils import setup_logging
-from volttron.utils.math_utils import mean
+import numpy as np
 
 from economizer import constants
+from economizer.diagnostics.SampleBuffer import BufferedDiagnostic, to_microseconds
 
-setup_logging()
 _log = logging.getLogger(__name__)
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s   %(levelname)-8s %(message)s",
-                    datefmt="%m-%d-%y %H:%M:%S")
 
 
-class EconCorrectlyOn(object):
+class EconCorrectlyOn(BufferedDiagnostic):
     """Air-side HVAC economizer diagnostic for AHU/RTU systems.
     EconCorrectlyOn uses metered data from a BAS or controller to diagnose
     if an AHU/RTU is economizing when it should.
     """
-
-    def __init__(self):
-        # Initialize data arrays
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.fan_spd_values = []
-        self.oad_values = []
-        self.timestamp = []
-        self.econ_timestamp = []
+    __slots__ = ("econ_count", "analysis_name", "not_cooling", "not_economizing", "open_damper_threshold",
+                 "oaf_economizing_threshold", "minimum_damper_setpoint", "data_window", "no_required_data", "cfm",
+                 "eer", "results_publish", "max_dx_time", "not_economizing_dict", "not_cooling_dict",
+                 "inconsistent_date", "insufficient_data")
+
+    # Application result messages
+    alg_result_messages = (
+        "Conditions are favorable for economizing but the the OAD is frequently below 100%.",
+        "No problems detected.",
+        "Conditions are favorable for economizing and OAD is 100% but the OAF is too low."
+    )
+
+    def __init__(self, buffer=None):
+        # Accepted rows of the (shared) sample buffer
+        super(EconCorrectlyOn, self).__init__(buffer)
+        self.econ_count = 0
         self.analysis_name = ""
 
-        # Initialize not_cooling and not_economizing flags
-        self.not_cooling = []
-        self.not_economizing = []
+        # Initialize the not_cooling and not_economizing counts
+        self.not_cooling = 0
+        self.not_economizing = 0
 
         self.open_damper_threshold = None
         self.oaf_economizing_threshold = None
@@ -73,13 +76,6 @@ class EconCorrectlyOn(object):
         self.inconsistent_date = None
         self.insufficient_data = None
 
-        # Application result messages
-        self.alg_result_messages = [
-            "Conditions are favorable for economizing but the the OAD is frequently below 100%.",
-            "No problems detected.",
-            "Conditions are favorable for economizing and OAD is 100% but the OAF is too low."
-        ]
-
     def set_class_values(self, analysis_name, results_publish, data_window, no_required_data, minimum_damper_setpoint, open_damper_threshold, cfm, eer):
         """Set the values needed for doing the diagnostics
         analysis_name: string
@@ -93,53 +89,43 @@ class EconCorrectlyOn(object):
         No return
         """
         self.results_publish = results_publish
-        self.open_damper_threshold = open_damper_threshold
-        self.oaf_economizing_threshold = {
-            "low": open_damper_threshold - 30.0,
-            "normal": open_damper_threshold - 20.0,
-            "high": open_damper_threshold - 10.0
-        }
-        self.open_damper_threshold = {
-            "low": open_damper_threshold - 10.0,
-            "normal": open_damper_threshold,
-            "high": open_damper_threshold + 10.0
-        }
+        self.oaf_economizing_threshold = constants.sensitivity_table(
+            open_damper_threshold - 30.0, open_damper_threshold - 20.0, open_damper_threshold - 10.0)
+        self.open_damper_threshold = constants.sensitivity_table(
+            open_damper_threshold - 10.0, open_damper_threshold, open_damper_threshold + 10.0)
         self.minimum_damper_setpoint = minimum_damper_setpoint
         self.data_window = data_window
         self.analysis_name = analysis_name
         self.no_required_data = no_required_data
         self.cfm = cfm
         self.eer = eer
-        self.max_dx_time = td(minutes=60) if td(minutes=60) > data_window else data_window * 3 / 2
-        self.not_economizing_dict = {key: 15.0 for key in self.oaf_economizing_threshold}
-        self.not_cooling_dict = {key: 14.0 for key in self.oaf_economizing_threshold}
-        self.insufficient_data = {key: 13.2 for key in self.oaf_economizing_threshold}
-        self.inconsistent_date = {key: 13.2 for key in self.oaf_economizing_threshold}
+        self.max_dx_time = to_microseconds(td(minutes=60) if td(minutes=60) > data_window else data_window * 3 / 2)
+        self.not_economizing_dict = constants.sensitivity_payload(15.0)
+        self.not_cooling_dict = constants.sensitivity_payload(14.0)
+        self.insufficient_data = constants.sensitivity_payload(13.2)
+        self.inconsistent_date = constants.sensitivity_payload(13.2)
 
     def run_diagnostic(self, current_time):
-        if self.timestamp:
-            elapsed_time = self.timestamp[-1] - self.timestamp[0]
-        else:
-            elapsed_time = td(minutes=0)
+        elapsed_time = self.elapsed_time()
         if self.economizer_conditions(current_time):
             return
-        if len(self.timestamp) >= self.no_required_data:
+        if self.sample_count() >= self.no_required_data:
             if elapsed_time > self.max_dx_time:
-                _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+                _log.info(constants.table_log_format(self.analysis_name, self.last_time(), (
                         constants.ECON3 + constants.DX + ":" + str(self.inconsistent_date))))
-                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1],
-                                                                           (constants.ECON2 + constants.DX),
+                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.last_time(),
+                                                                           constants.ECON2, constants.DX,
                                                                            self.inconsistent_date))
                 self.clear_data()
                 return
             self.not_economizing_when_needed()
         else:
             self.results_publish.append(constants.table_publish_format(self.analysis_name, current_time,
-                                                                       (constants.ECON2 + constants.DX),
+                                                                       constants.ECON2, constants.DX,
                                                                        self.insufficient_data))
             self.clear_data()
 
-    def economizer_on_algorithm(self, cooling_call, oat, rat, mat, oad, econ_condition, cur_time, fan_sp):
+    def economizer_on_algorithm(self, cooling_call, oat, rat, mat, oad, econ_condition, cur_time, fan_sp, row=None):
         """Perform the Econ Correctly On class algorithm
         cooling_call: int
         oat: float
@@ -149,23 +135,20 @@ class EconCorrectlyOn(object):
         econ_condition: float
         cur_time: datetime time delta
         fan_sp: float
+        row: int, row of the sample when it is already in the shared buffer
 
         No return
         """
 
         economizing = self.economizing_check(cooling_call, econ_condition, cur_time)
-        self.econ_timestamp.append(cur_time)
+        self.econ_count += 1
         if not economizing:
             return
 
-        self.oat_values.append(oat)
-        self.mat_values.append(mat)
-        self.rat_values.append(rat)
-        self.oad_values.append(oad)
-        self.timestamp.append(cur_time)
-
-        fan_sp = fan_sp / 100.0 if fan_sp is not None else 1.0
-        self.fan_spd_values.append(fan_sp)
+        if row is None:
+            fan_sp = fan_sp / 100.0 if fan_sp is not None else 1.0
+            row = self.buffer.append(cur_time, oat, rat, mat, oad, fan_sp)
+        self.accept(row)
 
     def economizing_check(self, cooling_call, econ_condition, cur_time):
         """Check conditions to see if should be economizing
@@ -177,25 +160,24 @@ class EconCorrectlyOn(object):
         """
         if not cooling_call:
             _log.info("{}: not cooling at {}".format(constants.ECON2, cur_time))
-            self.not_cooling.append(cur_time)
+            self.not_cooling += 1
             return False
 
         if not econ_condition:
             _log.info("{}: not economizing at {}.".format(constants.ECON2, cur_time))
-            self.not_economizing.append(cur_time)
+            self.not_economizing += 1
             return False
 
         return True
 
     def economizer_conditions(self, current_time):
-        print(f'not_cooling: {len(self.not_cooling)}, econ_timestamp: {len(self.econ_timestamp)*0.5}')
-        if len(self.not_cooling) >= len(self.econ_timestamp)*0.5:
+        if self.not_cooling >= self.econ_count*0.5:
             _log.info(constants.table_log_format(self.analysis_name, current_time,
                                                  (constants.ECON2 + constants.DX + ":" + str(self.not_cooling_dict))))
             self.results_publish.append(
                 constants.table_publish_format(self.analysis_name,
                                                current_time,
-                                               (constants.ECON2 + constants.DX),
+                                               constants.ECON2, constants.DX,
                                                self.not_cooling_dict))
             self.clear_data()
             return True
@@ -205,22 +187,32 @@ class EconCorrectlyOn(object):
         """If the detected problems(s) are consistent then generate a fault message(s).
         No return
         """
-        oaf = [(m - r) / (o - r) for o, r, m in zip(self.oat_values, self.rat_values, self.mat_values)]
-        avg_oaf = max(0.0, min(100.0, mean(oaf) * 100.0))
-        avg_damper_signal = mean(self.oad_values)
+        if self.statistics is not None:
+            avg_oaf = max(0.0, min(100.0, self.statistics.mean_oaf() * 100.0))
+            avg_damper_signal = self.statistics.oad_sum / self.statistics.count
+        else:
+            oaf = self.oaf_values
+            avg_oaf = max(0.0, min(100.0, float(np.mean(oaf)) * 100.0))
+            avg_damper_signal = float(np.mean(self.oad_values))
         diagnostic_msg = {}
         energy_impact = {}
+        # the energy impact is the same for every sensitivity that reports a fault
+        window_energy = None
         thresholds = zip(self.open_damper_threshold.items(), self.oaf_economizing_threshold.items())
         for (key, damper_thr), (key2, oaf_thr) in thresholds:
             if avg_damper_signal < damper_thr:
                 msg = "{} - {}: {}".format(constants.ECON2, key, self.alg_result_messages[0])
                 result = 11.1
-                energy = self.energy_impact_calculation()
+                if window_energy is None:
+                    window_energy = self.energy_impact_calculation()
+                energy = window_energy
             else:
                 if avg_oaf < oaf_thr:
                     msg = "{} - {}: {} - OAF={}".format(constants.ECON2, key, self.alg_result_messages[2], avg_oaf)
                     result = 12.1
-                    energy = self.energy_impact_calculation()
+                    if window_energy is None:
+                        window_energy = self.energy_impact_calculation()
+                    energy = window_energy
                 else:
                     msg = "{} - {}: {}".format(constants.ECON2, key, self.alg_result_messages[1])
                     result = 10.0
@@ -228,45 +220,25 @@ class EconCorrectlyOn(object):
             _log.info(msg)
             diagnostic_msg.update({key: result})
             energy_impact.update({key: energy})
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+        last_time = self.last_time()
+        _log.info(constants.table_log_format(self.analysis_name, last_time, (
                     constants.ECON2 + constants.DX + ":" + str(diagnostic_msg))))
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+        _log.info(constants.table_log_format(self.analysis_name, last_time, (
                     constants.ECON2 + constants.EI + ":" + str(energy_impact))))
         self.results_publish.append(
-            constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON2 + constants.DX), diagnostic_msg))
+            constants.table_publish_format(self.analysis_name, last_time, constants.ECON2, constants.DX, diagnostic_msg))
         self.results_publish.append(
-            constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON2 + constants.EI), energy_impact))
+            constants.table_publish_format(self.analysis_name, last_time, constants.ECON2, constants.EI, energy_impact))
         self.clear_data()
 
-    def energy_impact_calculation(self):
-        """Calculate the impact the temperature values have
-
-        returns float
-        """
-        ei = 0.0
-        energy_calc = [1.08 * spd * self.cfm * (mat - oat) / (1000.0 * self.eer)
-                       for mat, oat, spd in zip(self.mat_values, self.oat_values, self.fan_spd_values)
-                       if (mat - oat) > 0]
-        if energy_calc:
-            avg_step = (self.timestamp[-1] - self.timestamp[0]).total_seconds() / 60 if len(self.timestamp) > 1 else 1
-            dx_time = (len(energy_calc) - 1) * avg_step if len(energy_calc) > 1 else 1.0
-            ei = (sum(energy_calc) * 60.0) / (len(energy_calc) * dx_time)
-            ei = round(ei, 2)
-        return ei
-
     def clear_data(self):
         """
         Reinitialize data arrays.
 
         No return
         """
-        self.oad_values = []
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.fan_spd_values = []
-        self.timestamp = []
-        self.econ_timestamp = []
-        self.not_economizing = []
-        self.not_cooling = []
+        self.clear_rows()
+        self.econ_count = 0
+        self.not_economizing = 0
+        self.not_cooling = 0
 
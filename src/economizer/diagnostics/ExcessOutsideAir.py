@@ -26,34 +26,30 @@ import logging
 
 from datetime import timedelta as td
 
-from volttron.utils import setup_logging
-from volttron.utils.math_utils import mean
+import numpy as np
 
 from economizer import constants
+from economizer.diagnostics.SampleBuffer import BufferedDiagnostic, to_microseconds
 
-setup_logging()
 _log = logging.getLogger(__name__)
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s   %(levelname)-8s %(message)s",
-                    datefmt="%m-%d-%y %H:%M:%S")
 
 
-class ExcessOutsideAir(object):
+class ExcessOutsideAir(BufferedDiagnostic):
     """
     Air-side HVAC ventilation diagnostic.
     ExcessOutside Air uses metered data from a controller or
     BAS to diagnose when an AHU/RTU is providing excess outdoor air.
     """
-
-    def __init__(self):
-        # Initialize data arrays
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.oad_values = []
-        self.timestamp = []
-        self.econ_timestamp = []
-        self.fan_spd_values = []
-        self.economizing = []
+    __slots__ = ("econ_count", "economizing", "analysis_name", "results_publish", "cfm", "eer", "max_dx_time",
+                 "data_window", "no_required_data", "excess_oaf_threshold", "min_damper_sp", "desired_oaf",
+                 "excess_damper_threshold", "economizing_dict", "invalid_oaf_dict", "inconsistent_date",
+                 "insufficient_data")
+
+    def __init__(self, buffer=None):
+        # Accepted rows of the (shared) sample buffer
+        super(ExcessOutsideAir, self).__init__(buffer)
+        self.econ_count = 0
+        self.economizing = 0
         self.analysis_name = ""
         self.results_publish = None
 
@@ -70,7 +66,7 @@ class ExcessOutsideAir(object):
         self.economizing_dict = None
         self.invalid_oaf_dict = None
         self.inconsistent_date = None
-        self.nsufficient_data = None
+        self.insufficient_data = None
 
     def set_class_values(self, analysis_name, results_publish, data_window, no_required_data, min_damper_sp, desired_oaf, cfm, eer):
         """Set the values needed for doing the diagnostics
@@ -87,51 +83,42 @@ class ExcessOutsideAir(object):
         self.results_publish = results_publish
         self.cfm = cfm
         self.eer = eer
-        self.max_dx_time = td(minutes=60) if td(minutes=60) > data_window else data_window * 3 / 2
+        self.max_dx_time = to_microseconds(td(minutes=60) if td(minutes=60) > data_window else data_window * 3 / 2)
         self.data_window = data_window
         self.analysis_name = analysis_name
         self.no_required_data = no_required_data
-        self.excess_oaf_threshold = {
-            "low": min_damper_sp*2.0 + 10.0,
-            "normal": min_damper_sp + 10.0,
-            "high": min_damper_sp*0.5 + 10.0
-        }
+        self.excess_oaf_threshold = constants.sensitivity_table(
+            min_damper_sp*2.0 + 10.0, min_damper_sp + 10.0, min_damper_sp*0.5 + 10.0)
         self.min_damper_sp = min_damper_sp
         self.desired_oaf = desired_oaf
-        self.excess_damper_threshold = {
-            "low": min_damper_sp*2.0,
-            "normal": min_damper_sp,
-            "high":  min_damper_sp*0.5
-        }
-        self.economizing_dict = {key: 36.0 for key in self.excess_damper_threshold}
-        self.invalid_oaf_dict = {key: 31.2 for key in self.excess_damper_threshold}
-        self.insufficient_data = {key: 32.2 for key in self.excess_damper_threshold}
-        self.inconsistent_date = {key: 35.2 for key in self.excess_damper_threshold}
+        self.buffer.set_desired_oaf(desired_oaf / 100.0)
+        self.excess_damper_threshold = constants.sensitivity_table(min_damper_sp*2.0, min_damper_sp, min_damper_sp*0.5)
+        self.economizing_dict = constants.sensitivity_payload(36.0)
+        self.invalid_oaf_dict = constants.sensitivity_payload(31.2)
+        self.insufficient_data = constants.sensitivity_payload(32.2)
+        self.inconsistent_date = constants.sensitivity_payload(35.2)
 
     def run_diagnostic(self, current_time):
-        if self.timestamp:
-            elapsed_time = self.timestamp[-1] - self.timestamp[0]
-        else:
-            elapsed_time = td(minutes=0)
+        elapsed_time = self.elapsed_time()
         if self.economizer_conditions(current_time):
             return
-        if len(self.timestamp) >= self.no_required_data:
+        if self.sample_count() >= self.no_required_data:
             if elapsed_time > self.max_dx_time:
-                _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+                _log.info(constants.table_log_format(self.analysis_name, self.last_time(), (
                         constants.ECON3 + constants.DX + ":" + str(self.inconsistent_date))))
-                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1],
-                                                                           (constants.ECON4 + constants.DX),
+                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.last_time(),
+                                                                           constants.ECON4, constants.DX,
                                                                            self.inconsistent_date))
                 self.clear_data()
                 return
             self.excess_oa()
         else:
             self.results_publish.append(constants.table_publish_format(self.analysis_name, current_time,
-                                                                       (constants.ECON4 + constants.DX),
+                                                                       constants.ECON4, constants.DX,
                                                                        self.insufficient_data))
             self.clear_data()
 
-    def excess_ouside_air_algorithm(self, oat, rat, mat, oad, econ_condition, cur_time, fan_sp):
+    def excess_ouside_air_algorithm(self, oat, rat, mat, oad, econ_condition, cur_time, fan_sp, row=None):
         """Perform the excess outside air class algorithm
         oat: float
         rat: float
@@ -140,31 +127,28 @@ class ExcessOutsideAir(object):
         econ_condition: float
         cur_time: datetime time delta
         fan_sp: float
+        row: int, row of the sample when it is already in the shared buffer
 
         No return
         """
         economizing = self.economizing_check(econ_condition, cur_time)
-        self.econ_timestamp.append(cur_time)
+        self.econ_count += 1
         if economizing:
             return
 
-        self.oad_values.append(oad)
-        self.oat_values.append(oat)
-        self.rat_values.append(rat)
-        self.mat_values.append(mat)
-        self.timestamp.append(cur_time)
-
-        fan_sp = fan_sp / 100.0 if fan_sp is not None else 1.0
-        self.fan_spd_values.append(fan_sp)
+        if row is None:
+            fan_sp = fan_sp / 100.0 if fan_sp is not None else 1.0
+            row = self.buffer.append(cur_time, oat, rat, mat, oad, fan_sp)
+        self.accept(row)
 
     def economizer_conditions(self, current_time):
-        if len(self.economizing) >= len(self.econ_timestamp) * 0.5:
+        if self.economizing >= self.econ_count * 0.5:
             _log.info(constants.table_log_format(self.analysis_name, current_time,
                                                  (constants.ECON4 + constants.DX + ":" + str(self.economizing_dict))))
             self.results_publish.append(
                 constants.table_publish_format(self.analysis_name,
                                                current_time,
-                                               (constants.ECON4 + constants.DX),
+                                               constants.ECON4, constants.DX,
                                                self.economizing_dict))
             self.clear_data()
             return True
@@ -178,7 +162,7 @@ class ExcessOutsideAir(object):
         """
         if econ_condition:
             _log.info("{}: economizing, for data {} --{}.".format(constants.ECON3, econ_condition, cur_time))
-            self.economizing.append(cur_time)
+            self.economizing += 1
             return True
         return False
 
@@ -187,9 +171,13 @@ class ExcessOutsideAir(object):
         No return
         """
         energy = 0.0
-        oaf = [(m - r) / (o - r) for o, r, m in zip(self.oat_values, self.rat_values, self.mat_values)]
-        avg_oaf = mean(oaf) * 100.0
-        avg_damper = mean(self.oad_values)
+        if self.statistics is not None:
+            avg_oaf = self.statistics.mean_oaf() * 100.0
+            avg_damper = self.statistics.oad_sum / self.statistics.count
+        else:
+            oaf = self.oaf_values
+            avg_oaf = float(np.mean(oaf)) * 100.0
+            avg_damper = float(np.mean(self.oad_values))
         desired_oaf = self.desired_oaf / 100.0
         diagnostic_msg = {}
         energy_impact = {}
@@ -197,14 +185,16 @@ class ExcessOutsideAir(object):
         if avg_oaf < 0 or avg_oaf > 125.0:
             msg = ("{}: Inconclusive result, unexpected OAF value: {}".format(constants.ECON4, avg_oaf))
             _log.info(msg)
-            _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+            _log.info(constants.table_log_format(self.analysis_name, self.last_time(), (
                         constants.ECON4 + constants.DX + ":" + str(self.invalid_oaf_dict))))
             self.results_publish.append(
-                constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON4 + constants.DX), self.invalid_oaf_dict))
+                constants.table_publish_format(self.analysis_name, self.last_time(), constants.ECON4, constants.DX, self.invalid_oaf_dict))
             self.clear_data()
             return
 
         avg_oaf = max(0.0, min(100.0, avg_oaf))
+        # the energy impact is the same for every sensitivity that reports a fault
+        window_energy = None
         thresholds = zip(self.excess_damper_threshold.items(), self.excess_oaf_threshold.items())
         for (key, damper_thr), (key2, oaf_thr) in thresholds:
             if avg_damper > damper_thr:
@@ -216,13 +206,17 @@ class ExcessOutsideAir(object):
                            "but is significantly above that value. Excess outdoor air is "
                            "being provided; This could significantly increase "
                            "heating and cooling costs".format(constants.ECON4))
-                    energy = self.energy_impact_calculation(desired_oaf)
+                    if window_energy is None:
+                        window_energy = self.energy_impact_calculation(desired_oaf)
+                    energy = window_energy
                     result = 34.1
             elif avg_oaf - self.desired_oaf > oaf_thr:
                 msg = ("{}: Excess outdoor air is being provided, this could "
                        "increase heating and cooling energy consumption.".format(constants.ECON4))
                 # color_code = "RED"
-                energy = self.energy_impact_calculation(desired_oaf)
+                if window_energy is None:
+                    window_energy = self.energy_impact_calculation(desired_oaf)
+                energy = window_energy
                 result = 33.1
             else:
                 # color_code = "GREEN"
@@ -233,46 +227,23 @@ class ExcessOutsideAir(object):
             _log.info(msg)
             energy_impact.update({key: energy})
             diagnostic_msg.update({key: result})
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+        last_time = self.last_time()
+        _log.info(constants.table_log_format(self.analysis_name, last_time, (
                     constants.ECON4 + constants.DX + ":" + str(diagnostic_msg))))
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+        _log.info(constants.table_log_format(self.analysis_name, last_time, (
                     constants.ECON4 + constants.EI + ":" + str(energy_impact))))
         self.results_publish.append(
-            constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON4 + constants.DX), diagnostic_msg))
+            constants.table_publish_format(self.analysis_name, last_time, constants.ECON4, constants.DX, diagnostic_msg))
         self.results_publish.append(
-            constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON4 + constants.EI), energy_impact))
+            constants.table_publish_format(self.analysis_name, last_time, constants.ECON4, constants.EI, energy_impact))
         self.clear_data()
 
-    def energy_impact_calculation(self, desired_oaf):
-        """ Calculate the impact the temperature values have
-        desired_oaf: float
-
-        returns float
-        """
-        ei = 0.0
-        energy_calc = [
-            (1.08 * spd * self.cfm * (mat - (oat * desired_oaf + (rat * (1.0 - desired_oaf))))) / (1000.0 * self.eer)
-            for mat, oat, rat, spd in zip(self.mat_values, self.oat_values, self.rat_values, self.fan_spd_values)
-            if (mat - (oat * desired_oaf + (rat * (1.0 - desired_oaf)))) > 0
-        ]
-        if energy_calc:
-            avg_step = (self.timestamp[-1] - self.timestamp[0]).total_seconds() / 60 if len(self.timestamp) > 1 else 1
-            dx_time = (len(energy_calc) - 1) * avg_step if len(energy_calc) > 1 else 1.0
-            ei = (sum(energy_calc) * 60.0) / (len(energy_calc) * dx_time)
-            ei = round(ei, 2)
-        return ei
-
     def clear_data(self):
         """
         Reinitialize data arrays.
 
         No return
         """
-        self.oad_values = []
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.fan_spd_values = []
-        self.timestamp = []
-        self.econ_timestamp = []
-        self.economizing = []
+        self.clear_rows()
+        self.econ_count = 0
+        self.economizing = 0
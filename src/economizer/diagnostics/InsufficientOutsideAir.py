@@ -26,30 +26,27 @@ import logging
 
 from datetime import timedelta as td
 
-from volttron.utils import setup_logging
-from volttron.utils.math_utils import mean
+import numpy as np
 
 from economizer import constants
+from economizer.diagnostics.SampleBuffer import BufferedDiagnostic, to_microseconds
 
-setup_logging()
 _log = logging.getLogger(__name__)
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s   %(levelname)-8s %(message)s",
-                    datefmt="%m-%d-%y %H:%M:%S")
 
 
-class InsufficientOutsideAir(object):
+class InsufficientOutsideAir(BufferedDiagnostic):
     """
     Air-side HVAC ventilation diagnostic.
     ExcessOutside Air uses metered data from a controller or
     BAS to diagnose when an AHU/RTU is providing excess outdoor air.
     """
+    __slots__ = ("max_dx_time", "analysis_name", "results_publish", "data_window", "no_required_data",
+                 "ventilation_oaf_threshold", "desired_oaf", "invalid_oaf_dict", "inconsistent_date",
+                 "insufficient_data")
 
-    def __init__(self):
-        # Initialize data arrays
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.timestamp = []
+    def __init__(self, buffer=None):
+        # Accepted rows of the (shared) sample buffer
+        super(InsufficientOutsideAir, self).__init__(buffer)
         self.max_dx_time = None
         self.analysis_name = ""
         self.results_publish = None
@@ -73,74 +70,70 @@ class InsufficientOutsideAir(object):
         No return
         """
         self.results_publish = results_publish
-        self.max_dx_time = td(minutes=60) if td(minutes=60) > data_window else data_window * 3 / 2
+        self.max_dx_time = to_microseconds(td(minutes=60) if td(minutes=60) > data_window else data_window * 3 / 2)
 
         # Application thresholds (Configurable)
         self.data_window = data_window
         self.analysis_name = analysis_name
         self.no_required_data = no_required_data
-        self.ventilation_oaf_threshold = {
-            "low": desired_oaf*0.75,
-            "normal": desired_oaf*0.5,
-            "high": desired_oaf*0.25
-        }
+        self.ventilation_oaf_threshold = constants.sensitivity_table(desired_oaf*0.75, desired_oaf*0.5, desired_oaf*0.25)
         self.desired_oaf = desired_oaf
-        self.invalid_oaf_dict = {key: 41.2 for key in self.ventilation_oaf_threshold}
-        self.inconsistent_date = {key: 44.2 for key in self.ventilation_oaf_threshold}
-        self.insufficient_data = {key: 42.2 for key in self.ventilation_oaf_threshold}
+        self.invalid_oaf_dict = constants.sensitivity_payload(41.2)
+        self.inconsistent_date = constants.sensitivity_payload(44.2)
+        self.insufficient_data = constants.sensitivity_payload(42.2)
 
     def run_diagnostic(self, current_time):
-        if self.timestamp:
-            elapsed_time = self.timestamp[-1] - self.timestamp[0]
-        else:
-            elapsed_time = td(minutes=0)
+        elapsed_time = self.elapsed_time()
 
-        if len(self.timestamp) >= self.no_required_data:
+        if self.sample_count() >= self.no_required_data:
             if elapsed_time > self.max_dx_time:
-                _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+                _log.info(constants.table_log_format(self.analysis_name, self.last_time(), (
                         constants.ECON5 + constants.DX + ":" + str(self.inconsistent_date))))
-                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1],
-                                                                           (constants.ECON5 + constants.DX),
+                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.last_time(),
+                                                                           constants.ECON5, constants.DX,
                                                                            self.inconsistent_date))
                 self.clear_data()
                 return
             self.insufficient_oa()
         else:
             self.results_publish.append(constants.table_publish_format(self.analysis_name, current_time,
-                                                                       (constants.ECON5 + constants.DX),
+                                                                       constants.ECON5, constants.DX,
                                                                        self.insufficient_data))
             self.clear_data()
 
-    def insufficient_outside_air_algorithm(self, oatemp, ratemp, matemp, cur_time):
+    def insufficient_outside_air_algorithm(self, oatemp, ratemp, matemp, cur_time, row=None):
         """Perform the insufficient outside air class algorithm
         oatemp: float
         ratemp: float
         matemp: float
         cur_time: datetime time delta
+        row: int, row of the sample when it is already in the shared buffer
 
         No return
         """
-        self.oat_values.append(oatemp)
-        self.rat_values.append(ratemp)
-        self.mat_values.append(matemp)
-        self.timestamp.append(cur_time)
+        if row is None:
+            row = self.buffer.append(cur_time, oatemp, ratemp, matemp, np.nan)
+        self.accept(row)
 
     def insufficient_oa(self):
         """If the detected problems(s) are consistent then generate a fault message(s).
         No return
         """
-        oaf = [(mat - rat) / (oat - rat) for oat, rat, mat in zip(self.oat_values, self.rat_values, self.mat_values)]
-        avg_oaf = mean(oaf) * 100.0
+        if self.statistics is not None:
+            avg_oaf = self.statistics.mean_oaf() * 100.0
+        else:
+            oaf = self.oaf_values
+            avg_oaf = float(np.mean(oaf)) * 100.0
         diagnostic_msg = {}
 
         if avg_oaf < 0 or avg_oaf > 125.0:
             msg = ("{}: Inconclusive result, the OAF calculation led to an "
                    "unexpected value: {}".format(constants.ECON5, avg_oaf))
             _log.info(msg)
-            _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+            _log.info(constants.table_log_format(self.analysis_name, self.last_time(), (
                         constants.ECON5 + constants.DX + ":" + str(self.invalid_oaf_dict))))
             self.results_publish.append(
-                constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON5 + constants.DX), self.invalid_oaf_dict))
+                constants.table_publish_format(self.analysis_name, self.last_time(), constants.ECON5, constants.DX, self.invalid_oaf_dict))
             self.clear_data()
             return
 
@@ -154,10 +147,10 @@ class InsufficientOutsideAir(object):
                 result = 40.0
             _log.info(msg)
             diagnostic_msg.update({sensitivity: result})
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+        _log.info(constants.table_log_format(self.analysis_name, self.last_time(), (
                     constants.ECON5 + constants.DX + ":" + str(diagnostic_msg))))
         self.results_publish.append(
-            constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON5 + constants.DX), diagnostic_msg))
+            constants.table_publish_format(self.analysis_name, self.last_time(), constants.ECON5, constants.DX, diagnostic_msg))
 
         self.clear_data()
 
@@ -167,8 +160,5 @@ class InsufficientOutsideAir(object):
 
         No return
         """
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.timestamp = []
+        self.clear_rows()
         return
@@ -0,0 +1,441 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+from array import array
+from datetime import datetime, timedelta as td, timezone
+
+import numpy as np
+
+VALUE_COLUMNS = ("oat", "rat", "mat", "oad", "fan_spd")
+# per-sample features derived from the value columns
+FEATURE_COLUMNS = ("oa_ma", "ra_ma", "oa_ra", "oaf", "ma_desired")
+# sample times are stored as integer epoch microseconds
+MICROSECONDS = 1000000
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_microseconds(delta):
+    """Whole microseconds of a time delta
+    delta: timedelta
+
+    returns int
+    """
+    return delta // td(microseconds=1)
+
+
+def epoch_microseconds(cur_time):
+    """Epoch microseconds of a datetime, naive datetimes are local time as for datetime.timestamp
+    cur_time: datetime
+
+    returns int
+    """
+    if cur_time.tzinfo is not None:
+        return to_microseconds(cur_time - EPOCH)
+    return int(cur_time.replace(microsecond=0).timestamp()) * MICROSECONDS + cur_time.microsecond
+
+
+def derive_features(oat, rat, mat, desired_oaf=None):
+    """Temperature differences and outdoor-air fraction of every sample
+    oat: numpy array
+    rat: numpy array
+    mat: numpy array
+    desired_oaf: float, fraction (0 - 1) of outdoor air for the mixed air reference, None to skip it
+
+    returns dictionary of feature name -> numpy array:
+        oa_ma: OAT - MAT
+        ra_ma: RAT - MAT
+        oa_ra: OAT - RAT, the outdoor-air fraction denominator
+        oaf: (MAT - RAT) / (OAT - RAT), NaN where the denominator is zero
+        ma_desired: MAT - mixed air temperature at the desired OAF, NaN without a desired_oaf
+    """
+    oa_ra = oat - rat
+    zero = oa_ra == 0
+    oaf = (mat - rat) / np.where(zero, 1.0, oa_ra)
+    oaf[zero] = np.nan
+    if desired_oaf is None:
+        ma_desired = np.full(len(oat), np.nan)
+    else:
+        ma_desired = mat - (oat * desired_oaf + (rat * (1.0 - desired_oaf)))
+    return {"oa_ma": oat - mat, "ra_ma": rat - mat, "oa_ra": oa_ra, "oaf": oaf, "ma_desired": ma_desired}
+
+
+def outdoor_air_fraction(oa_ra, oaf):
+    """Outdoor-air fraction of every sample, from the derived features
+    oa_ra: numpy array, OAT - RAT
+    oaf: numpy array
+
+    returns numpy array
+    """
+    if not oa_ra.all():
+        raise ZeroDivisionError("float division by zero")
+    return oaf
+
+
+def energy_term(delta, fan_spd, cfm, eer):
+    """Energy impact term of samples whose MAT exceeds the reference temperature
+    delta: float or numpy array, MAT minus the reference (OAT or mixed air at the desired OAF)
+    fan_spd: float or numpy array, fraction of full speed
+    cfm: float or numpy array
+    eer: float or numpy array
+
+    returns float or numpy array
+    """
+    return 1.08 * fan_spd * cfm * delta / (1000.0 * eer)
+
+
+def average_energy_impact(energy_sum, energy_count, elapsed_minutes):
+    """Energy impact of a window from the sum and count of its energy terms
+    energy_sum: float
+    energy_count: int
+    elapsed_minutes: float, time between the first and last sample of the window, 1 for a single sample
+
+    returns float
+    """
+    if not energy_count:
+        return 0.0
+    dx_time = (energy_count - 1) * elapsed_minutes if energy_count > 1 else 1.0
+    return round((energy_sum * 60.0) / (energy_count * dx_time), 2)
+
+
+def window_energy_impact(delta, fan_spd, cfm, eer, elapsed_minutes):
+    """Energy impact of the samples of one window
+    delta: numpy array, MAT minus the reference temperature
+    fan_spd: numpy array, fraction of full speed
+    cfm: float
+    eer: float
+    elapsed_minutes: float
+
+    returns float
+    """
+    mask = delta > 0
+    terms = energy_term(delta[mask], fan_spd[mask], cfm, eer)
+    return average_energy_impact(float(np.sum(terms)), len(terms), elapsed_minutes)
+
+
+class SampleBuffer(object):
+    """
+    Columnar ring buffer holding the accepted samples of one device.
+    Every sample is stored once and identified by an increasing row number.
+    The diagnostics sharing the buffer only record the row numbers they
+    accepted and read the columns through those rows.  Rows that no
+    diagnostic references any more are reused; the buffer only grows when
+    every stored row is still referenced.  Sample times are kept as epoch
+    microseconds and only turned back into datetimes for published results.
+    """
+    __slots__ = ("capacity", "start", "end", "derived", "desired_oaf", "consumers", "clock", "tzinfo",
+                 "timestamp") + VALUE_COLUMNS + FEATURE_COLUMNS
+
+    def __init__(self, capacity=16):
+        self.capacity = capacity
+        # row number of the oldest retained sample and of the next sample
+        self.start = 0
+        self.end = 0
+        self.timestamp = np.zeros(capacity, dtype=np.int64)
+        self.oat = np.zeros(capacity)
+        self.rat = np.zeros(capacity)
+        self.mat = np.zeros(capacity)
+        self.oad = np.zeros(capacity)
+        self.fan_spd = np.zeros(capacity)
+        for name in FEATURE_COLUMNS:
+            setattr(self, name, np.zeros(capacity))
+        # features are derived for the rows below this row number
+        self.derived = 0
+        self.desired_oaf = None
+        self.consumers = []
+        # LocalClock the sample times are converted back with, the timezone
+        # of the appended datetimes is used without one
+        self.clock = None
+        self.tzinfo = None
+
+    def register(self, consumer):
+        """Register a diagnostic whose accepted rows must be retained
+        consumer: BufferedDiagnostic
+
+        No return
+        """
+        self.consumers.append(consumer)
+
+    def set_desired_oaf(self, desired_oaf):
+        """Set the desired outdoor-air fraction of the mixed air reference feature
+        desired_oaf: float, fraction (0 - 1)
+
+        No return
+        """
+        if desired_oaf != self.desired_oaf:
+            self.desired_oaf = desired_oaf
+            self.derived = self.start
+
+    def __len__(self):
+        return self.end - self.start
+
+    def append(self, cur_time, oat, rat, mat, oad, fan_spd=1.0):
+        """Store one sample
+        cur_time: datetime
+        oat: float
+        rat: float
+        mat: float
+        oad: float
+        fan_spd: float, fraction of full speed
+
+        returns int row number
+        """
+        if self.end - self.start >= self.capacity:
+            self.release()
+            if self.end - self.start >= self.capacity:
+                self.grow()
+        index = self.end % self.capacity
+        self.timestamp[index] = epoch_microseconds(cur_time)
+        self.tzinfo = cur_time.tzinfo
+        self.oat[index] = oat
+        self.rat[index] = rat
+        self.mat[index] = mat
+        self.oad[index] = oad
+        self.fan_spd[index] = fan_spd
+        self.end += 1
+        return self.end - 1
+
+    def release(self):
+        """Drop the rows that no registered diagnostic references.
+        No return
+        """
+        first_rows = [consumer.rows[0] for consumer in self.consumers if consumer.rows]
+        start = min(first_rows) if first_rows else self.end
+        if start > self.start:
+            self.start = start
+
+    def grow(self):
+        """Double the capacity, keeping the retained rows at their new positions.
+        No return
+        """
+        capacity = self.capacity * 2
+        rows = np.arange(self.start, self.end)
+        old_index = rows % self.capacity
+        new_index = rows % capacity
+        for name in VALUE_COLUMNS + FEATURE_COLUMNS + ("timestamp",):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[new_index] = column[old_index]
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+    def derive(self):
+        """Derive the features of the rows appended since the last call, all at once
+        No return
+        """
+        start = max(self.derived, self.start)
+        if start >= self.end:
+            return
+        index = np.arange(start, self.end) % self.capacity
+        features = derive_features(self.oat[index], self.rat[index], self.mat[index], self.desired_oaf)
+        for name, values in features.items():
+            getattr(self, name)[index] = values
+        self.derived = self.end
+
+    def index(self, rows):
+        """Physical positions for row numbers
+        rows: array('q') or sequence of int
+
+        returns numpy int64 array
+        """
+        if isinstance(rows, array):
+            rows = np.frombuffer(rows, dtype=np.int64)
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+        return rows % self.capacity
+
+    def column(self, name, rows):
+        """Values of one column for the given rows
+        name: string, one of the column names
+        rows: array('q') or sequence of int
+
+        returns numpy array
+        """
+        if name in FEATURE_COLUMNS and self.derived < self.end:
+            self.derive()
+        return getattr(self, name)[self.index(rows)]
+
+    def time(self, row):
+        """Epoch microseconds of a single row"""
+        return int(self.timestamp[row % self.capacity])
+
+    def to_datetime(self, epoch):
+        """Local datetime for epoch microseconds
+        epoch: int
+
+        returns datetime
+        """
+        seconds, microsecond = divmod(int(epoch), MICROSECONDS)
+        if self.clock is not None:
+            local = self.clock.local_time(seconds)
+        else:
+            local = datetime.fromtimestamp(seconds, self.tzinfo)
+        return local.replace(microsecond=microsecond) if microsecond else local
+
+    def sample(self, row):
+        """All the values of a single row
+        row: int
+
+        returns tuple (epoch microseconds, oat, rat, mat, oad, fan_spd)
+        """
+        index = row % self.capacity
+        return (int(self.timestamp[index]), float(self.oat[index]), float(self.rat[index]), float(self.mat[index]),
+                float(self.oad[index]), float(self.fan_spd[index]))
+
+
+class BufferedDiagnostic(object):
+    """
+    Base for diagnostics that read their samples from a SampleBuffer.
+    A diagnostic keeps only the row numbers it accepted; the value
+    attributes are read-only views of the shared columns.  In statistics
+    mode the accepted samples are folded into a WindowStatistics instead
+    and no rows are retained.
+    """
+    __slots__ = ("buffer", "rows", "statistics")
+
+    def __init__(self, buffer=None):
+        self.buffer = buffer if buffer is not None else SampleBuffer()
+        self.buffer.register(self)
+        self.rows = array("q")
+        self.statistics = None
+
+    def use_statistics(self, statistics):
+        """Keep running accumulators instead of the accepted rows
+        statistics: WindowStatistics
+
+        No return
+        """
+        self.statistics = statistics
+        self.clear_rows()
+
+    def accept(self, row):
+        """Record that this diagnostic uses a buffered row
+        row: int
+
+        No return
+        """
+        if self.statistics is not None:
+            self.statistics.add(*self.buffer.sample(row))
+            return
+        self.rows.append(row)
+
+    def clear_rows(self):
+        """Forget every accepted row
+        No return
+        """
+        self.rows = array("q")
+        if self.statistics is not None:
+            self.statistics.clear()
+
+    def sample_count(self):
+        """Number of samples accepted in the current window"""
+        if self.statistics is not None:
+            return self.statistics.count
+        return len(self.rows)
+
+    @property
+    def oat_values(self):
+        return self.buffer.column("oat", self.rows)
+
+    @property
+    def rat_values(self):
+        return self.buffer.column("rat", self.rows)
+
+    @property
+    def mat_values(self):
+        return self.buffer.column("mat", self.rows)
+
+    @property
+    def oad_values(self):
+        return self.buffer.column("oad", self.rows)
+
+    @property
+    def fan_spd_values(self):
+        return self.buffer.column("fan_spd", self.rows)
+
+    @property
+    def oa_ma_values(self):
+        return self.buffer.column("oa_ma", self.rows)
+
+    @property
+    def ra_ma_values(self):
+        return self.buffer.column("ra_ma", self.rows)
+
+    @property
+    def oaf_values(self):
+        """Outdoor-air fraction of the accepted rows, raises ZeroDivisionError when OAT equals RAT"""
+        return outdoor_air_fraction(self.buffer.column("oa_ra", self.rows), self.buffer.column("oaf", self.rows))
+
+    def mixed_air_delta_values(self, desired_oaf):
+        """MAT minus the mixed air temperature at a desired outdoor-air fraction, for the accepted rows
+        desired_oaf: float, fraction (0 - 1)
+
+        returns numpy array
+        """
+        if desired_oaf == self.buffer.desired_oaf:
+            return self.buffer.column("ma_desired", self.rows)
+        return self.mat_values - (self.oat_values * desired_oaf + (self.rat_values * (1.0 - desired_oaf)))
+
+    def energy_impact_calculation(self, desired_oaf=None):
+        """Energy impact of the window, for diagnostics configured with cfm and eer
+        desired_oaf: float, fraction (0 - 1), None for the MAT - OAT terms
+
+        returns float
+        """
+        elapsed = self.elapsed_time() / (60.0 * MICROSECONDS) if self.sample_count() > 1 else 1
+        if self.statistics is not None:
+            energy_sum, energy_count = self.statistics.energy_terms(desired_oaf)
+            return average_energy_impact(energy_sum, energy_count, elapsed)
+        delta = -self.oa_ma_values if desired_oaf is None else self.mixed_air_delta_values(desired_oaf)
+        return window_energy_impact(delta, self.fan_spd_values, self.cfm, self.eer, elapsed)
+
+    @property
+    def timestamp(self):
+        """Epoch microseconds of the accepted rows"""
+        return self.buffer.column("timestamp", self.rows).tolist()
+
+    def first_epoch(self):
+        """Epoch microseconds of the first accepted row"""
+        if self.statistics is not None:
+            return self.statistics.first_time
+        return self.buffer.time(self.rows[0])
+
+    def last_epoch(self):
+        """Epoch microseconds of the last accepted row"""
+        if self.statistics is not None:
+            return self.statistics.last_time
+        return self.buffer.time(self.rows[-1])
+
+    def elapsed_time(self):
+        """Microseconds between the first and last accepted row, 0 without samples"""
+        if not self.sample_count():
+            return 0
+        return self.last_epoch() - self.first_epoch()
+
+    def first_time(self):
+        """Timestamp of the first accepted row"""
+        return self.buffer.to_datetime(self.first_epoch())
+
+    def last_time(self):
+        """Timestamp of the last accepted row"""
+        return self.buffer.to_datetime(self.last_epoch())
@@ -26,31 +26,27 @@ import logging
 
 from datetime import timedelta as td
 
-from volttron.utils import setup_logging
-from volttron.utils.math_utils import mean
+import numpy as np
 
 from economizer import constants
+from economizer.diagnostics.SampleBuffer import BufferedDiagnostic, to_microseconds
 
-setup_logging()
 _log = logging.getLogger(__name__)
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s   %(levelname)-8s %(message)s",
-                    datefmt="%m-%d-%y %H:%M:%S")
 
 
-class TemperatureSensor(object):
+class TemperatureSensor(BufferedDiagnostic):
     """
     Air-side HVAC temperature sensor diagnostic for AHU/RTU systems.
     TempSensorDx uses metered data from a BAS or controller to
     diagnose if any of the temperature sensors for an AHU/RTU are accurate and
     reliable.
     """
+    __slots__ = ("temp_sensor_problem", "max_dx_time", "analysis_name", "results_publish", "data_window",
+                 "no_required_data", "temp_diff_thr", "inconsistent_date", "insufficient_data", "sensor_damper_dx")
 
-    def __init__(self):
-        # Initialize data arrays
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.timestamp = []
+    def __init__(self, buffer=None):
+        # Accepted rows of the (shared) sample buffer
+        super(TemperatureSensor, self).__init__(buffer)
 
         self.temp_sensor_problem = None
         self.max_dx_time = None
@@ -63,7 +59,7 @@ class TemperatureSensor(object):
         self.temp_diff_thr = None
         self.inconsistent_date = None
         self.insufficient_data = None
-        self.sensor_damper_dx = DamperSensorInconsistency()
+        self.sensor_damper_dx = DamperSensorInconsistency(self.buffer)
 
     def set_class_values(self, analysis_name, results_publish, data_window, no_required_data, temp_diff_thr, open_damper_time, temp_damper_threshold):
         """Set the values needed for doing the diagnostics
@@ -77,71 +73,61 @@ class TemperatureSensor(object):
         No return
         """
         self.results_publish = results_publish
-        self.max_dx_time = td(minutes=60) if td(minutes=60) > data_window else data_window * 3 / 2
+        self.max_dx_time = to_microseconds(td(minutes=60) if td(minutes=60) > data_window else data_window * 3 / 2)
         self.data_window = data_window
         self.analysis_name = analysis_name
         self.no_required_data = no_required_data
-        oat_mat_check = {
-            "low": max(temp_diff_thr * 1.5, 6.0),
-            "normal": max(temp_diff_thr * 1.25, 5.0),
-            "high": max(temp_diff_thr, 4.0)
-        }
-        self.temp_diff_thr = {
-            "low": temp_diff_thr + 2.0,
-            "normal": temp_diff_thr,
-            "high": max(1.0, temp_diff_thr - 2.0)
-        }
-        self.inconsistent_date = {key: 3.2 for key in self.temp_diff_thr}
-        self.insufficient_data = {key: 2.2 for key in self.temp_diff_thr}
+        oat_mat_check = constants.sensitivity_table(max(temp_diff_thr * 1.5, 6.0), max(temp_diff_thr * 1.25, 5.0),
+                                                    max(temp_diff_thr, 4.0))
+        self.temp_diff_thr = constants.sensitivity_table(temp_diff_thr + 2.0, temp_diff_thr, max(1.0, temp_diff_thr - 2.0))
+        self.inconsistent_date = constants.sensitivity_payload(3.2)
+        self.insufficient_data = constants.sensitivity_payload(2.2)
         self.sensor_damper_dx.set_class_values(analysis_name, results_publish, data_window, no_required_data, open_damper_time, oat_mat_check, temp_damper_threshold)
 
     def run_diagnostic(self, current_time):
-        if self.timestamp:
-            elapsed_time = self.timestamp[-1] - self.timestamp[0]
-        else:
-            elapsed_time = td(minutes=0)
-        _log.info("Elapsed time: {} -- required time: {}".format(elapsed_time, self.data_window))
+        elapsed_time = self.elapsed_time()
+        _log.info("Elapsed time: {} -- required time: {}".format(td(microseconds=elapsed_time), self.data_window))
         result = self.sensor_damper_dx.run_diagnostic()
 
-        if len(self.timestamp) >= self.no_required_data and not result:
-            _log.debug("Temperature Run -- no data: {} -- damper: {}".format(len(self.timestamp), result))
+        if self.sample_count() >= self.no_required_data and not result:
+            _log.debug("Temperature Run -- no data: {} -- damper: {}".format(self.sample_count(), result))
             if elapsed_time > self.max_dx_time:
-                _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+                _log.info(constants.table_log_format(self.analysis_name, self.last_time(), (
                         constants.ECON1 + constants.DX + ":" + str(self.inconsistent_date))))
-                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1],
-                                                                           (constants.ECON1 + constants.DX),
+                self.results_publish.append(constants.table_publish_format(self.analysis_name, self.last_time(),
+                                                                           constants.ECON1, constants.DX,
                                                                            self.inconsistent_date))
                 self.clear_data()
                 return
             self.temperature_sensor_dx()
-        elif len(self.timestamp) < self.no_required_data:
+        elif self.sample_count() < self.no_required_data:
             self.results_publish.append(constants.table_publish_format(self.analysis_name, current_time,
-                                                                       (constants.ECON1 + constants.DX),
+                                                                       constants.ECON1, constants.DX,
                                                                        self.insufficient_data))
             self.clear_data()
         else:
             _log.debug("Temperature sensor else!")
             self.clear_data()
 
-    def temperature_algorithm(self, oat, rat, mat, oad, cur_time):
+    def temperature_algorithm(self, oat, rat, mat, oad, cur_time, row=None):
         """Perform the temperature sensor class algorithm
         oat: float
         rat: float
         mat: float
         oad: float
         cur_time: datetime time delta
+        row: int, row of the sample when it is already in the shared buffer
 
         return bool
         """
-        self.oat_values.append(oat)
-        self.mat_values.append(mat)
-        self.rat_values.append(rat)
-        self.timestamp.append(cur_time)
+        if row is None:
+            row = self.buffer.append(cur_time, oat, rat, mat, oad)
+        self.accept(row)
 
         if self.temp_sensor_problem:
             return self.temp_sensor_problem
         else:
-            self.sensor_damper_dx.damper_algorithm(oat, mat, oad, cur_time)
+            self.sensor_damper_dx.damper_algorithm(oat, mat, oad, cur_time, row)
             return self.temp_sensor_problem
 
     def temperature_sensor_dx(self):
@@ -166,10 +152,10 @@ class TemperatureSensor(object):
 
         if diagnostic_msg["normal"] > 0.0:
             self.temp_sensor_problem = True
-        _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1], (
+        _log.info(constants.table_log_format(self.analysis_name, self.last_time(), (
                     constants.ECON1 + constants.DX + ":" + str(diagnostic_msg))))
         self.results_publish.append(
-            constants.table_publish_format(self.analysis_name, self.timestamp[-1], (constants.ECON1 + constants.DX), diagnostic_msg))
+            constants.table_publish_format(self.analysis_name, self.last_time(), constants.ECON1, constants.DX, diagnostic_msg))
         self.clear_data()
 
     def aggregate_data(self):
@@ -180,15 +166,13 @@ class TemperatureSensor(object):
         avg_ma_oa: float
         avg_ma_ra: float
         """
-        oa_ma = [(x - y) for x, y in zip(self.oat_values, self.mat_values)]
-        ra_ma = [(x - y) for x, y in zip(self.rat_values, self.mat_values)]
-        ma_oa = [(y - x) for x, y in zip(self.oat_values, self.mat_values)]
-        ma_ra = [(y - x) for x, y in zip(self.rat_values, self.mat_values)]
-        avg_oa_ma = mean(oa_ma)
-        avg_ra_ma = mean(ra_ma)
-        avg_ma_oa = mean(ma_oa)
-        avg_ma_ra = mean(ma_ra)
-        return avg_oa_ma, avg_ra_ma, avg_ma_oa, avg_ma_ra
+        if self.statistics is not None:
+            avg_oa_ma = self.statistics.oa_ma_sum / self.statistics.count
+            avg_ra_ma = self.statistics.ra_ma_sum / self.statistics.count
+            return avg_oa_ma, avg_ra_ma, -avg_oa_ma, -avg_ra_ma
+        avg_oa_ma = float(np.mean(self.oa_ma_values))
+        avg_ra_ma = float(np.mean(self.ra_ma_values))
+        return avg_oa_ma, avg_ra_ma, -avg_oa_ma, -avg_ra_ma
 
     def clear_data(self):
         """
@@ -196,27 +180,24 @@ class TemperatureSensor(object):
 
         No return
         """
-        self.oat_values = []
-        self.rat_values = []
-        self.mat_values = []
-        self.timestamp = []
+        self.clear_rows()
         if self.temp_sensor_problem:
             self.temp_sensor_problem = None
 
 
-class DamperSensorInconsistency(object):
+class DamperSensorInconsistency(BufferedDiagnostic):
     """
     Air-side HVAC temperature sensor diagnostic for AHU/RTU systems.
     TempSensorDx uses metered data from a BAS or controller to
     diagnose if any of the temperature sensors for an AHU/RTU are accurate and
     reliable.
     """
+    __slots__ = ("steady_state", "econ_time_check", "data_window", "no_required_data", "oad_temperature_threshold",
+                 "oat_mat_check", "analysis_name", "results_publish")
 
-    def __init__(self):
-        # Initialize data arrays
-        self.oat_values = []
-        self.mat_values = []
-        self.timestamp = []
+    def __init__(self, buffer=None):
+        # Accepted rows of the (shared) sample buffer
+        super(DamperSensorInconsistency, self).__init__(buffer)
         self.steady_state = None
         self.econ_time_check = None
         self.data_window = None
@@ -247,9 +228,11 @@ class DamperSensorInconsistency(object):
 
     def run_diagnostic(self):
         msg = ""
-        if len(self.oat_values) > self.no_required_data:
-            mat_oat_diff_list = [abs(x - y) for x, y in zip(self.oat_values, self.mat_values)]
-            open_damper_check = mean(mat_oat_diff_list)
+        if self.sample_count() > self.no_required_data:
+            if self.statistics is not None:
+                open_damper_check = self.statistics.abs_oa_ma_sum / self.statistics.count
+            else:
+                open_damper_check = float(np.mean(np.abs(self.oa_ma_values)))
             diagnostic_msg = {}
             for sensitivity, threshold in self.oat_mat_check.items():
                 if open_damper_check > threshold:
@@ -263,10 +246,10 @@ class DamperSensorInconsistency(object):
                 diagnostic_msg.update({sensitivity: result})
 
             _log.info(msg)
-            _log.info(constants.table_log_format(self.analysis_name, self.timestamp[-1],
+            _log.info(constants.table_log_format(self.analysis_name, self.last_time(),
                                                  (constants.ECON1 + constants.DX + ":" + str(diagnostic_msg))))
-            self.results_publish.append(constants.table_publish_format(self.analysis_name, self.timestamp[-1],
-                                                                       (constants.ECON1 + constants.DX),
+            self.results_publish.append(constants.table_publish_format(self.analysis_name, self.last_time(),
+                                                                       constants.ECON1, constants.DX,
                                                                        diagnostic_msg))
             self.clear_data()
             return True
@@ -274,12 +257,13 @@ class DamperSensorInconsistency(object):
             self.clear_data()
             return False
 
-    def damper_algorithm(self, oat, mat, oad, cur_time):
+    def damper_algorithm(self, oat, mat, oad, cur_time, row=None):
         """Perform the damper class algorithm
         oat: float
         mat: float
         oad: float
         cur_time: datetime time delta
+        row: int, row of the sample when it is already in the shared buffer
 
         No return
         """
@@ -287,9 +271,9 @@ class DamperSensorInconsistency(object):
             if self.steady_state is None:
                 self.steady_state = cur_time
             elif cur_time - self.steady_state >= self.econ_time_check:
-                self.oat_values.append(oat)
-                self.mat_values.append(mat)
-                self.timestamp.append(cur_time)
+                if row is None:
+                    row = self.buffer.append(cur_time, oat, np.nan, mat, oad)
+                self.accept(row)
         else:
             self.steady_state = None
 
@@ -299,7 +283,5 @@ class DamperSensorInconsistency(object):
 
         No return
         """
-        self.oat_values = []
-        self.mat_values = []
+        self.clear_rows()
         self.steady_state = None
-        self.timestamp = []
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import math
+
+from economizer.diagnostics.SampleBuffer import energy_term
+
+
+class WindowStatistics(object):
+    """
+    Running accumulators for one diagnostic window.
+    The diagnostics only use counts, sums, conditional sums and the first
+    and last timestamps of a window, so a diagnostic in statistics mode
+    keeps these instead of its accepted rows.  Memory no longer depends on
+    data_window or the scrape rate and a window closes in constant time.
+    """
+    __slots__ = ("cfm", "eer", "desired_oaf", "count", "first_time", "last_time", "oad_sum", "oa_ma_sum", "ra_ma_sum",
+                 "abs_oa_ma_sum", "oaf_sum", "oaf_zero_division", "energy_sum", "energy_count", "desired_energy_sum",
+                 "desired_energy_count")
+
+    def __init__(self, cfm=None, eer=None, desired_oaf=None):
+        """
+        cfm: float, rated cfm used for the energy impact terms
+        eer: float
+        desired_oaf: float, fraction (0 - 1) of outdoor air for the mixed air reference
+        """
+        self.cfm = cfm
+        self.eer = eer
+        self.desired_oaf = desired_oaf
+        self.clear()
+
+    def clear(self):
+        """Reset the accumulators for a new window
+        No return
+        """
+        self.count = 0
+        # epoch microseconds of the first and last sample
+        self.first_time = None
+        self.last_time = None
+        self.oad_sum = 0.0
+        self.oa_ma_sum = 0.0
+        self.ra_ma_sum = 0.0
+        self.abs_oa_ma_sum = 0.0
+        self.oaf_sum = 0.0
+        self.oaf_zero_division = False
+        # energy impact terms for MAT - OAT > 0
+        self.energy_sum = 0.0
+        self.energy_count = 0
+        # energy impact terms for MAT - (desired OAF mixed air temperature) > 0
+        self.desired_energy_sum = 0.0
+        self.desired_energy_count = 0
+
+    def add(self, cur_time, oat, rat, mat, oad, fan_spd=1.0):
+        """Add one sample to the accumulators
+        cur_time: int, epoch microseconds
+        oat: float
+        rat: float
+        mat: float
+        oad: float
+        fan_spd: float, fraction of full speed
+
+        No return
+        """
+        if not self.count:
+            self.first_time = cur_time
+        self.last_time = cur_time
+        self.count += 1
+        self.oad_sum += oad
+        self.oa_ma_sum += oat - mat
+        self.ra_ma_sum += rat - mat
+        self.abs_oa_ma_sum += abs(oat - mat)
+        if oat - rat == 0:
+            self.oaf_zero_division = True
+        elif not math.isnan(rat):
+            self.oaf_sum += (mat - rat) / (oat - rat)
+        if self.cfm is None:
+            return
+        delta = mat - oat
+        if delta > 0:
+            self.energy_sum += energy_term(delta, fan_spd, self.cfm, self.eer)
+            self.energy_count += 1
+        if self.desired_oaf is not None and not math.isnan(rat):
+            delta = mat - (oat * self.desired_oaf + (rat * (1.0 - self.desired_oaf)))
+            if delta > 0:
+                self.desired_energy_sum += energy_term(delta, fan_spd, self.cfm, self.eer)
+                self.desired_energy_count += 1
+
+    def mean_oaf(self):
+        """Average outdoor-air fraction of the window
+        returns float
+        """
+        if self.oaf_zero_division:
+            raise ZeroDivisionError("float division by zero")
+        return self.oaf_sum / self.count
+
+    def energy_terms(self, desired_oaf=None):
+        """Sum and count of the positive energy impact terms
+        desired_oaf: float, None for the MAT - OAT terms
+
+        returns (float, int)
+        """
+        if desired_oaf is None:
+            return self.energy_sum, self.energy_count
+        if desired_oaf != self.desired_oaf:
+            raise ValueError("Statistics were accumulated for a desired OAF of {}".format(self.desired_oaf))
+        return self.desired_energy_sum, self.desired_energy_count
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import numpy as np
+
+from economizer.diagnostics.SampleBuffer import FEATURE_COLUMNS, energy_term
+from economizer.diagnostics.WindowStatistics import WindowStatistics
+
+
+def diagnostic_parameters(device):
+    """The buffered diagnostics of a device with the energy parameters of their window statistics
+    device: DeviceState
+
+    returns list of (diagnostic, cfm, eer, desired_oaf)
+    """
+    config = device.config
+    cfm = float(config.rated_cfm)
+    desired_oaf = config.desired_oaf / 100.0
+    return [(device.temp_sensor, None, None, None),
+            (device.temp_sensor.sensor_damper_dx, None, None, None),
+            (device.econ_correctly_on, cfm, config.eer, None),
+            (device.econ_correctly_off, cfm, config.eer, desired_oaf),
+            (device.excess_outside_air, cfm, config.eer, desired_oaf),
+            (device.insufficient_outside_air, None, None, None)]
+
+
+def segment_sums(values, counts):
+    """Sum of every segment of consecutive values.
+    Every segment is reduced on its own with the pairwise summation np.mean applies to the rows
+    of a single window, so the sums are exactly those of evaluating each window by itself
+    (np.add.reduceat sums each segment sequentially and differs in the last digits).
+    values: numpy array, the segments one after the other
+    counts: numpy int array, length of every segment
+
+    returns numpy float64 array, 0 for empty segments
+    """
+    ends = np.cumsum(counts).tolist()
+    return np.array([np.add.reduce(values[end - count:end]) for count, end in zip(counts.tolist(), ends)],
+                    dtype=np.float64)
+
+
+def window_statistics(windows):
+    """Aggregates of many buffered windows, computed together with segment reductions.
+    The aggregates are those a diagnostic keeps in statistics mode, so the diagnostics can be
+    evaluated through their statistics branch.
+    windows: list of (diagnostic, cfm, eer, desired_oaf), diagnostics keeping rows
+
+    returns list of WindowStatistics, one per window
+    """
+    counts = np.array([len(diagnostic.rows) for diagnostic, _, _, _ in windows], dtype=np.int64)
+    # one gather per column and buffer; the windows of a device are consecutive and share its buffer
+    groups = []
+    for window in windows:
+        buffer = window[0].buffer
+        if not groups or groups[-1][0] is not buffer:
+            groups.append((buffer, []))
+        groups[-1][1].append(np.frombuffer(window[0].rows, dtype=np.int64))
+    for buffer, _ in groups:
+        buffer.derive()
+    indexes = [buffer.index(np.concatenate(rows)) for buffer, rows in groups]
+    columns = {}
+    for name in ("oad", "fan_spd", "timestamp") + FEATURE_COLUMNS:
+        parts = [getattr(buffer, name)[index] for (buffer, _), index in zip(groups, indexes)]
+        columns[name] = np.concatenate(parts) if parts else np.zeros(0)
+
+    def per_sample(values):
+        return np.repeat(np.array(values, dtype=np.float64), counts)
+
+    cfm = per_sample([np.nan if window[1] is None else window[1] for window in windows])
+    eer = per_sample([np.nan if window[2] is None else window[2] for window in windows])
+    segment = np.repeat(np.arange(len(windows)), counts)
+
+    oad_sum = segment_sums(columns["oad"], counts)
+    oa_ma = columns["oa_ma"]
+    oa_ma_sum = segment_sums(oa_ma, counts)
+    ra_ma_sum = segment_sums(columns["ra_ma"], counts)
+    abs_oa_ma_sum = segment_sums(np.abs(oa_ma), counts)
+    zero_division = segment_sums((columns["oa_ra"] == 0).astype(np.float64), counts) > 0
+    oaf_sum = segment_sums(columns["oaf"], counts)
+
+    def energy_terms(delta):
+        mask = delta > 0
+        terms = energy_term(delta[mask], columns["fan_spd"][mask], cfm[mask], eer[mask])
+        term_counts = np.bincount(segment[mask], minlength=len(windows))
+        return segment_sums(terms, term_counts), term_counts
+
+    energy_sum, energy_count = energy_terms(-oa_ma)
+    desired_energy_sum, desired_energy_count = energy_terms(columns["ma_desired"])
+
+    ends = np.cumsum(counts)
+    timestamps = columns["timestamp"]
+    values = zip(counts.tolist(), (ends - counts).tolist(), ends.tolist(), oad_sum.tolist(), oa_ma_sum.tolist(),
+                 ra_ma_sum.tolist(), abs_oa_ma_sum.tolist(), oaf_sum.tolist(), zero_division.tolist(),
+                 energy_sum.tolist(), energy_count.tolist(), desired_energy_sum.tolist(),
+                 desired_energy_count.tolist())
+    statistics = []
+    for (_, window_cfm, window_eer, window_desired_oaf), window_values in zip(windows, values):
+        window = WindowStatistics(window_cfm, window_eer, window_desired_oaf)
+        (window.count, first, end, window.oad_sum, window.oa_ma_sum, window.ra_ma_sum, window.abs_oa_ma_sum,
+         window.oaf_sum, window.oaf_zero_division, energy, count, desired_energy, desired_count) = window_values
+        if window.count:
+            window.first_time = int(timestamps[first])
+            window.last_time = int(timestamps[end - 1])
+        if window_cfm is not None:
+            window.energy_sum, window.energy_count = energy, count
+        if window_desired_oaf is not None:
+            window.desired_energy_sum, window.desired_energy_count = desired_energy, desired_count
+        statistics.append(window)
+    return statistics
+
+
+def close_pending_windows(devices):
+    """Close the pending windows of several devices, with the aggregates of all their buffered
+    diagnostics computed in one pass.  Each diagnostic then evaluates its thresholds from the
+    aggregates as it does in statistics mode.
+    devices: list of DeviceState with close_due set
+
+    returns list of the DeviceStates whose window was closed
+    """
+    devices = [device for device in devices if device.close_due is not None]
+    # empty windows need no aggregates
+    windows = [window for device in devices for window in diagnostic_parameters(device)
+               if window[0].statistics is None and window[0].rows]
+    for (diagnostic, _, _, _), statistics in zip(windows, window_statistics(windows)):
+        diagnostic.statistics = statistics
+    try:
+        for device in devices:
+            device.close_pending_window()
+    finally:
+        for diagnostic, _, _, _ in windows:
+            diagnostic.statistics = None
+    return devices
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+from bisect import bisect_left
+from time import perf_counter
+
+# upper bounds in seconds of the latency histogram buckets, the last bucket is unbounded
+BUCKET_BOUNDS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 1e-1)
+
+# stages of DeviceState.new_data_message and the agent publish, in processing order
+STAGES = ("parse", "fan_status", "temperature_condition", "sensor_limit", "algorithms", "run_diagnostic",
+          "publish", "message")
+
+
+class StageTimer(object):
+    """
+    Count, total, maximum and a latency histogram for one processing stage
+    """
+    __slots__ = ("count", "total", "max", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def add(self, elapsed):
+        """Record one run of the stage
+        elapsed: float, seconds
+
+        No return
+        """
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.histogram[bisect_left(BUCKET_BOUNDS, elapsed)] += 1
+
+    def as_dict(self):
+        """Readable form of the timer, times are in seconds
+        returns dictionary
+        """
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "histogram": {"bounds": list(BUCKET_BOUNDS), "counts": list(self.histogram)}
+        }
+
+
+class DeviceMetrics(object):
+    """
+    Per-stage timers and event counters for one device.
+    Stages are timed with lap, which records the time since the given
+    start and returns the current time as the start of the next stage,
+    so consecutive stages cost a single clock read each.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.clear()
+
+    def clear(self):
+        """Reset every timer and counter
+        No return
+        """
+        self.stages = {stage: StageTimer() for stage in STAGES}
+        self.counters = {}
+
+    @staticmethod
+    def start():
+        """Current time to pass to lap"""
+        return perf_counter()
+
+    def lap(self, stage, start):
+        """Record the time spent in a stage
+        stage: string, one of STAGES
+        start: float, time returned by start or the previous lap
+
+        returns float current time
+        """
+        now = perf_counter()
+        self.stages[stage].add(now - start)
+        return now
+
+    def count(self, name):
+        """Increment an event counter
+        name: string
+
+        No return
+        """
+        self.counters[name] = self.counters.get(name, 0) + 1
+
+    def as_dict(self):
+        """Readable form of the metrics
+        returns dictionary
+        """
+        return {
+            "stages": {stage: timer.as_dict() for stage, timer in self.stages.items()},
+            "counters": dict(self.counters)
+        }
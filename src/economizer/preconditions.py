@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+
+class PreconditionTracker(object):
+    """
+    Failures of one precondition in the current window.
+    The window only needs the time of the first failure, how many samples
+    failed and whether the latest sample failed, so these are kept instead
+    of the timestamp of every failing sample.  Times are epoch seconds.
+    """
+    __slots__ = ("first", "last", "count")
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Forget the failures of the window
+        No return
+        """
+        self.first = None
+        self.last = None
+        self.count = 0
+
+    def record(self, epoch):
+        """Record a sample failing the precondition
+        epoch: float, epoch seconds of the sample
+
+        No return
+        """
+        if not self.count:
+            self.first = epoch
+        self.last = epoch
+        self.count += 1
+
+    def failed(self, epoch):
+        """Whether the sample at epoch failed the precondition
+        epoch: float, epoch seconds of the sample
+
+        returns bool
+        """
+        return self.count > 0 and self.last == epoch
+
+    def __len__(self):
+        return self.count
+
+    def __eq__(self, other):
+        if not isinstance(other, PreconditionTracker):
+            return NotImplemented
+        return (self.first, self.last, self.count) == (other.first, other.last, other.count)
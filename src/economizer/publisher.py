@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import logging
+
+from collections import deque
+
+import gevent
+import gevent.event
+
+_log = logging.getLogger(__name__)
+
+# what put does when the queue is full
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST)
+
+
+class PublishQueue(object):
+    """
+    Bounded queue of outgoing publishes drained in batches by its own greenlet.
+    The subscription callback only enqueues (topic, headers, message) tuples,
+    so message intake no longer waits on the message bus.  When the queue is
+    full the policy decides between waiting for the drainer (block),
+    discarding the oldest queued publish (drop_oldest) or discarding the new
+    one (drop_newest).  Without a running drainer, block publishes inline.
+    """
+
+    def __init__(self, publish, maxsize=10000, policy=BLOCK, batch_size=100):
+        self.publish = publish
+        self.maxsize = maxsize
+        self.policy = policy
+        self.batch_size = batch_size
+        self.queue = deque()
+        self.ready = gevent.event.Event()
+        self.space = gevent.event.Event()
+        self.greenlet = None
+
+        # queue depth metrics
+        self.max_depth = 0
+        self.enqueued = 0
+        self.published = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def configure(self, maxsize, policy, batch_size):
+        """Apply new queue settings, already queued publishes are kept
+        maxsize: int
+        policy: string, one of POLICIES
+        batch_size: int
+
+        No return
+        """
+        if policy not in POLICIES:
+            _log.error("publish_policy must be one of {}, using {}".format(POLICIES, BLOCK))
+            policy = BLOCK
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.batch_size = max(1, batch_size)
+
+    def __len__(self):
+        return len(self.queue)
+
+    def put(self, topic, headers, message):
+        """Queue one publish
+        topic: string
+        headers: dictionary
+        message: publish payload
+
+        returns bool False when the publish was dropped
+        """
+        while len(self.queue) >= self.maxsize:
+            if self.policy == DROP_NEWEST:
+                self.dropped += 1
+                return False
+            if self.policy == DROP_OLDEST:
+                self.queue.popleft()
+                self.dropped += 1
+                break
+            if self.greenlet is None:
+                self.drain()
+            else:
+                self.space.clear()
+                self.space.wait()
+        self.queue.append((topic, headers, message))
+        self.enqueued += 1
+        if len(self.queue) > self.max_depth:
+            self.max_depth = len(self.queue)
+        self.ready.set()
+        return True
+
+    def drain(self):
+        """Publish up to batch_size queued publishes
+        returns int number of publishes taken from the queue
+        """
+        count = 0
+        while self.queue and count < self.batch_size:
+            topic, headers, message = self.queue.popleft()
+            count += 1
+            try:
+                self.publish(topic, headers, message)
+                self.published += 1
+            except Exception as exception:
+                self.failed += 1
+                _log.error("Publish to {} failed: {}".format(topic, repr(exception)))
+        if count:
+            self.batches += 1
+            self.space.set()
+        return count
+
+    def flush(self):
+        """Publish everything that is queued
+        No return
+        """
+        while self.queue:
+            self.drain()
+
+    def run(self):
+        """Drain the queue whenever publishes are queued, yielding between batches
+        No return
+        """
+        while True:
+            self.ready.wait()
+            self.ready.clear()
+            while self.queue:
+                self.drain()
+                gevent.sleep(0)
+
+    def start(self):
+        """Start the draining greenlet
+        No return
+        """
+        if self.greenlet is None:
+            self.greenlet = gevent.spawn(self.run)
+
+    def stop(self):
+        """Stop the draining greenlet and publish what is left
+        No return
+        """
+        if self.greenlet is not None:
+            self.greenlet.kill()
+            self.greenlet = None
+        self.flush()
+
+    def metrics(self):
+        """Queue depth and throughput counters
+        returns dictionary
+        """
+        return {
+            "depth": len(self.queue),
+            "max_depth": self.max_depth,
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "enqueued": self.enqueued,
+            "published": self.published,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches
+        }
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import argparse
+import csv
+import logging
+import time
+import warnings
+
+from datetime import datetime, timezone
+
+import numpy as np
+import yaml
+
+from economizer.batch import BatchEngine
+from economizer.config import EconomizerConfig
+from economizer.device import DeviceState
+from economizer.timestamps import parse_timestamp
+
+_log = logging.getLogger(__name__)
+
+# how the batch engine reduces several points mapped to one role to a single column
+BATCH_COLUMNS = (
+    ("oat_data", np.nanmean),
+    ("rat_data", np.nanmean),
+    ("mat_data", np.nanmean),
+    ("damper_data", np.nanmean),
+    ("cooling_data", None),
+    ("fan_status_data", np.nanmax),
+    ("fan_sp_data", np.nanmean)
+)
+
+
+def read_history(path, timestamp_column, points):
+    """Read the scrape history of one device from a CSV or Parquet file
+    path: string, .parquet files are read with pyarrow, anything else as CSV
+    timestamp_column: string
+    points: collection of point names to read
+
+    returns (list of timestamps, dictionary of point name -> list of float or None)
+    """
+    if path.lower().endswith((".parquet", ".pq")):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Reading Parquet history requires pyarrow to be installed")
+        table = pq.read_table(path)
+        names = [name for name in table.column_names if name in points]
+        columns = table.select([timestamp_column] + names).to_pydict()
+        timestamps = columns.pop(timestamp_column)
+        return timestamps, columns
+
+    with open(path, newline="") as history:
+        reader = csv.reader(history)
+        header = next(reader)
+        timestamp_index = header.index(timestamp_column)
+        indexes = [(name, index) for index, name in enumerate(header) if name in points]
+        timestamps = []
+        columns = {name: [] for name, _ in indexes}
+        for row in reader:
+            if not row:
+                continue
+            timestamps.append(row[timestamp_index])
+            for name, index in indexes:
+                columns[name].append(to_float(row[index]))
+    return timestamps, columns
+
+
+def to_float(value):
+    """Convert a CSV cell to float, empty or non-numeric cells are missing
+    returns float or None
+    """
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def epoch_seconds(timestamps):
+    """Epoch seconds for history timestamps, timestamps without a timezone are UTC
+    timestamps: list of string or datetime
+
+    returns list of float
+    """
+    epoch = []
+    for value in timestamps:
+        if not isinstance(value, datetime):
+            value = parse_timestamp(value)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        epoch.append(value.timestamp())
+    return epoch
+
+
+def read_config(path):
+    """Read the agent configuration file as the platform does, as YAML first, which also reads plain JSON.
+    Only files YAML cannot read (JSON with comments) are passed to VOLTTRON's reader.
+    path: string
+
+    returns dictionary or None for an empty file
+    """
+    with open(path) as config_file:
+        try:
+            return yaml.safe_load(config_file)
+        except yaml.YAMLError:
+            pass
+    from volttron.utils import load_config
+    return load_config(path)
+
+
+def unit_publish_list(config, unit):
+    """Publish paths for a unit's results, as used by the agent
+    config: dictionary, agent configuration
+    unit: string
+
+    returns list of string
+    """
+    device = config.get("device", {})
+    base = [device.get("campus", ""), device.get("building", ""), unit]
+    publish_list = ["/".join(base)]
+    for subdevice in device.get("unit", {}).get(unit, {}).get("subdevices", []):
+        publish_list.append("/".join(base + [subdevice]))
+    return publish_list
+
+
+def build_batch_engine(config, results_publish):
+    """Configure a BatchEngine with the thresholds of an EconomizerConfig
+    config: EconomizerConfig
+    results_publish: list
+
+    returns BatchEngine
+    """
+    engine = BatchEngine()
+    engine.set_class_values(config.analysis_name, results_publish, config.clock.timezone, config.data_window,
+                            config.no_required_data, config.open_damper_time, config.device_type,
+                            config.economizer_type, config.econ_hl_temp, config.temp_band,
+                            config.low_supply_fan_threshold, config.cooling_enabled_threshold,
+                            config.oaf_temperature_threshold, config.oat_low_threshold, config.oat_high_threshold,
+                            config.mat_low_threshold, config.mat_high_threshold, config.rat_low_threshold,
+                            config.rat_high_threshold, config.temp_difference_threshold, config.temp_damper_threshold,
+                            config.open_damper_threshold, config.minimum_damper_setpoint, config.desired_oaf,
+                            float(config.rated_cfm), config.eer)
+    return engine
+
+
+def replay_device(config, device, epoch, columns):
+    """Run every sample through a DeviceState, as the agent does for each publish
+    config: EconomizerConfig
+    device: DeviceState
+    epoch: list of float
+    columns: dictionary of point name -> list of float or None
+
+    returns list of (topic, Date header, message)
+    """
+    publishes = []
+    names = list(columns)
+    values = [columns[name] for name in names]
+    for row, sample_epoch in enumerate(epoch):
+        message = {name: column[row] for name, column in zip(names, values)}
+        device.new_data_message(config.clock.local_time(sample_epoch), [message], sample_epoch)
+        publishes.extend(device.take_publishes())
+    return publishes
+
+
+def batch_publishes(device, results, window_ends):
+    """Format the batch engine results with the device's publish formatting, one window at a time
+    device: DeviceState
+    results: list of ResultRecord
+    window_ends: list of int, number of results when each window closed
+
+    returns list of (topic, Date header, message)
+    """
+    publishes = []
+    start = 0
+    for end in window_ends:
+        device.results_publish.extend(results[start:end])
+        publishes.extend(device.take_publishes())
+        start = end
+    return publishes
+
+
+def replay_batch(config, epoch, columns, window_offset=0):
+    """Run all the samples through the vectorized batch engine
+    config: EconomizerConfig
+    epoch: list of float
+    columns: dictionary of point name -> list of float or None
+    window_offset: int, minutes the window boundaries of the device are shifted by
+
+    returns (list of ResultRecord, list of int number of results when each window closed)
+    """
+    size = len(epoch)
+    role_columns = {}
+    for point, role in config.point_index.items():
+        if point in columns:
+            column = np.array([np.nan if value is None else value for value in columns[point]], dtype=float)
+            role_columns.setdefault(role, []).append(column)
+    arrays = []
+    for role, reduce in BATCH_COLUMNS:
+        if role not in role_columns:
+            arrays.append(None if role in ("fan_status_data", "fan_sp_data") else np.full(size, np.nan))
+            continue
+        stacked = np.vstack(role_columns[role])
+        if reduce is None:
+            reduce = np.nanmean if config.device_type == "ahu" else np.nanmax
+        with warnings.catch_warnings():
+            # rows where every mapped point is missing stay NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            arrays.append(reduce(stacked, axis=0))
+    results = []
+    engine = build_batch_engine(config, results)
+    engine.window_offset = window_offset
+    engine.run(np.array(epoch, dtype=np.int64), *arrays)
+    return results, engine.window_ends
+
+
+def write_results(path, publishes):
+    """Write the publishes the agent would make, one row per topic
+    path: string
+    publishes: list of (topic, Date header, message)
+
+    returns int number of rows written
+    """
+    with open(path, "w", newline="") as output:
+        writer = csv.writer(output)
+        writer.writerow(["timestamp", "topic", "result"])
+        for topic, date, message in publishes:
+            writer.writerow([date, topic, message])
+    return len(publishes)
+
+
+def main(argv=None):
+    """Entry point of the replay subcommand
+    argv: list of string, arguments after "replay"
+
+    returns int exit status
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog="volttron-economizer-rcx replay",
+        description="Run the economizer preconditions and diagnostics over device history without a message bus.")
+    arg_parser.add_argument("history", help="CSV or Parquet file with one row per device scrape")
+    arg_parser.add_argument("-c", "--config", required=True, help="agent configuration file")
+    arg_parser.add_argument("-o", "--output", required=True, help="CSV file the results are written to")
+    arg_parser.add_argument("--unit", help="configured unit the history belongs to (default: the first unit)")
+    arg_parser.add_argument("--timestamp-column", default="Timestamp", help="name of the timestamp column")
+    arg_parser.add_argument("--engine", choices=("device", "batch"), default="device",
+                            help="per-sample pipeline used by the agent, or the vectorized batch engine")
+    arg_parser.add_argument("-v", "--verbose", action="store_true", help="keep the per-sample diagnostic logging")
+    args = arg_parser.parse_args(argv)
+
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG, format="%(asctime)s   %(levelname)-8s %(message)s",
+                            datefmt="%m-%d-%y %H:%M:%S")
+    else:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    config = EconomizerConfig()
+    config.load_config(read_config(args.config) or config.setup_default_config())
+    units = config.config.get("device", {}).get("unit", {})
+    unit = args.unit or next(iter(units), "unit")
+    publish_list = unit_publish_list(config.config, unit)
+
+    timestamps, columns = read_history(args.history, args.timestamp_column, config.point_index)
+    epoch = epoch_seconds(timestamps)
+
+    topic = "/".join(["devices", publish_list[0], "all"])
+    device = DeviceState(topic, publish_list, config)
+    start = time.perf_counter()
+    if args.engine == "batch":
+        publishes = batch_publishes(device, *replay_batch(config, epoch, columns, device.window_offset))
+    else:
+        publishes = replay_device(config, device, epoch, columns)
+    elapsed = time.perf_counter() - start
+
+    rows = write_results(args.output, publishes)
+    rate = len(epoch) / elapsed if elapsed > 0 else float("inf")
+    print("Replayed {} samples in {:.2f} s ({:.0f} samples/sec) with the {} engine".format(
+        len(epoch), elapsed, rate, args.engine))
+    print("Wrote {} results to {}".format(rows, args.output))
+    return 0
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import logging
+import multiprocessing
+import time
+import zlib
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from economizer import snapshot
+from economizer.config import EconomizerConfig
+from economizer.device import DeviceState
+
+_log = logging.getLogger(__name__)
+
+# device states of the worker process, created by init_worker
+_config = None
+_devices = {}
+
+
+def shard_index(topic, shards):
+    """Shard a device topic belongs to, stable across processes and restarts
+    topic: string
+    shards: int
+
+    returns int
+    """
+    return zlib.crc32(topic.encode("utf-8")) % shards
+
+
+def init_worker(config, device_publish):
+    """Create the device states of one worker process
+    config: dictionary, agent configuration
+    device_publish: dictionary of device topic -> publish list for the devices of this shard
+
+    No return
+    """
+    global _config, _devices
+    _config = EconomizerConfig()
+    _config.load_config(config)
+    _devices = {topic: DeviceState(topic, publish_list, _config) for topic, publish_list in device_publish.items()}
+
+
+def process_batch(batch):
+    """Run a batch of samples through the worker's device states.
+    A sample that cannot be processed is logged and skipped, the rest of the batch still runs.
+    batch: list of (device topic, Date header, message)
+
+    returns list of (topic, Date header, message) publishes
+    """
+    publishes = []
+    for topic, date, message in batch:
+        try:
+            device = _devices[topic]
+            metrics = device.metrics
+            message_start = metrics.start()
+            current_time, epoch = _config.clock.parse(date)
+            device.new_data_message(current_time, message, epoch)
+            start = metrics.start()
+            publishes.extend(device.take_publishes())
+            metrics.lap("publish", start)
+            metrics.lap("message", message_start)
+        except Exception as exception:
+            _log.error("Could not process the {} sample of {}: {}".format(date, topic, repr(exception)))
+    return publishes
+
+
+def close_expired_windows(now):
+    """Close the windows of the worker's devices that are past their deadline
+    now: float, wall-clock epoch seconds
+
+    returns list of (topic, Date header, message) publishes
+    """
+    publishes = []
+    for device in _devices.values():
+        if device.close_expired_window(now):
+            publishes.extend(device.take_publishes())
+    return publishes
+
+
+def worker_metrics():
+    """Stage metrics of the worker's devices
+    returns dictionary of device topic -> metrics
+    """
+    return {topic: device.metrics.as_dict() for topic, device in _devices.items()}
+
+
+def reset_worker_metrics():
+    """Reset the stage metrics of the worker's devices
+    No return
+    """
+    for device in _devices.values():
+        device.metrics.clear()
+
+
+def worker_snapshot():
+    """Captured window state of the worker's devices
+    returns dictionary of device topic -> captured state
+    """
+    return {topic: snapshot.capture_device(device) for topic, device in _devices.items()}
+
+
+def restore_worker(states):
+    """Resume the windows of the worker's devices found in states
+    states: dictionary of device topic -> captured state
+
+    returns int number of devices restored
+    """
+    restored = 0
+    for topic, state in states.items():
+        device = _devices.get(topic)
+        if device is not None and snapshot.restore_device(device, state):
+            restored += 1
+    return restored
+
+
+class ShardPool(object):
+    """
+    Device states partitioned across worker processes.
+    Every shard is a single worker process owning the DeviceStates whose
+    topic hashes to it, so the samples of a device are always processed in
+    order by the same process.  The agent only forwards the mapped points
+    of each sample, in batches, and publishes what the workers return.
+    Waiting on the workers goes through sleep, so an event loop keeps
+    running while the workers catch up.
+    """
+
+    def __init__(self, processes, config, device_publish, point_index, batch_size=50, sleep=time.sleep,
+                 poll_interval=0.01):
+        """
+        sleep: function taking seconds, gevent.sleep in the agent
+        poll_interval: float, seconds between checks of the worker results while waiting
+        """
+        self.batch_size = max(1, batch_size)
+        self.point_index = point_index
+        self.sleep = sleep
+        self.poll_interval = poll_interval
+        context = multiprocessing.get_context("spawn")
+        self.executors = []
+        for shard in range(processes):
+            shard_devices = {topic: publish_list for topic, publish_list in device_publish.items()
+                             if shard_index(topic, processes) == shard}
+            self.executors.append(ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=init_worker,
+                                                      initargs=(config, shard_devices)))
+        # samples not yet sent and batches not yet collected, per shard
+        self.pending = [[] for _ in range(processes)]
+        self.futures = [deque() for _ in range(processes)]
+        self.batches = 0
+        self.samples = 0
+
+    def put(self, topic, date, message):
+        """Queue one device sample for its shard
+        topic: string, device topic
+        date: string, Date header
+        message: list, the device "all" publish
+
+        No return
+        """
+        data = message[0]
+        compact = {point: data[point] for point in self.point_index if point in data}
+        shard = shard_index(topic, len(self.executors))
+        pending = self.pending[shard]
+        pending.append((topic, date, [compact]))
+        self.samples += 1
+        if len(pending) >= self.batch_size:
+            self.submit(shard)
+
+    def submit(self, shard):
+        """Send the pending samples of a shard to its worker
+        shard: int
+
+        No return
+        """
+        batch = self.pending[shard]
+        if not batch:
+            return
+        self.pending[shard] = []
+        self.futures[shard].append(self.executors[shard].submit(process_batch, batch))
+        self.batches += 1
+
+    def flush(self):
+        """Send the pending samples of every shard
+        No return
+        """
+        for shard in range(len(self.executors)):
+            self.submit(shard)
+
+    def collect(self, wait=False):
+        """Publishes of the processed batches, in the order the samples were queued per shard
+        wait: bool, wait for every submitted batch instead of only taking the finished ones
+
+        returns list of (topic, Date header, message)
+        """
+        publishes = []
+        for futures in self.futures:
+            while futures:
+                if not futures[0].done():
+                    if not wait:
+                        break
+                    self.wait([futures[0]])
+                try:
+                    publishes.extend(futures.popleft().result())
+                except Exception as exception:
+                    _log.error("Shard batch failed: {}".format(repr(exception)))
+        return publishes
+
+    def wait(self, futures):
+        """Wait until futures are done, sleeping between checks instead of blocking
+        futures: sequence of Future
+
+        returns list of results
+        """
+        while not all(future.done() for future in futures):
+            self.sleep(self.poll_interval)
+        return [future.result() for future in futures]
+
+    def pending_batches(self):
+        """Number of batches submitted but not collected"""
+        return sum(len(futures) for futures in self.futures)
+
+    def call(self, function, *args):
+        """Run a function in every worker, after the batches already submitted
+        function: module level function of this module
+        args: arguments passed to the function
+
+        returns list of results, one per shard
+        """
+        return self.wait([executor.submit(function, *args) for executor in self.executors])
+
+    def metrics(self):
+        """Stage metrics of every device of every worker
+        returns dictionary of device topic -> metrics
+        """
+        device_metrics = {}
+        for shard_metrics in self.call(worker_metrics):
+            device_metrics.update(shard_metrics)
+        return device_metrics
+
+    def reset_metrics(self):
+        """Reset the stage metrics of every worker
+        No return
+        """
+        self.call(reset_worker_metrics)
+
+    def close_expired_windows(self, now):
+        """Close the expired windows of every worker, after the pending samples.
+        The publishes are returned by collect, in order with the batches submitted before.
+        now: float, wall-clock epoch seconds
+
+        No return
+        """
+        self.flush()
+        for futures, executor in zip(self.futures, self.executors):
+            futures.append(executor.submit(close_expired_windows, now))
+
+    def snapshot(self):
+        """Captured window state of every device of every worker, after the pending samples
+        returns dictionary of device topic -> captured state
+        """
+        self.flush()
+        states = {}
+        for shard_states in self.call(worker_snapshot):
+            states.update(shard_states)
+        return states
+
+    def restore(self, states):
+        """Resume the windows of the workers' devices
+        states: dictionary of device topic -> captured state
+
+        returns int number of devices restored
+        """
+        shards = len(self.executors)
+        futures = []
+        for shard, executor in enumerate(self.executors):
+            shard_states = {topic: state for topic, state in states.items() if shard_index(topic, shards) == shard}
+            futures.append(executor.submit(restore_worker, shard_states))
+        return sum(self.wait(futures))
+
+    def shutdown(self):
+        """Process what is pending and stop the workers
+        returns list of (topic, Date header, message) publishes that were still outstanding
+        """
+        self.flush()
+        publishes = self.collect(wait=True)
+        for executor in self.executors:
+            executor.shutdown()
+        return publishes
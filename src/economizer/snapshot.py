@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import logging
+import os
+import time
+import zipfile
+
+from array import array
+
+import numpy as np
+
+from economizer.diagnostics.SampleBuffer import FEATURE_COLUMNS, VALUE_COLUMNS
+
+_log = logging.getLogger(__name__)
+
+# bumped whenever the layout of a device state changes
+SNAPSHOT_VERSION = 3
+
+# DeviceState attribute -> sample counts kept for the window
+DIAGNOSTIC_COUNTS = (
+    ("temp_sensor", ()),
+    ("temp_sensor.sensor_damper_dx", ()),
+    ("econ_correctly_on", ("econ_count", "not_cooling", "not_economizing")),
+    ("econ_correctly_off", ("econ_count", "economizing")),
+    ("excess_outside_air", ("econ_count", "economizing")),
+    ("insufficient_outside_air", ())
+)
+# PreconditionTrackers of DeviceState, saved as first and last epoch seconds and the count
+PRECONDITION_TIMES = ("unit_status", "oaf_condition", "sensor_limit")
+# WindowStatistics accumulators, in snapshot order
+STATISTICS_FIELDS = ("count", "oad_sum", "oa_ma_sum", "ra_ma_sum", "abs_oa_ma_sum", "oaf_sum", "oaf_zero_division",
+                     "energy_sum", "energy_count", "desired_energy_sum", "desired_energy_count")
+STATISTICS_INTS = ("count", "oaf_zero_division", "energy_count", "desired_energy_count")
+# arrays every captured device state holds
+STATE_ARRAYS = (("flags", "sensor_limit_msg", "buffer_start", "buffer_time")
+                + tuple("buffer_" + name for name in VALUE_COLUMNS) + PRECONDITION_TIMES
+                + tuple(name + "/rows" for name, _ in DIAGNOSTIC_COUNTS))
+
+
+def to_epoch(value):
+    """Epoch seconds of a datetime, NaN for None"""
+    return np.nan if value is None else value.timestamp()
+
+
+def from_epoch(clock, value):
+    """Local datetime for epoch seconds, None for NaN
+    clock: LocalClock
+    value: float
+    """
+    return None if np.isnan(value) else clock.local_time(float(value))
+
+
+def to_flag(value):
+    """Encode None/False/True as NaN/0/1"""
+    return np.nan if value is None else float(bool(value))
+
+
+def from_flag(value):
+    """Decode a flag written by to_flag"""
+    return None if np.isnan(value) else bool(value)
+
+
+def diagnostic(device, name):
+    """Diagnostic of a device for a dotted DeviceState attribute path"""
+    target = device
+    for attribute in name.split("."):
+        target = getattr(target, attribute)
+    return target
+
+
+def capture_device(device):
+    """Window state of one device as plain arrays
+    device: DeviceState
+
+    returns dictionary of name -> numpy array
+    """
+    buffer = device.buffer
+    rows = np.arange(buffer.start, buffer.end)
+    index = rows % buffer.capacity
+    state = {
+        "flags": np.array([np.nan if device.window_start is None else device.window_start,
+                           np.nan if device.window_end is None else device.window_end,
+                           to_flag(device.temp_sensor_problem),
+                           to_flag(device.temp_sensor.temp_sensor_problem),
+                           to_epoch(device.temp_sensor.sensor_damper_dx.steady_state),
+                           float(bool(device.config.window_statistics))], dtype=np.float64),
+        "sensor_limit_msg": np.array(device.sensor_limit_msg),
+        "close_due": np.array([to_epoch(device.close_due)], dtype=np.float64),
+        "last_message": np.array([np.nan if device.last_epoch is None else device.last_epoch,
+                                  np.nan if device.last_arrival is None else device.last_arrival], dtype=np.float64),
+        "buffer_start": np.array([buffer.start], dtype=np.int64),
+        "buffer_time": buffer.timestamp[index].copy()
+    }
+    for name in VALUE_COLUMNS:
+        state["buffer_" + name] = getattr(buffer, name)[index].copy()
+    for name in PRECONDITION_TIMES:
+        tracker = getattr(device, name)
+        state[name] = np.array([np.nan if tracker.first is None else tracker.first,
+                                np.nan if tracker.last is None else tracker.last, tracker.count], dtype=np.float64)
+    for name, counts in DIAGNOSTIC_COUNTS:
+        target = diagnostic(device, name)
+        state[name + "/rows"] = np.frombuffer(target.rows, dtype=np.int64).copy()
+        statistics = target.statistics
+        if statistics is not None:
+            values = [float(getattr(statistics, field)) for field in STATISTICS_FIELDS]
+            state[name + "/statistics"] = np.array(values, dtype=np.float64)
+            # epoch microseconds of the first and last sample, kept as integers
+            state[name + "/statistics_time"] = np.array(
+                [statistics.first_time, statistics.last_time] if statistics.count else [0, 0], dtype=np.int64)
+        if counts:
+            state[name + "/counts"] = np.array([getattr(target, count) for count in counts], dtype=np.int64)
+    return state
+
+
+def restore_device(device, state):
+    """Resume the windows of a device from a captured state
+    device: DeviceState, freshly created
+    state: dictionary returned by capture_device
+
+    returns bool, False when the state was captured with another window_statistics setting
+    """
+    flags = state["flags"]
+    if bool(flags[5]) != bool(device.config.window_statistics):
+        return False
+    clock = device.config.clock
+    device.clear_all()
+
+    buffer = device.buffer
+    size = len(state["buffer_time"])
+    capacity = buffer.capacity
+    while capacity < size:
+        capacity *= 2
+    start = int(state["buffer_start"][0])
+    index = np.arange(start, start + size) % capacity
+    buffer.capacity = capacity
+    buffer.start = start
+    buffer.end = start + size
+    buffer.timestamp = np.zeros(capacity, dtype=np.int64)
+    buffer.timestamp[index] = state["buffer_time"]
+    for name in VALUE_COLUMNS:
+        column = np.zeros(capacity)
+        column[index] = state["buffer_" + name]
+        setattr(buffer, name, column)
+    # the features are derived again from the restored values
+    for name in FEATURE_COLUMNS:
+        setattr(buffer, name, np.zeros(capacity))
+    buffer.derived = start
+
+    device.window_start = None if np.isnan(flags[0]) else float(flags[0])
+    device.window_end = None if np.isnan(flags[1]) else float(flags[1])
+    device.temp_sensor_problem = from_flag(flags[2])
+    device.temp_sensor.temp_sensor_problem = from_flag(flags[3])
+    device.temp_sensor.sensor_damper_dx.steady_state = from_epoch(clock, flags[4])
+    device.sensor_limit_msg = str(state["sensor_limit_msg"][()])
+    if "close_due" in state:
+        device.close_due = from_epoch(clock, state["close_due"][0])
+    if "last_message" in state and not np.isnan(state["last_message"]).any():
+        # keeps the window deadlines across a restart
+        device.last_epoch, device.last_arrival = (float(value) for value in state["last_message"])
+    for name in PRECONDITION_TIMES:
+        tracker = getattr(device, name)
+        first, last, count = state[name]
+        tracker.first = None if np.isnan(first) else float(first)
+        tracker.last = None if np.isnan(last) else float(last)
+        tracker.count = int(count)
+    for name, counts in DIAGNOSTIC_COUNTS:
+        target = diagnostic(device, name)
+        target.rows = array("q", state[name + "/rows"].tobytes())
+        statistics = target.statistics
+        if statistics is not None:
+            values = state[name + "/statistics"]
+            for field, value in zip(STATISTICS_FIELDS, values):
+                setattr(statistics, field, int(value) if field in STATISTICS_INTS else float(value))
+            statistics.oaf_zero_division = bool(statistics.oaf_zero_division)
+            if statistics.count:
+                statistics.first_time, statistics.last_time = (int(value) for value in state[name + "/statistics_time"])
+        for count, value in zip(counts, state.get(name + "/counts", ())):
+            setattr(target, count, int(value))
+    return True
+
+
+def snapshot_arrays(states):
+    """Arrays of the snapshot file for the captured device states
+    states: dictionary of device topic -> captured state
+
+    returns dictionary of name -> numpy array
+    """
+    arrays = {
+        "version": np.array([SNAPSHOT_VERSION], dtype=np.int64),
+        "saved": np.array([time.time()], dtype=np.float64),
+        "topics": np.array(list(states), dtype=str)
+    }
+    for number, state in enumerate(states.values()):
+        for name, value in state.items():
+            arrays["{}:{}".format(number, name)] = value
+    return arrays
+
+
+def save_snapshot(path, states):
+    """Write the captured device states to one .npz file, replacing it atomically
+    path: string
+    states: dictionary of device topic -> captured state
+
+    No return
+    """
+    write_arrays(path, snapshot_arrays(states))
+
+
+def write_arrays(path, arrays):
+    """Write snapshot arrays to one .npz file, replacing it atomically.
+    Touches no device state, so it can run outside the event loop.
+    path: string
+    arrays: dictionary returned by snapshot_arrays
+
+    No return
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    partial = path + ".partial"
+    with open(partial, "wb") as snapshot_file:
+        np.savez(snapshot_file, **arrays)
+    os.replace(partial, path)
+
+
+def load_snapshot(path, max_age=None):
+    """Read the device states written by save_snapshot
+    path: string
+    max_age: float, seconds; older snapshots are ignored
+
+    returns dictionary of device topic -> captured state, empty when there is no usable snapshot
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with np.load(path, allow_pickle=False) as snapshot_file:
+            arrays = {name: snapshot_file[name] for name in snapshot_file.files}
+        version = int(arrays["version"][0])
+        saved = float(arrays["saved"][0])
+        topics = [str(topic) for topic in arrays["topics"]]
+    except (OSError, ValueError, KeyError, IndexError, zipfile.BadZipFile) as exception:
+        _log.warning("Ignoring unreadable snapshot {}: {}".format(path, repr(exception)))
+        return {}
+    if version != SNAPSHOT_VERSION:
+        _log.warning("Ignoring snapshot {} written by another version".format(path))
+        return {}
+    age = time.time() - saved
+    if max_age is not None and age > max_age:
+        _log.info("Ignoring snapshot {}, it is {:.0f} s old".format(path, age))
+        return {}
+    states = {topic: {} for topic in topics}
+    try:
+        for key, value in arrays.items():
+            number, separator, name = key.partition(":")
+            if separator:
+                states[topics[int(number)]][name] = value
+        for topic, state in states.items():
+            missing = [name for name in STATE_ARRAYS if name not in state]
+            if missing:
+                raise KeyError("{} has no {}".format(topic, ", ".join(missing)))
+    except (ValueError, KeyError, IndexError) as exception:
+        _log.warning("Ignoring incomplete snapshot {}: {}".format(path, repr(exception)))
+        return {}
+    return states
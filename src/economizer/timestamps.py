@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+from datetime import datetime, timezone
+
+import dateutil.tz
+from dateutil import parser
+
+
+def parse_timestamp(value):
+    """Parse a header Date, using the ISO-8601 fast path when possible
+    value: string
+
+    returns datetime
+    """
+    try:
+        if value.endswith("Z"):
+            value = value[:-1] + "+00:00"
+        return datetime.fromisoformat(value)
+    except (AttributeError, ValueError):
+        # not ISO-8601 (or not a format this Python's fromisoformat knows)
+        return parser.parse(value)
+
+
+def utc_offset(epoch, tz):
+    """UTC offset of a timezone at epoch seconds
+    epoch: float
+    tz: tzinfo
+
+    returns timedelta
+    """
+    return datetime.fromtimestamp(epoch, tz).utcoffset()
+
+
+def offset_changes_within_hour(hour_start, tz):
+    """Whether the UTC offset changes within the UTC hour starting at hour_start.
+    Transitions are on a UTC hour in most zones, but on the half or quarter hour in zones such as
+    America/St_Johns or Australia/Adelaide.
+    hour_start: float, epoch seconds of a whole UTC hour
+    tz: tzinfo
+
+    returns bool
+    """
+    return utc_offset(hour_start, tz) != utc_offset(hour_start + 3599, tz)
+
+
+class LocalClock(object):
+    """
+    Converts header dates to the configured local timezone.
+    The timezone is resolved once, when the configuration is loaded, and
+    the UTC offset is cached for the current UTC hour, so most messages are
+    converted with a single datetime.fromtimestamp call.  Hours in which
+    the offset changes are not cached.  Times are also
+    returned as epoch seconds for elapsed-time arithmetic.
+    """
+
+    def __init__(self, timezone_name):
+        self.timezone = dateutil.tz.gettz(timezone_name) or dateutil.tz.tzlocal()
+        # [hour_start, hour_end) epoch range the cached zone is valid for
+        self.hour_start = None
+        self.hour_end = None
+        self.zone = None
+        self.zones = {}
+
+    def local_time(self, epoch):
+        """Local time for epoch seconds
+        epoch: float
+
+        returns datetime
+        """
+        if self.hour_start is None or not self.hour_start <= epoch < self.hour_end:
+            hour_start = epoch - epoch % 3600
+            if offset_changes_within_hour(hour_start, self.timezone):
+                offset = utc_offset(epoch, self.timezone)
+                return datetime.fromtimestamp(epoch, self.zones.setdefault(offset, timezone(offset)))
+            self.hour_start = hour_start
+            self.hour_end = hour_start + 3600
+            offset = utc_offset(hour_start, self.timezone)
+            self.zone = self.zones.setdefault(offset, timezone(offset))
+        return datetime.fromtimestamp(epoch, self.zone)
+
+    def parse(self, value):
+        """Parse a header Date into local time and epoch seconds
+        value: string
+
+        returns (datetime, float)
+        """
+        epoch = parse_timestamp(value).timestamp()
+        return self.local_time(epoch), epoch
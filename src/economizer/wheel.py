@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import zlib
+
+from collections import deque
+
+
+def topic_offset(topic, modulus):
+    """Deterministic offset in [0, modulus) for a device topic
+    topic: string
+    modulus: int
+
+    returns int
+    """
+    return zlib.crc32(topic.encode("utf-8")) % max(1, modulus)
+
+
+class TimerWheel(object):
+    """
+    Spreads the window evaluations of many devices over the ticks of a
+    revolution.  Every device has a fixed slot derived from its topic; a
+    device that is due is queued on its slot and evaluated when the wheel
+    reaches it.  A device is queued at most once.  At most limit devices
+    are taken per tick; devices left over are carried to the next tick
+    ahead of that tick's own devices.
+    """
+
+    def __init__(self, slots=60, limit=0):
+        """
+        slots: int, ticks per revolution
+        limit: int, devices evaluated per tick, 0 for no limit
+        """
+        self.slots = [deque() for _ in range(max(1, slots))]
+        self.limit = limit
+        self.position = 0
+        self.queued = set()
+        self.backlog = deque()
+        self.scheduled = 0
+        self.evaluated = 0
+        self.max_backlog = 0
+
+    def __len__(self):
+        return len(self.queued)
+
+    def schedule(self, topic, item):
+        """Queue an item on the slot of its device topic
+        topic: string
+        item: object returned by tick
+
+        returns bool, False when the topic was already queued
+        """
+        if topic in self.queued:
+            return False
+        self.queued.add(topic)
+        self.slots[topic_offset(topic, len(self.slots))].append((topic, item))
+        self.scheduled += 1
+        return True
+
+    def tick(self):
+        """Advance the wheel by one slot
+        returns list of the items to evaluate on this tick
+        """
+        slot = self.slots[self.position]
+        self.position = (self.position + 1) % len(self.slots)
+        self.backlog.extend(slot)
+        slot.clear()
+        count = len(self.backlog) if not self.limit else min(self.limit, len(self.backlog))
+        due = []
+        for _ in range(count):
+            topic, item = self.backlog.popleft()
+            self.queued.discard(topic)
+            due.append(item)
+        self.evaluated += count
+        self.max_backlog = max(self.max_backlog, len(self.backlog))
+        return due
+
+    def drain(self):
+        """Take every queued item, in slot order
+        returns list
+        """
+        items = [item for _, item in self.backlog]
+        self.backlog.clear()
+        for offset in range(len(self.slots)):
+            slot = self.slots[(self.position + offset) % len(self.slots)]
+            items.extend(item for _, item in slot)
+            slot.clear()
+        self.queued.clear()
+        return items
+
+    def metrics(self):
+        """Queue depth and counters of the wheel
+        returns dictionary
+        """
+        return {"pending": len(self), "backlog": len(self.backlog), "max_backlog": self.max_backlog,
+                "scheduled": self.scheduled, "evaluated": self.evaluated}
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+"""Shared helpers for driving the agent without a VOLTTRON platform"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+from economizer.economizer_agent import EconomizerAgent
+from economizer.replay import build_batch_engine
+
+POINTS = ["outsideairtemp", "ReturnAirTemp", "MixedAirTemp", "Damper", "CompressorStatus", "FanStatus",
+          "SupplyFanSpeed"]
+
+
+class FakePubSub(object):
+    """Records everything the agent publishes"""
+
+    def __init__(self):
+        self.published = []
+        self.subscriptions = []
+
+    def publish(self, peer, topic, headers, message):
+        self.published.append((str(topic), headers.get("Date"), message))
+
+    def subscribe(self, peer, prefix, callback):
+        self.subscriptions.append(("subscribe", str(prefix)))
+
+    def unsubscribe(self, peer, prefix, callback):
+        self.subscriptions.append(("unsubscribe", str(prefix)))
+
+
+class FakeVIP(object):
+    def __init__(self):
+        self.pubsub = FakePubSub()
+
+
+def build_agent(arguments, device=None):
+    """Build an EconomizerAgent without connecting to a platform"""
+    agent = EconomizerAgent.__new__(EconomizerAgent)
+    agent.__dict__.update(device_list=[], publish_list=[], device_publish={}, devices={}, units=[],
+                          update_config_flag=None, diagnostic_done_flag=True, campus="", building="",
+                          metrics_event=None, publish_queue=None, shard_pool=None, shard_event=None,
+                          wheel=None, wheel_event=None, window_event=None, snapshot_event=None,
+                          snapshot_write=None)
+    agent.vip = FakeVIP()
+    agent.config = agent.setup_default_config()
+    agent.config["arguments"].update(arguments)
+    if device is not None:
+        agent.config["device"] = device
+    agent.setup_device_list()
+    agent.read_argument_config()
+    agent.read_point_mapping()
+    agent.configuration_value_check()
+    agent.setup_publish_queue()
+    agent.create_devices()
+    return agent
+
+
+def build_engine(agent):
+    """Configure a BatchEngine with the agent's thresholds"""
+    results = []
+    return build_batch_engine(agent, results), results
+
+
+def generate_samples(size, seed):
+    """Random one minute scrapes with a mix of faulted and healthy periods"""
+    rng = np.random.default_rng(seed)
+    timestamp = 1672560000 + 60 * np.arange(size)
+    oat = rng.uniform(25.0, 105.0, size)
+    rat = rng.uniform(60.0, 80.0, size)
+    mat = rng.uniform(45.0, 95.0, size)
+    mixed = rng.random(size) < 0.6
+    mat[mixed] = (0.3 * oat + 0.7 * rat)[mixed]
+    oad = rng.choice([10.0, 20.0, 50.0, 95.0, 100.0], size)
+    cool_call = rng.choice([0.0, 1.0], size)
+    fan_status = rng.choice([0.0, 1.0], size, p=[0.1, 0.9])
+    fan_speed = rng.uniform(20.0, 100.0, size)
+    return [timestamp, oat, rat, mat, oad, cool_call, fan_status, fan_speed]
+
+
+def publish_samples(agent, columns, topic="devices/campus/building/rtu4/all"):
+    """Send every row of columns to the agent as a device "all" publish"""
+    for row in range(len(columns[0])):
+        message = {point: float(column[row]) for point, column in zip(POINTS, columns[1:])}
+        headers = {"Date": datetime.fromtimestamp(int(columns[0][row]), timezone.utc).isoformat()}
+        agent.new_data_message(None, None, None, topic, headers, [message])
+    agent.publish_queue.flush()
+    return agent.vip.pubsub.published
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import unittest
+
+from datetime import datetime, timedelta as td, timezone
+
+import dateutil.tz
+import numpy as np
+
+from economizer.batch import energy_impact, local_minutes
+from economizer.diagnostics.EconCorrectlyOn import EconCorrectlyOn
+
+from economizer_helpers import build_agent, build_engine, generate_samples, publish_samples
+
+
+class TestBatchKernels(unittest.TestCase):
+    """
+    Contains the tests for the vectorized kernels
+    """
+
+    def test_energy_impact_matches_diagnostic(self):
+        """test the energy impact kernel against the per-sample calculation"""
+        econ = EconCorrectlyOn()
+        econ.set_class_values("test", [], td(minutes=1), 1, 20.0, 80.0, 6000.0, 10.0)
+        oat = [60.0, 70.0, 55.0, 80.0]
+        mat = [65.0, 68.0, 62.0, 85.0]
+        spd = [0.5, 1.0, 0.75, 0.6]
+        for minute, (o, m, s) in enumerate(zip(oat, mat, spd)):
+            econ.accept(econ.buffer.append(datetime.fromtimestamp(60 * minute), o, 70.0, m, 50.0, s))
+        ei = energy_impact(np.array(mat), np.array(oat), np.array(spd), 6000.0, 10.0, 3.0)
+        assert ei == econ.energy_impact_calculation()
+
+    def test_energy_impact_no_positive_delta(self):
+        """test the energy impact kernel when MAT never exceeds OAT"""
+        ei = energy_impact(np.array([50.0, 60.0]), np.array([55.0, 60.0]), np.ones(2), 6000.0, 10.0, 1.0)
+        assert ei == 0.0
+
+    def test_energy_impact_once_per_window(self):
+        """test that the energy impact is calculated once when every sensitivity reports a fault"""
+        class CountingEconCorrectlyOn(EconCorrectlyOn):
+            calls = 0
+
+            def energy_impact_calculation(self, desired_oaf=None):
+                CountingEconCorrectlyOn.calls += 1
+                return super().energy_impact_calculation(desired_oaf)
+
+        econ = CountingEconCorrectlyOn()
+        results = []
+        econ.set_class_values("test", results, td(minutes=1), 1, 20.0, 80.0, 6000.0, 10.0)
+        for minute in range(3):
+            econ.accept(econ.buffer.append(datetime.fromtimestamp(60 * minute), 60.0, 70.0, 65.0 + minute, 0.0, 1.0))
+        econ.not_economizing_when_needed()
+        assert CountingEconCorrectlyOn.calls == 1
+        assert set(results[-1].values.values()) == {energy_impact(np.array([65.0, 66.0, 67.0]), np.full(3, 60.0),
+                                                                   np.ones(3), 6000.0, 10.0, 2.0)}
+
+    def test_local_minutes(self):
+        """test the local minute of the hour for a half hour offset timezone"""
+        epoch = np.array([0, 60, 1800], dtype=np.int64)
+        minutes = local_minutes(epoch, dateutil.tz.gettz("Asia/Kolkata"))
+        assert minutes.tolist() == [30, 31, 0]
+
+    def test_local_minutes_transition_within_hour(self):
+        """test a daylight saving change that falls on the half hour"""
+        zone = dateutil.tz.gettz("America/St_Johns")
+        start = int(datetime(2023, 3, 12, 5, tzinfo=timezone.utc).timestamp())
+        epoch = np.arange(start, start + 2 * 3600, 300, dtype=np.int64)
+        minutes = local_minutes(epoch, zone)
+        assert minutes.tolist() == [datetime.fromtimestamp(int(value), zone).minute for value in epoch]
+
+
+class TestBatchEngine(unittest.TestCase):
+    """
+    Contains the tests comparing the batch engine with the agent
+    """
+
+    def assert_same_results(self, arguments, seed, size=1500):
+        agent = build_agent(arguments)
+        columns = generate_samples(size, seed)
+        published = publish_samples(agent, columns)
+        engine, results = build_engine(agent)
+        engine.run(*columns)
+        assert len(published) == len(results)
+        for (topic, date, message), record in zip(published, results):
+            assert topic.endswith(record.table)
+            assert date == record.date
+            assert message == record.payload()
+
+    def test_short_window(self):
+        """test the batch engine against the agent with a five minute window"""
+        self.assert_same_results({"data_window": 5, "no_required_data": 3, "open_damper_time": 1}, seed=1)
+
+    def test_long_window(self):
+        """test the batch engine against the agent with a thirty minute window"""
+        self.assert_same_results({"data_window": 30, "no_required_data": 10, "open_damper_time": 0}, seed=2)
+
+    def test_ahu(self):
+        """test the batch engine against the agent for an AHU"""
+        self.assert_same_results({"data_window": 15, "no_required_data": 5, "device_type": "ahu"}, seed=3)
+
+    def test_random_windows(self):
+        """test the batch engine against the agent where the windows close on every kind of check"""
+        arguments = ({"data_window": 5, "no_required_data": 1, "open_damper_time": 0},
+                     {"data_window": 10, "no_required_data": 2, "open_damper_time": 2, "economizer_type": "hl"},
+                     {"data_window": 60, "no_required_data": 3, "open_damper_time": 5})
+        for seed in range(20, 26):
+            self.assert_same_results(arguments[seed % 3], seed, size=600)
+
+    def test_missing_values_are_skipped(self):
+        """test that samples with a missing point do not reach the diagnostics"""
+        columns = generate_samples(120, 4)
+        agent = build_agent({"data_window": 5, "no_required_data": 3})
+        engine, results = build_engine(agent)
+        engine.run(*columns)
+        expected = list(results)
+        columns = [np.insert(column, 7, np.nan if index else column[7] + 1) for index, column in enumerate(columns)]
+        engine, results = build_engine(agent)
+        engine.run(*columns)
+        assert results == expected
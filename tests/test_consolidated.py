@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import json
+import unittest
+
+from economizer import constants
+
+from economizer_helpers import build_agent, generate_samples, publish_samples
+
+ARGUMENTS = {"data_window": 5, "no_required_data": 3, "open_damper_time": 1}
+DEVICE = {"campus": "campus", "building": "building", "unit": {"rtu4": {"subdevices": ["vav1"]}}}
+
+
+class TestConsolidatedResults(unittest.TestCase):
+    """
+    Contains the tests for the consolidated result documents
+    """
+
+    def test_format(self):
+        """test the document layout and that a diagnostic reports once per table"""
+        results = [
+            constants.table_publish_format("a", "t1", constants.ECON1, constants.DX, {"low": 1.1}),
+            constants.table_publish_format("a", "t1", constants.ECON2, constants.DX, {"low": 10.0}),
+            constants.table_publish_format("a", "t1", constants.ECON2, constants.EI, {"low": 0.5}),
+            constants.table_publish_format("a", "t2", constants.ECON1, constants.DX, {"low": -49.2}),
+        ]
+        timestamp, document = constants.consolidated_publish_format(results)
+        assert timestamp == "t2"
+        assert document == {
+            constants.ECON1: {"timestamp": "t1", "diagnostic message": {"low": 1.1}},
+            constants.ECON2: {"timestamp": "t1", "diagnostic message": {"low": 10.0}, "energy impact": {"low": 0.5}}
+        }
+
+    def test_one_document_per_device_and_window(self):
+        """test that each window publishes one document per device holding the separate results"""
+        columns = generate_samples(600, 10)
+        separate_agent = build_agent(ARGUMENTS, DEVICE)
+        consolidated_agent = build_agent(dict(ARGUMENTS, consolidated_results=True), DEVICE)
+        separate_count = 0
+        documents = 0
+        for row in range(600):
+            sample = [column[row:row + 1] for column in columns]
+            separate = publish_samples(separate_agent, sample)
+            consolidated = publish_samples(consolidated_agent, sample)
+            expected = {}
+            for topic, date, message in separate:
+                prefix, diagnostic, table = topic.rsplit("/", 2)
+                entry = expected.setdefault(prefix, {}).setdefault(diagnostic, {"timestamp": date})
+                entry.setdefault(table, json.loads(message))
+            received = {}
+            for topic, date, document in consolidated:
+                prefix, table = topic.rsplit("/", 1)
+                assert table == constants.RESULTS
+                assert prefix not in received
+                received[prefix] = document
+            assert received == expected
+            separate_count += len(separate)
+            documents += len(consolidated)
+            separate.clear()
+            consolidated.clear()
+        assert documents
+        assert documents * 3 < separate_count
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import unittest
+
+from economizer.device import DeviceState
+
+from economizer_helpers import build_agent, generate_samples, publish_samples
+
+ARGUMENTS = {"data_window": 5, "no_required_data": 3, "open_damper_time": 1}
+DEVICE = {
+    "campus": "campus",
+    "building": "building",
+    "unit": {
+        "rtu4": {"subdevices": ["vav1", "vav2"]},
+        "rtu5": {"subdevices": []}
+    }
+}
+
+
+class TestDeviceState(unittest.TestCase):
+    """
+    Contains the tests for per-device diagnostic state
+    """
+
+    def test_device_states_created(self):
+        """test that every unit and subdevice topic gets its own state"""
+        agent = build_agent(ARGUMENTS, DEVICE)
+        assert sorted(agent.devices) == ["devices/campus/building/rtu4/all",
+                                         "devices/campus/building/rtu4/vav1/all",
+                                         "devices/campus/building/rtu4/vav2/all",
+                                         "devices/campus/building/rtu5/all"]
+        for device in agent.devices.values():
+            assert isinstance(device, DeviceState)
+        rtu4 = agent.devices["devices/campus/building/rtu4/all"]
+        rtu5 = agent.devices["devices/campus/building/rtu5/all"]
+        assert rtu4.temp_sensor is not rtu5.temp_sensor
+        assert rtu4.results_publish is not rtu5.results_publish
+        assert rtu4.publish_list == ["campus/building/rtu4", "campus/building/rtu4/vav1",
+                                     "campus/building/rtu4/vav2"]
+        assert agent.devices["devices/campus/building/rtu4/vav1/all"].publish_list == ["campus/building/rtu4/vav1"]
+
+    def test_interleaved_devices_are_isolated(self):
+        """test that interleaved samples from two units give the same results as each unit alone"""
+        rtu4_columns = generate_samples(300, 1)
+        rtu5_columns = generate_samples(300, 2)
+        expected = []
+        for topic, columns in (("devices/campus/building/rtu4/all", rtu4_columns),
+                               ("devices/campus/building/rtu5/all", rtu5_columns)):
+            agent = build_agent(ARGUMENTS, DEVICE)
+            expected.append(publish_samples(agent, columns, topic))
+
+        agent = build_agent(ARGUMENTS, DEVICE)
+        for row in range(300):
+            publish_samples(agent, [column[row:row + 1] for column in rtu4_columns], "devices/campus/building/rtu4/all")
+            publish_samples(agent, [column[row:row + 1] for column in rtu5_columns], "devices/campus/building/rtu5/all")
+        published = agent.vip.pubsub.published
+        assert expected[0] and expected[1]
+        assert [result for result in published if "/rtu4/" in result[0]] == expected[0]
+        assert [result for result in published if "/rtu5/" in result[0]] == expected[1]
+
+    def test_threshold_tables_shared(self):
+        """test that devices with the same configuration share their threshold tables and payloads"""
+        agent = build_agent(ARGUMENTS, DEVICE)
+        rtu4 = agent.devices["devices/campus/building/rtu4/all"]
+        rtu5 = agent.devices["devices/campus/building/rtu5/all"]
+        assert rtu4.econ_correctly_on.open_damper_threshold is rtu5.econ_correctly_on.open_damper_threshold
+        assert rtu4.excess_outside_air.excess_oaf_threshold is rtu5.excess_outside_air.excess_oaf_threshold
+        assert rtu4.temp_sensor.insufficient_data is rtu5.temp_sensor.insufficient_data
+        with self.assertRaises(TypeError):
+            rtu4.econ_correctly_on.open_damper_threshold["low"] = 0.0
+        assert not hasattr(rtu4.econ_correctly_on, "__dict__")
+
+    def test_unknown_topic_ignored(self):
+        """test that a topic without a device state is dropped"""
+        agent = build_agent(ARGUMENTS, DEVICE)
+        published = publish_samples(agent, generate_samples(30, 3), "devices/campus/building/rtu9/all")
+        assert published == []
+        assert agent.diagnostic_done_flag is True
+
+    def test_point_index(self):
+        """test that the compiled point index parses only the mapped points"""
+        agent = build_agent(dict(ARGUMENTS, point_mapping={
+            "supply_fan_status": "FanStatus",
+            "outdoor_air_temperature": ["OAT1", "OAT2"],
+            "return_air_temperature": "ReturnAirTemp",
+            "mixed_air_temperature": "MixedAirTemp",
+            "outdoor_damper_signal": "Damper",
+            "cool_call": "CompressorStatus"
+        }))
+        assert agent.point_index["OAT2"] == "oat_data"
+        assert "SupplyFanSpeed" not in agent.point_index
+        device = agent.devices["devices/campus/building/rtu4/all"]
+        payload = {"OAT1": 60.0, "OAT2": 62.0, "ReturnAirTemp": 72.0, "MixedAirTemp": 70.0, "Damper": 20.0,
+                   "CompressorStatus": None, "FanStatus": 1, "SupplyFanSpeed": 50.0}
+        payload.update(("Point{}".format(index), 0.0) for index in range(300))
+        device.parse_data_message([payload])
+        assert sorted(device.oat_data) == [60.0, 62.0]
+        assert device.cooling_data == []
+        assert device.fan_sp_data == []
+        assert device.ignored_points == 301
+
+    def test_result_topics_cached(self):
+        """test that the record topics of a table are built once"""
+        agent = build_agent(ARGUMENTS, DEVICE)
+        rtu4 = agent.devices["devices/campus/building/rtu4/all"]
+        table = "Temperature Sensor Dx/diagnostic message"
+        result_topics = rtu4.result_topics(table)
+        assert result_topics == ["record/Economizer_AIRCx/campus/building/rtu4/" + table,
+                                 "record/Economizer_AIRCx/campus/building/rtu4/vav1/" + table,
+                                 "record/Economizer_AIRCx/campus/building/rtu4/vav2/" + table]
+        assert rtu4.result_topics(table) is result_topics
+
+    def test_result_fanout(self):
+        """test the unit only and index fan-out against the full fan-out"""
+        columns = generate_samples(300, 1)
+        full = publish_samples(build_agent(ARGUMENTS, DEVICE), columns)
+        unit_only = [result for result in full if "/rtu4/vav" not in result[0]]
+        assert len(unit_only) * 3 == len(full)
+        assert publish_samples(build_agent(dict(ARGUMENTS, result_fanout="unit"), DEVICE), columns) == unit_only
+
+        indexed = publish_samples(build_agent(dict(ARGUMENTS, result_fanout="index"), DEVICE), columns)
+        index_topic = "record/Economizer_AIRCx/campus/building/rtu4/subdevices"
+        index = [result for result in indexed if result[0] == index_topic]
+        assert [result for result in indexed if result[0] != index_topic] == unit_only
+        assert index
+        assert all(message == ["campus/building/rtu4/vav1", "campus/building/rtu4/vav2"]
+                   for _, _, message in index)
+
+    def test_unknown_fanout(self):
+        """test that an unknown fan-out falls back to full"""
+        agent = build_agent(dict(ARGUMENTS, result_fanout="some"), DEVICE)
+        assert agent.result_fanout == "full"
@@ -33,6 +33,11 @@ from economizer.diagnostics.InsufficientOutsideAir import InsufficientOutsideAir
 from economizer.diagnostics.TemperatureSensor import DamperSensorInconsistency, TemperatureSensor
 
 
+def add_sample(diagnostic, cur_time, oat=50.0, rat=50.0, mat=50.0, oad=0.0, fan_spd=1.0):
+    """Store a sample in the diagnostic's buffer and accept it"""
+    diagnostic.accept(diagnostic.buffer.append(cur_time, oat, rat, mat, oad, fan_spd))
+
+
 class TestDiagnosticsTempSensor(unittest.TestCase):
     """
     Contains all the tests for Temperature Diagnostic
@@ -80,10 +85,7 @@ class TestDiagnosticsTempSensor(unittest.TestCase):
         rat = 50
         mat = 25
         cur_time = datetime.fromtimestamp(1036)
-        temp_sensor.timestamp.append(cur_time)
-        temp_sensor.oat_values.append(oat)
-        temp_sensor.mat_values.append(mat)
-        temp_sensor.rat_values.append(rat)
+        add_sample(temp_sensor, cur_time, oat=oat, rat=rat, mat=mat)
         temp_sensor.temperature_sensor_dx()
         assert temp_sensor.temp_sensor_problem is None
 
@@ -97,10 +99,7 @@ class TestDiagnosticsTempSensor(unittest.TestCase):
         rat = 50
         mat = 50
         cur_time = datetime.fromtimestamp(1036)
-        temp_sensor.timestamp.append(cur_time)
-        temp_sensor.oat_values.append(oat)
-        temp_sensor.mat_values.append(mat)
-        temp_sensor.rat_values.append(rat)
+        add_sample(temp_sensor, cur_time, oat=oat, rat=rat, mat=mat)
         temp_sensor.temperature_sensor_dx()
         assert temp_sensor.temp_sensor_problem is False
 
@@ -110,12 +109,8 @@ class TestDiagnosticsTempSensor(unittest.TestCase):
         data_window = td(minutes=1)
         results = []
         temp_sensor.set_class_values("test", results, data_window, 1, 4.0, 0, 90.0)
-        temp_sensor.oat_values.append(50)
-        temp_sensor.mat_values.append(25)
-        temp_sensor.rat_values.append(50)
-        temp_sensor.oat_values.append(100)
-        temp_sensor.mat_values.append(50)
-        temp_sensor.rat_values.append(100)
+        add_sample(temp_sensor, datetime.fromtimestamp(1), oat=50, mat=25, rat=50)
+        add_sample(temp_sensor, datetime.fromtimestamp(61), oat=100, mat=50, rat=100)
         avg_oa_ma, avg_ra_ma, avg_ma_oa, avg_ma_ra = temp_sensor.aggregate_data()
         assert avg_oa_ma == 37.5
         assert avg_ra_ma == 37.5
@@ -128,12 +123,8 @@ class TestDiagnosticsTempSensor(unittest.TestCase):
         data_window = td(minutes=1)
         results = []
         temp_sensor.set_class_values("test", results, data_window, 1, 4.0, 0, 90.0)
-        temp_sensor.oat_values.append(50)
-        temp_sensor.mat_values.append(25)
-        temp_sensor.rat_values.append(50)
-        temp_sensor.oat_values.append(100)
-        temp_sensor.mat_values.append(50)
-        temp_sensor.rat_values.append(100)
+        add_sample(temp_sensor, datetime.fromtimestamp(1), oat=50, mat=25, rat=50)
+        add_sample(temp_sensor, datetime.fromtimestamp(61), oat=100, mat=50, rat=100)
         temp_sensor.temp_sensor_problem = True
         assert len(temp_sensor.oat_values) == 2
         assert len(temp_sensor.mat_values) == 2
@@ -190,12 +181,10 @@ class TestDiagnosticsDamperSensorInconsistency(unittest.TestCase):
             'high': max(temp_diff_thr, 4.0)
         }
         first_stamp = datetime.fromtimestamp(1)
-        damp_sensor.timestamp.append(first_stamp)
         cur_time = datetime.fromtimestamp(10000)
         results = []
         damp_sensor.set_class_values("test", results, data_window, 1, open_damp_time, oat_mat_check, 90.0)
-        damp_sensor.oat_values.append(50)
-        damp_sensor.mat_values.append(25)
+        add_sample(damp_sensor, first_stamp, oat=50, mat=25)
         damp_sensor.steady_state = first_stamp
         damp_sensor.damper_algorithm(50, 25, 100, cur_time)
         assert len(damp_sensor.timestamp) == 2
@@ -216,10 +205,8 @@ class TestDiagnosticsDamperSensorInconsistency(unittest.TestCase):
         }
         results = []
         damp_sensor.set_class_values("test", results, data_window, 1, open_damp_time, oat_mat_check, 90.0)
-        damp_sensor.oat_values.append(50)
-        damp_sensor.mat_values.append(25)
-        damp_sensor.oat_values.append(100)
-        damp_sensor.mat_values.append(50)
+        add_sample(damp_sensor, datetime.fromtimestamp(1), oat=50, mat=25)
+        add_sample(damp_sensor, datetime.fromtimestamp(61), oat=100, mat=50)
         damp_sensor.steady_state = True
         assert len(damp_sensor.oat_values) == 2
         assert len(damp_sensor.mat_values) == 2
@@ -278,16 +265,16 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         econ = EconCorrectlyOff()
         data_window = td(minutes=1)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
+        add_sample(econ, first_stamp)
         cur_time = datetime.fromtimestamp(10000)
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         econ.economizer_off_algorithm(50.0, 25.0, 50.0, 25.0, 5.0, cur_time, 36)
-        assert len(econ.oat_values) == 0
-        assert len(econ.mat_values) == 0
-        assert len(econ.rat_values) == 0
-        assert len(econ.oad_values) == 0
-        assert len(econ.fan_spd_values) == 0
+        assert len(econ.oat_values) == 1
+        assert len(econ.mat_values) == 1
+        assert len(econ.rat_values) == 1
+        assert len(econ.oad_values) == 1
+        assert len(econ.fan_spd_values) == 1
         assert len(econ.timestamp) == 1
 
     def test_econ_conditions(self):
@@ -298,11 +285,8 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.economizing.append(first_stamp)
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oad_values.append(100)
-        econ.rat_values.append(50)
+        econ.economizing += 1
+        add_sample(econ, first_stamp, oat=50, mat=25, oad=100, rat=50)
         ret = econ.economizer_conditions(cur_time)
         assert len(econ.oat_values) == 0
         assert len(econ.mat_values) == 0
@@ -320,20 +304,16 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(100000)
-        econ.economizing.append(first_stamp)
-        econ.econ_timestamp.extend([first_stamp, first_stamp + data_window, first_stamp + data_window * 2])
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oad_values.append(100)
-        econ.rat_values.append(50)
-        econ.fan_spd_values.append(50)
+        econ.economizing += 1
+        econ.econ_count += 3
+        add_sample(econ, first_stamp + data_window, oat=50, mat=25, oad=100, rat=50, fan_spd=50)
         ret = econ.economizer_conditions(cur_time)
         assert len(econ.oat_values) == 1
         assert len(econ.mat_values) == 1
         assert len(econ.rat_values) == 1
         assert len(econ.oad_values) == 1
         assert len(econ.fan_spd_values) == 1
-        assert len(econ.timestamp) == 0
+        assert len(econ.timestamp) == 1
         assert ret is False
 
     def test_econ_when_not_needed(self):
@@ -343,12 +323,8 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
-        econ.economizing.append(first_stamp)
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oad_values.append(100)
-        econ.rat_values.append(50)
+        econ.economizing += 1
+        add_sample(econ, first_stamp, oat=50, mat=25, oad=100, rat=50)
         econ.economizing_when_not_needed()
         assert len(econ.oat_values) == 0
         assert len(econ.mat_values) == 0
@@ -364,13 +340,8 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
-        econ.economizing.append(first_stamp)
-        econ.oat_values.append(10)
-        econ.mat_values.append(20)
-        econ.oad_values.append(10)
-        econ.rat_values.append(10)
-        econ.fan_spd_values.append(10)
+        econ.economizing += 1
+        add_sample(econ, first_stamp, oat=10, mat=20, oad=10, rat=10, fan_spd=10)
         ei = econ.energy_impact_calculation(1.0)
         assert ei == 3888.0
 
@@ -381,13 +352,8 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
-        econ.economizing.append(first_stamp)
-        econ.oat_values.append(1)
-        econ.mat_values.append(1)
-        econ.oad_values.append(1)
-        econ.rat_values.append(1)
-        econ.fan_spd_values.append(1)
+        econ.economizing += 1
+        add_sample(econ, first_stamp, oat=1, mat=1, oad=1, rat=1, fan_spd=1)
         ei = econ.energy_impact_calculation(0.0)
         assert ei == 0.0
 
@@ -398,13 +364,8 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
-        econ.economizing.append(first_stamp)
-        econ.oat_values.append(10)
-        econ.mat_values.append(20)
-        econ.oad_values.append(10)
-        econ.rat_values.append(10)
-        econ.fan_spd_values.append(10)
+        econ.economizing += 1
+        add_sample(econ, first_stamp, oat=10, mat=20, oad=10, rat=10, fan_spd=10)
         ei = econ.energy_impact_calculation(-10.0)
         assert ei == 3888.0
 
@@ -414,16 +375,12 @@ class TestDiagnosticsEconCorrectlyOff(unittest.TestCase):
         data_window = td(minutes=1)
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oat_values.append(100)
-        econ.mat_values.append(50)
-        econ.oad_values.append(10)
-        econ.fan_spd_values.append(10)
+        add_sample(econ, datetime.fromtimestamp(1), oat=50, mat=25, oad=10, fan_spd=10)
+        add_sample(econ, datetime.fromtimestamp(61), oat=100, mat=50)
         assert len(econ.oat_values) == 2
         assert len(econ.mat_values) == 2
-        assert len(econ.oad_values) == 1
-        assert len(econ.fan_spd_values) == 1
+        assert len(econ.oad_values) == 2
+        assert len(econ.fan_spd_values) == 2
         econ.clear_data()
         assert len(econ.oat_values) == 0
         assert len(econ.mat_values) == 0
@@ -478,17 +435,17 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         econ = EconCorrectlyOn()
         data_window = td(minutes=1)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
+        add_sample(econ, first_stamp)
         cur_time = datetime.fromtimestamp(10000)
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         econ.economizer_on_algorithm(True, 50.0, 25.0, 50.0, 25.0, 5.0, cur_time, 36)
-        assert len(econ.oat_values) == 1
-        assert len(econ.mat_values) == 1
-        assert len(econ.rat_values) == 1
-        assert len(econ.oad_values) == 1
-        assert len(econ.fan_spd_values) == 1
-        assert econ.fan_spd_values[0] == 0.36
+        assert len(econ.oat_values) == 2
+        assert len(econ.mat_values) == 2
+        assert len(econ.rat_values) == 2
+        assert len(econ.oad_values) == 2
+        assert len(econ.fan_spd_values) == 2
+        assert econ.fan_spd_values[-1] == 0.36
         assert len(econ.timestamp) == 2
 
     def test_econ_on_conditions(self):
@@ -498,11 +455,8 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         cur_time = datetime.fromtimestamp(10000)
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
-        econ.not_cooling.append(datetime.fromtimestamp(1))
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oad_values.append(100)
-        econ.rat_values.append(50)
+        econ.not_cooling += 1
+        add_sample(econ, datetime.fromtimestamp(1), oat=50, mat=25, oad=100, rat=50)
         ret = econ.economizer_conditions(cur_time)
         assert len(econ.oat_values) == 0
         assert len(econ.mat_values) == 0
@@ -520,19 +474,15 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         results = []
         econ.set_class_values("test", results,  data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(100000)
-        econ.econ_timestamp.append(first_stamp)
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oad_values.append(100)
-        econ.rat_values.append(50)
-        econ.fan_spd_values.append(50)
+        econ.econ_count += 1
+        add_sample(econ, first_stamp, oat=50, mat=25, oad=100, rat=50, fan_spd=50)
         ret = econ.economizer_conditions(cur_time)
         assert len(econ.oat_values) == 1
         assert len(econ.mat_values) == 1
         assert len(econ.rat_values) == 1
         assert len(econ.oad_values) == 1
         assert len(econ.fan_spd_values) == 1
-        assert len(econ.timestamp) == 0
+        assert len(econ.timestamp) == 1
         assert ret is False
 
     def test_econ_on_not_economizing_when_needed(self):
@@ -542,12 +492,7 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
-        econ.economizing = first_stamp
-        econ.oat_values.append(51)
-        econ.mat_values.append(25)
-        econ.oad_values.append(100)
-        econ.rat_values.append(50)
+        add_sample(econ, first_stamp, oat=51, mat=25, oad=100, rat=50)
         econ.not_economizing_when_needed()
         assert len(econ.oat_values) == 0
         assert len(econ.mat_values) == 0
@@ -564,12 +509,7 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
             results = []
             econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
             first_stamp = datetime.fromtimestamp(1)
-            econ.timestamp.append(first_stamp)
-            econ.economizing = first_stamp
-            econ.oat_values.append(50)
-            econ.mat_values.append(25)
-            econ.oad_values.append(100)
-            econ.rat_values.append(50)
+            add_sample(econ, first_stamp, oat=50, mat=25, oad=100, rat=50)
             econ.not_economizing_when_needed()
 
 
@@ -580,13 +520,7 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
-        econ.economizing = first_stamp
-        econ.oat_values.append(10)
-        econ.mat_values.append(20)
-        econ.oad_values.append(10)
-        econ.rat_values.append(10)
-        econ.fan_spd_values.append(10)
+        add_sample(econ, first_stamp, oat=10, mat=20, oad=10, rat=10, fan_spd=10)
         ei = econ.energy_impact_calculation()
         assert ei == 3888.0
 
@@ -597,13 +531,7 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
-        econ.economizing = first_stamp
-        econ.oat_values.append(1)
-        econ.mat_values.append(1)
-        econ.oad_values.append(1)
-        econ.rat_values.append(1)
-        econ.fan_spd_values.append(1)
+        add_sample(econ, first_stamp, oat=1, mat=1, oad=1, rat=1, fan_spd=1)
         ei = econ.energy_impact_calculation()
         assert ei == 0.0
 
@@ -614,13 +542,7 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        econ.timestamp.append(first_stamp)
-        econ.economizing = first_stamp
-        econ.oat_values.append(10)
-        econ.mat_values.append(20)
-        econ.oad_values.append(10)
-        econ.rat_values.append(10)
-        econ.fan_spd_values.append(10)
+        add_sample(econ, first_stamp, oat=10, mat=20, oad=10, rat=10, fan_spd=10)
         ei = econ.energy_impact_calculation()
         assert ei == 3888.0
 
@@ -630,16 +552,12 @@ class TestDiagnosticsEconCorrectlyOn(unittest.TestCase):
         data_window = td(minutes=1)
         results = []
         econ.set_class_values("test", results, data_window, 1, 20.0, 80.0, 6000.0, 10.0)
-        econ.oat_values.append(50)
-        econ.mat_values.append(25)
-        econ.oat_values.append(100)
-        econ.mat_values.append(50)
-        econ.oad_values.append(10)
-        econ.fan_spd_values.append(10)
+        add_sample(econ, datetime.fromtimestamp(1), oat=50, mat=25, oad=10, fan_spd=10)
+        add_sample(econ, datetime.fromtimestamp(61), oat=100, mat=50)
         assert len(econ.oat_values) == 2
         assert len(econ.mat_values) == 2
-        assert len(econ.oad_values) == 1
-        assert len(econ.fan_spd_values) == 1
+        assert len(econ.oad_values) == 2
+        assert len(econ.fan_spd_values) == 2
         econ.clear_data()
         assert len(econ.oat_values) == 0
         assert len(econ.mat_values) == 0
@@ -695,7 +613,6 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         air = ExcessOutsideAir()
         data_window = td(minutes=1)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
         cur_time = datetime.fromtimestamp(10000)
         results = []
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
@@ -704,15 +621,16 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         assert len(air.rat_values) == 0
         assert len(air.oad_values) == 0
         assert len(air.fan_spd_values) == 0
-        assert len(air.timestamp) == 1
+        assert len(air.timestamp) == 0
+        add_sample(air, first_stamp)
         air.excess_ouside_air_algorithm(50.0, 25.0, 50.0, 25.0, 0.0, cur_time, 36)
-        assert len(air.oat_values) == 1
-        assert len(air.mat_values) == 1
-        assert len(air.rat_values) == 1
-        assert len(air.oad_values) == 1
-        assert len(air.fan_spd_values) == 1
+        assert len(air.oat_values) == 2
+        assert len(air.mat_values) == 2
+        assert len(air.rat_values) == 2
+        assert len(air.oad_values) == 2
+        assert len(air.fan_spd_values) == 2
         assert len(air.timestamp) == 2
-        assert air.fan_spd_values[0] == 0.36
+        assert air.fan_spd_values[-1] == 0.36
 
     def test_econ_conditions(self):
         """test the econ conditions method"""
@@ -722,12 +640,8 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         results = []
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        air.economizing.append(first_stamp)
-        air.timestamp.append(first_stamp)
-        air.oat_values.append(50)
-        air.mat_values.append(25)
-        air.oad_values.append(100)
-        air.rat_values.append(50)
+        air.economizing += 1
+        add_sample(air, first_stamp, oat=50, mat=25, oad=100, rat=50)
         ret = air.economizer_conditions(cur_time)
         assert len(air.oat_values) == 0
         assert len(air.mat_values) == 0
@@ -744,20 +658,16 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         cur_time = datetime.fromtimestamp(10000)
         results = []
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
-        air.economizing.append(datetime.fromtimestamp(100000))
-        air.econ_timestamp.extend([datetime.fromtimestamp(100000), datetime.fromtimestamp(100000), datetime.fromtimestamp(100000)])
-        air.oat_values.append(50)
-        air.mat_values.append(25)
-        air.oad_values.append(100)
-        air.rat_values.append(50)
-        air.fan_spd_values.append(50)
+        air.economizing += 1
+        air.econ_count += 3
+        add_sample(air, datetime.fromtimestamp(100000), oat=50, mat=25, oad=100, rat=50, fan_spd=50)
         ret = air.economizer_conditions(cur_time)
         assert len(air.oat_values) == 1
         assert len(air.mat_values) == 1
         assert len(air.rat_values) == 1
         assert len(air.oad_values) == 1
         assert len(air.fan_spd_values) == 1
-        assert len(air.timestamp) == 0
+        assert len(air.timestamp) == 1
         assert ret is False
 
     def test_excess_oa_method(self):
@@ -767,12 +677,8 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         results = []
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
-        air.economizing = first_stamp
-        air.oat_values.append(51)
-        air.mat_values.append(25)
-        air.oad_values.append(100)
-        air.rat_values.append(50)
+        air.economizing = 1
+        add_sample(air, first_stamp, oat=51, mat=25, oad=100, rat=50)
         air.excess_oa()
         assert len(air.oat_values) == 0
         assert len(air.mat_values) == 0
@@ -789,12 +695,8 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
             results = []
             air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
             first_stamp = datetime.fromtimestamp(1)
-            air.timestamp.append(first_stamp)
-            air.economizing = first_stamp
-            air.oat_values.append(50)
-            air.mat_values.append(25)
-            air.oad_values.append(100)
-            air.rat_values.append(50)
+            air.economizing = 1
+            add_sample(air, first_stamp, oat=50, mat=25, oad=100, rat=50)
             air.excess_oa()
             assert len(air.oat_values) == 0
             assert len(air.mat_values) == 0
@@ -810,13 +712,8 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         results = []
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
-        air.economizing = first_stamp
-        air.oat_values.append(10)
-        air.mat_values.append(20)
-        air.oad_values.append(10)
-        air.rat_values.append(10)
-        air.fan_spd_values.append(10)
+        air.economizing = 1
+        add_sample(air, first_stamp, oat=10, mat=20, oad=10, rat=10, fan_spd=10)
         ei = air.energy_impact_calculation(1.0)
         assert ei == 3888.0
 
@@ -827,13 +724,8 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         results = []
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
-        air.economizing = first_stamp
-        air.oat_values.append(1)
-        air.mat_values.append(1)
-        air.oad_values.append(1)
-        air.rat_values.append(1)
-        air.fan_spd_values.append(1)
+        air.economizing = 1
+        add_sample(air, first_stamp, oat=1, mat=1, oad=1, rat=1, fan_spd=1)
         ei = air.energy_impact_calculation(0.0)
         assert ei == 0.0
 
@@ -844,13 +736,8 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         results = []
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
-        air.economizing = first_stamp
-        air.oat_values.append(10)
-        air.mat_values.append(20)
-        air.oad_values.append(10)
-        air.rat_values.append(10)
-        air.fan_spd_values.append(10)
+        air.economizing = 1
+        add_sample(air, first_stamp, oat=10, mat=20, oad=10, rat=10, fan_spd=10)
         ei = air.energy_impact_calculation(-10.0)
         assert ei == 3888.0
 
@@ -860,16 +747,12 @@ class TestDiagnosticsExcessOutsideAir(unittest.TestCase):
         data_window = td(minutes=1)
         results = []
         air.set_class_values("test", results, data_window, 1, 20.0, 10.0, 6000.0, 10.0)
-        air.oat_values.append(50)
-        air.mat_values.append(25)
-        air.oat_values.append(100)
-        air.mat_values.append(50)
-        air.oad_values.append(10)
-        air.fan_spd_values.append(10)
+        add_sample(air, datetime.fromtimestamp(1), oat=50, mat=25, oad=10, fan_spd=10)
+        add_sample(air, datetime.fromtimestamp(61), oat=100, mat=50)
         assert len(air.oat_values) == 2
         assert len(air.mat_values) == 2
-        assert len(air.oad_values) == 1
-        assert len(air.fan_spd_values) == 1
+        assert len(air.oad_values) == 2
+        assert len(air.fan_spd_values) == 2
         air.clear_data()
         assert len(air.oat_values) == 0
         assert len(air.mat_values) == 0
@@ -939,13 +822,9 @@ class TestDiagnosticsInsufficientOutsideAir(unittest.TestCase):
         air = InsufficientOutsideAir()
         data_window = td(minutes=1)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
-        cur_time = datetime.fromtimestamp(10000)
         results = []
         air.set_class_values("test", results, data_window, 1, 10.0)
-        air.oat_values.append(50)
-        air.mat_values.append(25)
-        air.rat_values.append(100)
+        add_sample(air, first_stamp, oat=50, mat=25, rat=100)
         air.insufficient_oa()
         assert len(air.oat_values) == 0
         assert len(air.mat_values) == 0
@@ -957,12 +836,9 @@ class TestDiagnosticsInsufficientOutsideAir(unittest.TestCase):
         air = InsufficientOutsideAir()
         data_window = td(minutes=1)
         first_stamp = datetime.fromtimestamp(1)
-        air.timestamp.append(first_stamp)
         results = []
         air.set_class_values("test", results, data_window, 1, 10.0)
-        air.oat_values.append(50)
-        air.mat_values.append(25)
-        air.rat_values.append(10)
+        add_sample(air, first_stamp, oat=50, mat=25, rat=10)
         assert len(air.oat_values) == 1
         assert len(air.mat_values) == 1
         assert len(air.rat_values) == 1
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import math
+import unittest
+
+import numpy as np
+
+from economizer import evaluator
+from economizer.diagnostics.SampleBuffer import energy_term
+from economizer.diagnostics.WindowStatistics import WindowStatistics
+
+from economizer_helpers import build_agent, generate_samples, publish_samples
+
+ARGUMENTS = {"data_window": 15, "no_required_data": 5, "open_damper_time": 1}
+DEVICE = {
+    "campus": "campus",
+    "building": "building",
+    "unit": {"rtu{}".format(unit): {"subdevices": []} for unit in range(6)}
+}
+STATISTICS = ("count", "oad_sum", "oa_ma_sum", "ra_ma_sum", "abs_oa_ma_sum", "oaf_sum", "energy_sum", "energy_count",
+              "desired_energy_sum", "desired_energy_count", "first_time", "last_time")
+
+
+def unit_topic(unit):
+    return "devices/campus/building/rtu{}/all".format(unit)
+
+
+def publish_rows(agent, samples, rows, evaluate=False):
+    for row in rows:
+        for unit in range(6):
+            publish_samples(agent, [column[row:row + 1] for column in samples], unit_topic(unit))
+        if evaluate:
+            agent.evaluate_devices(list(agent.devices.values()))
+    agent.publish_queue.flush()
+    return agent.vip.pubsub.published
+
+
+class TestBatchedEvaluator(unittest.TestCase):
+    """
+    Contains the tests for evaluating the windows of many devices together
+    """
+
+    def test_statistics_match_accumulated(self):
+        """test the segment aggregates against statistics accumulated sample by sample"""
+        samples = generate_samples(40, 31)
+        agent = build_agent(dict(ARGUMENTS, evaluation_limit=10), DEVICE)
+        publish_rows(agent, samples, range(1, 12))
+        windows = [window for device in agent.devices.values() for window in evaluator.diagnostic_parameters(device)]
+        assert any(not diagnostic.rows for diagnostic, _, _, _ in windows)
+        for (diagnostic, cfm, eer, desired_oaf), statistics in zip(windows, evaluator.window_statistics(windows)):
+            expected = WindowStatistics(cfm, eer, desired_oaf)
+            for row in diagnostic.rows:
+                expected.add(*diagnostic.buffer.sample(row))
+            for name in STATISTICS:
+                value, expected_value = getattr(statistics, name), getattr(expected, name)
+                if isinstance(value, float):
+                    assert math.isclose(value, expected_value, rel_tol=1e-9, abs_tol=1e-9), name
+                else:
+                    assert value == expected_value, name
+
+    def test_matches_inline_evaluation(self):
+        """test that batched evaluation publishes the results of closing every window on its own"""
+        samples = generate_samples(300, 32)
+        expected = publish_rows(build_agent(ARGUMENTS, DEVICE), samples, range(300))
+        agent = build_agent(dict(ARGUMENTS, evaluation_limit=10), DEVICE)
+        published = publish_rows(agent, samples, range(300), evaluate=True)
+        assert expected
+        assert sorted(published) == sorted(expected)
+        for device in agent.devices.values():
+            assert device.close_due is None
+            assert all(diagnostic.statistics is None for diagnostic, _, _, _ in
+                       evaluator.diagnostic_parameters(device))
+
+    def test_aggregates_match_window_means(self):
+        """test over random samples that the aggregates of a tick give exactly the averages of each window"""
+        for seed in range(40, 46):
+            samples = generate_samples(60, seed)
+            agent = build_agent(dict(ARGUMENTS, data_window=60, evaluation_limit=10), DEVICE)
+            # long windows that are still open
+            publish_rows(agent, samples, range(1, 59))
+            windows = [window for device in agent.devices.values() for window in evaluator.diagnostic_parameters(device)]
+            for (diagnostic, cfm, eer, desired_oaf), statistics in zip(windows, evaluator.window_statistics(windows)):
+                if not diagnostic.rows:
+                    continue
+                count = statistics.count
+                assert statistics.oad_sum / count == float(np.mean(diagnostic.oad_values))
+                assert statistics.oa_ma_sum / count == float(np.mean(diagnostic.oa_ma_values))
+                assert statistics.ra_ma_sum / count == float(np.mean(diagnostic.ra_ma_values))
+                assert statistics.abs_oa_ma_sum / count == float(np.mean(np.abs(diagnostic.oa_ma_values)))
+                if not statistics.oaf_zero_division:
+                    assert statistics.mean_oaf() == float(np.mean(diagnostic.oaf_values))
+                if cfm is None:
+                    continue
+                deltas = [(-diagnostic.oa_ma_values, statistics.energy_terms())]
+                if desired_oaf is not None:
+                    deltas.append((diagnostic.mixed_air_delta_values(desired_oaf),
+                                   statistics.energy_terms(desired_oaf)))
+                for delta, (energy_sum, energy_count) in deltas:
+                    mask = delta > 0
+                    terms = energy_term(delta[mask], diagnostic.fan_spd_values[mask], cfm, eer)
+                    assert (energy_sum, energy_count) == (float(np.sum(terms)), len(terms))
+
+    def test_statistics_mode_untouched(self):
+        """test that diagnostics keeping their own statistics are evaluated from them"""
+        samples = generate_samples(16, 33)
+        agent = build_agent(dict(ARGUMENTS, evaluation_limit=10, window_statistics=True), DEVICE)
+        publish_rows(agent, samples, range(1, 16))
+        device = agent.devices[unit_topic(0)]
+        own = device.temp_sensor.statistics
+        closed = evaluator.close_pending_windows(list(agent.devices.values()))
+        assert device in closed
+        assert device.temp_sensor.statistics is own
+        assert evaluator.close_pending_windows(closed) == []
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import subprocess
+import sys
+import unittest
+
+# modules used by the shard workers and the offline tools, without the agent
+CORE_MODULES = ("economizer.batch", "economizer.device", "economizer.evaluator", "economizer.replay",
+                "economizer.sharding", "economizer.snapshot")
+
+
+class TestCoreImports(unittest.TestCase):
+    """
+    Contains the tests for importing the diagnostics without VOLTTRON
+    """
+
+    def test_core_does_not_import_volttron(self):
+        """test that the core modules import neither VOLTTRON nor configure logging"""
+        code = "; ".join(["import logging, sys"] + ["import " + module for module in CORE_MODULES] + [
+            "print(sorted(name for name in sys.modules if name.split('.')[0] == 'volttron'))",
+            "print(len(logging.getLogger().handlers))"])
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        assert output.split("\n")[:2] == ["[]", "0"]
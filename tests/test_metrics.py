@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import unittest
+
+from economizer.metrics import BUCKET_BOUNDS, STAGES, DeviceMetrics, StageTimer
+
+from economizer_helpers import build_agent, generate_samples, publish_samples
+
+TOPIC = "devices/campus/building/rtu4/all"
+
+
+class TestStageTimer(unittest.TestCase):
+    """
+    Contains the tests for the stage timer
+    """
+
+    def test_add(self):
+        """test count, total, max and the histogram buckets"""
+        timer = StageTimer()
+        for elapsed in (2e-6, 1e-5, 3e-4, 1.0):
+            timer.add(elapsed)
+        result = timer.as_dict()
+        assert result["count"] == 4
+        assert result["max"] == 1.0
+        assert abs(result["total"] - 1.000312) < 1e-12
+        counts = result["histogram"]["counts"]
+        assert len(counts) == len(BUCKET_BOUNDS) + 1
+        assert counts[0] == 2
+        assert counts[BUCKET_BOUNDS.index(5e-4)] == 1
+        assert counts[-1] == 1
+
+    def test_lap(self):
+        """test that lap records the stage and returns the start of the next one"""
+        metrics = DeviceMetrics()
+        start = metrics.start()
+        end = metrics.lap("parse", start)
+        assert end >= start
+        assert metrics.stages["parse"].count == 1
+        metrics.count("messages")
+        metrics.count("messages")
+        assert metrics.as_dict()["counters"] == {"messages": 2}
+        metrics.clear()
+        assert metrics.stages["parse"].count == 0
+        assert metrics.counters == {}
+
+
+class TestAgentMetrics(unittest.TestCase):
+    """
+    Contains the tests for the metrics kept by the agent
+    """
+
+    def test_stage_counts(self):
+        """test that every processed message is timed and every skipped one counted"""
+        agent = build_agent({"data_window": 5, "no_required_data": 3})
+        columns = generate_samples(300, 6)
+        publish_samples(agent, columns)
+        metrics = agent.get_metrics()[TOPIC]
+        counters = metrics["counters"]
+        stages = metrics["stages"]
+        assert set(stages) == set(STAGES)
+        assert counters["messages"] == 300
+        assert stages["message"]["count"] == 300
+        assert stages["publish"]["count"] == 300
+        assert stages["parse"]["count"] == 300
+        assert stages["fan_status"]["count"] == 300
+        skipped = counters.get("fan_off", 0) + counters.get("oaf_condition", 0) + counters.get("sensor_limit", 0)
+        assert stages["algorithms"]["count"] == 300 - skipped
+        assert stages["run_diagnostic"]["count"] == counters["windows"]
+
+    def test_get_and_reset(self):
+        """test the RPC methods for a single device and the reset"""
+        agent = build_agent({})
+        publish_samples(agent, generate_samples(10, 7))
+        assert list(agent.get_metrics(TOPIC)) == [TOPIC]
+        assert agent.get_metrics("devices/unknown/all") == {}
+        agent.reset_metrics()
+        assert agent.get_metrics(TOPIC)[TOPIC]["counters"] == {}
+
+    def test_publish_metrics(self):
+        """test the heartbeat publish topic"""
+        agent = build_agent({})
+        publish_samples(agent, generate_samples(10, 8))
+        agent.vip.pubsub.published.clear()
+        agent.publish_metrics()
+        assert agent.vip.pubsub.published == [
+            ("record/Economizer_AIRCx/campus/building/rtu4/metrics", None, agent.devices[TOPIC].metrics.as_dict()),
+            ("record/Economizer_AIRCx/publish_queue/metrics", None, agent.publish_queue.metrics())
+        ]
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import unittest
+
+from economizer import constants
+from economizer.preconditions import PreconditionTracker
+
+from economizer_helpers import build_agent, generate_samples, publish_samples
+
+
+class TestPreconditionTracker(unittest.TestCase):
+    """
+    Contains the tests for the precondition tracker
+    """
+
+    def test_record(self):
+        """test that only the first and last failures and the count are kept"""
+        tracker = PreconditionTracker()
+        assert not tracker and not tracker.failed(0.0)
+        for minute in range(1000):
+            tracker.record(60.0 * minute)
+        assert len(tracker) == 1000
+        assert tracker.first == 0.0
+        assert tracker.failed(60.0 * 999)
+        assert not tracker.failed(60.0 * 1000)
+        tracker.clear()
+        assert tracker == PreconditionTracker()
+
+    def test_fan_off_overnight(self):
+        """test that a fan off for hours keeps a single tracker and reports every data window"""
+        agent = build_agent({"data_window": 30, "no_required_data": 10})
+        columns = generate_samples(600, 5)
+        columns[6][:] = 0.0
+        published = publish_samples(agent, columns)
+        device = next(iter(agent.devices.values()))
+        assert device.unit_status.count <= 11
+        payload = device.pre_condition_payloads[constants.FAN_OFF].text
+        # reported whenever more than no_required_data samples failed off a window boundary
+        assert len(published) == 54 * len(constants.DX_LIST)
+        assert all(message == payload for _, _, message in published)
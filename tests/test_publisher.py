@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import unittest
+
+import gevent
+
+from economizer.publisher import BLOCK, DROP_NEWEST, DROP_OLDEST, PublishQueue
+
+from economizer_helpers import build_agent, generate_samples
+
+
+class TestPublishQueue(unittest.TestCase):
+    """
+    Contains the tests for the outbound publish queue
+    """
+
+    def setUp(self):
+        self.published = []
+
+    def publish(self, topic, headers, message):
+        self.published.append(message)
+
+    def fill(self, queue, count):
+        return [queue.put("topic", {}, index) for index in range(count)]
+
+    def test_drain_in_batches(self):
+        """test that drain publishes at most one batch in order"""
+        queue = PublishQueue(self.publish, maxsize=10, batch_size=3)
+        self.fill(queue, 5)
+        assert queue.drain() == 3
+        assert self.published == [0, 1, 2]
+        queue.flush()
+        assert self.published == [0, 1, 2, 3, 4]
+        assert queue.metrics()["batches"] == 2
+        assert queue.metrics()["max_depth"] == 5
+
+    def test_drop_oldest(self):
+        """test that a full queue discards the oldest publish"""
+        queue = PublishQueue(self.publish, maxsize=3, policy=DROP_OLDEST)
+        assert all(self.fill(queue, 5))
+        queue.flush()
+        assert self.published == [2, 3, 4]
+        assert queue.metrics()["dropped"] == 2
+
+    def test_drop_newest(self):
+        """test that a full queue discards the new publish"""
+        queue = PublishQueue(self.publish, maxsize=3, policy=DROP_NEWEST)
+        assert self.fill(queue, 5) == [True, True, True, False, False]
+        queue.flush()
+        assert self.published == [0, 1, 2]
+        assert queue.metrics()["dropped"] == 2
+
+    def test_block_without_drainer(self):
+        """test that block publishes inline when no drainer is running"""
+        queue = PublishQueue(self.publish, maxsize=2, policy=BLOCK, batch_size=1)
+        self.fill(queue, 4)
+        assert self.published == [0, 1]
+        assert len(queue) == 2
+
+    def test_block_with_drainer(self):
+        """test that block waits for the drainer greenlet"""
+        queue = PublishQueue(self.publish, maxsize=2, policy=BLOCK, batch_size=1)
+        queue.start()
+        self.fill(queue, 6)
+        gevent.sleep(0)
+        queue.stop()
+        assert self.published == list(range(6))
+        assert queue.metrics()["max_depth"] <= 2
+
+    def test_failed_publish(self):
+        """test that a failing publish is counted and the queue keeps draining"""
+        def publish(topic, headers, message):
+            if message == 1:
+                raise ValueError("bus error")
+            self.published.append(message)
+        queue = PublishQueue(publish)
+        self.fill(queue, 3)
+        queue.flush()
+        assert self.published == [0, 2]
+        assert queue.metrics()["failed"] == 1
+
+    def test_configure_invalid_policy(self):
+        """test that an unknown policy falls back to block"""
+        queue = PublishQueue(self.publish)
+        queue.configure(5, "unknown", 0)
+        assert (queue.maxsize, queue.policy, queue.batch_size) == (5, BLOCK, 1)
+
+    def test_agent_queues_results(self):
+        """test that the callback only queues the results"""
+        agent = build_agent({"data_window": 5, "no_required_data": 3})
+        columns = generate_samples(60, 9)
+        for row in range(60):
+            message = {"outsideairtemp": columns[1][row], "ReturnAirTemp": columns[2][row],
+                       "MixedAirTemp": columns[3][row], "Damper": columns[4][row],
+                       "CompressorStatus": columns[5][row], "FanStatus": 1.0, "SupplyFanSpeed": 75.0}
+            headers = {"Date": "2023-01-01T00:{:02d}:00+00:00".format(row)}
+            agent.new_data_message(None, None, None, "devices/campus/building/rtu4/all", headers, [message])
+        assert agent.vip.pubsub.published == []
+        queued = len(agent.publish_queue)
+        assert queued
+        agent.publish_queue.flush()
+        assert len(agent.vip.pubsub.published) == queued
+        assert agent.get_publish_queue_metrics()["published"] == queued
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import copy
+import unittest
+
+from economizer_helpers import build_agent, generate_samples, publish_samples
+
+ARGUMENTS = {"data_window": 15, "no_required_data": 5, "open_damper_time": 1}
+DEVICE = {
+    "campus": "campus",
+    "building": "building",
+    "unit": {
+        "rtu4": {"subdevices": ["vav1"]},
+        "rtu5": {"subdevices": []}
+    }
+}
+RTU4 = "devices/campus/building/rtu4/all"
+
+
+class FakeEvent(object):
+    def cancel(self):
+        pass
+
+
+class FakeCore(object):
+    identity = "economizer"
+
+    def schedule(self, deadline, callback):
+        return FakeEvent()
+
+
+def build_running_agent():
+    agent = build_agent(ARGUMENTS, copy.deepcopy(DEVICE))
+    agent.core = FakeCore()
+    publish_samples(agent, generate_samples(37, 5), RTU4)
+    return agent
+
+
+class TestConfigurationReload(unittest.TestCase):
+    """
+    Contains the tests for applying configuration store updates
+    """
+
+    def test_unchanged_configuration(self):
+        """test that storing the same configuration does not touch the subscriptions or devices"""
+        agent = build_running_agent()
+        devices = dict(agent.devices)
+        agent.configure_main("config", "NEW", copy.deepcopy(agent.config))
+        assert agent.vip.pubsub.subscriptions == []
+        assert agent.devices == devices
+
+    def test_delete_does_not_reload(self):
+        """test that only NEW and UPDATE actions reload the configuration"""
+        agent = build_running_agent()
+        agent.configure_main("config", "DELETE", {"arguments": dict(agent.config["arguments"], data_window=20)})
+        assert agent.data_window.total_seconds() == 900
+        assert agent.update_config_flag is None
+
+    def test_threshold_change_keeps_windows(self):
+        """test that a threshold change is applied to the existing device states"""
+        agent = build_running_agent()
+        device = agent.devices[RTU4]
+        rows = device.temp_sensor.sample_count()
+        assert rows
+        arguments = dict(agent.config["arguments"], sensitivity="custom",
+                         temp_difference_threshold=6.0, oat_high_threshold=100.0)
+        agent.configure_main("config", "UPDATE", {"arguments": arguments})
+        assert agent.devices[RTU4] is device
+        assert device.temp_sensor.sample_count() == rows
+        assert device.temp_sensor.temp_diff_thr["normal"] == 6.0
+        assert agent.oat_high_threshold == 100.0
+        assert agent.vip.pubsub.subscriptions == []
+
+    def test_changed_topics_resubscribed(self):
+        """test that only added and removed device topics are (un)subscribed"""
+        agent = build_running_agent()
+        device = agent.devices[RTU4]
+        device.result_topics("Temperature Sensor Dx")
+        units = {"rtu4": {"subdevices": ["vav1", "vav2"]}, "rtu6": {"subdevices": []}}
+        agent.configure_main("config", "UPDATE", {"device": dict(DEVICE, unit=units)})
+        assert sorted(agent.vip.pubsub.subscriptions) == [
+            ("subscribe", "devices/campus/building/rtu4/vav2/all"),
+            ("subscribe", "devices/campus/building/rtu6/all"),
+            ("unsubscribe", "devices/campus/building/rtu5/all")]
+        assert sorted(agent.devices) == sorted(agent.device_publish)
+        assert agent.devices[RTU4] is device
+        assert device.publish_list == ["campus/building/rtu4", "campus/building/rtu4/vav1",
+                                       "campus/building/rtu4/vav2"]
+        assert len(device.result_topics("Temperature Sensor Dx")) == 3
+
+    def test_point_mapping_change_rebuilds(self):
+        """test that the device states are rebuilt when the point mapping changes"""
+        agent = build_running_agent()
+        device = agent.devices[RTU4]
+        point_mapping = dict(agent.config["arguments"]["point_mapping"], mixed_air_temperature="MAT")
+        agent.configure_main("config", "UPDATE", {"arguments": dict(agent.config["arguments"],
+                                                                    point_mapping=point_mapping)})
+        assert agent.devices[RTU4] is not device
+        assert not agent.devices[RTU4].temp_sensor.sample_count()
+        assert agent.vip.pubsub.subscriptions == []
+
+    def test_statistics_thresholds_updated(self):
+        """test that in-place updates reach the running statistics of the diagnostics"""
+        agent = build_running_agent()
+        agent.configure_main("config", "UPDATE", {"arguments": dict(agent.config["arguments"], window_statistics=True)})
+        device = agent.devices[RTU4]
+        agent.configure_main("config", "UPDATE", {"arguments": dict(agent.config["arguments"], sensitivity="custom",
+                                                                    desired_oaf=20.0, eer=12.0)})
+        assert agent.devices[RTU4] is device
+        assert device.econ_correctly_off.statistics.desired_oaf == 0.2
+        assert device.excess_outside_air.statistics.eer == 12.0
+        assert device.econ_correctly_on.statistics.desired_oaf is None
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from datetime import datetime, timezone
+
+from economizer import replay
+
+from economizer_helpers import POINTS, build_agent, generate_samples, publish_samples
+
+ARGUMENTS = {"data_window": 5, "no_required_data": 3, "open_damper_time": 1}
+
+
+class TestReplay(unittest.TestCase):
+    """
+    Contains the tests for the offline replay command
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.columns = generate_samples(600, 5)
+        self.agent = build_agent(ARGUMENTS)
+        self.history = os.path.join(self.directory.name, "history.csv")
+        with open(self.history, "w", newline="") as history:
+            writer = csv.writer(history)
+            writer.writerow(["Timestamp"] + POINTS)
+            for row in range(len(self.columns[0])):
+                timestamp = datetime.fromtimestamp(int(self.columns[0][row]), timezone.utc).replace(tzinfo=None)
+                writer.writerow([timestamp.isoformat()] + [repr(float(column[row])) for column in self.columns[1:]])
+        self.config = os.path.join(self.directory.name, "config")
+        with open(self.config, "w") as config:
+            json.dump(self.agent.config, config)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_config(self, arguments):
+        self.agent = build_agent(dict(ARGUMENTS, **arguments))
+        with open(self.config, "w") as config:
+            json.dump(self.agent.config, config)
+
+    def run_replay(self, engine):
+        output = os.path.join(self.directory.name, engine + ".csv")
+        status = replay.main([self.history, "--config", self.config, "--output", output, "--engine", engine])
+        assert status == 0
+        with open(output, newline="") as results:
+            reader = csv.reader(results)
+            assert next(reader) == ["timestamp", "topic", "result"]
+            return [tuple(row) for row in reader]
+
+    def expected(self):
+        published = publish_samples(self.agent, self.columns)
+        return [(date, topic, str(message)) for topic, date, message in published]
+
+    def test_device_engine_matches_agent(self):
+        """test replaying the history through the device pipeline against the agent"""
+        expected = self.expected()
+        assert expected
+        assert self.run_replay("device") == expected
+
+    def test_batch_engine_matches_agent(self):
+        """test replaying the history through the batch engine against the agent"""
+        assert self.run_replay("batch") == self.expected()
+
+    def test_consolidated_results_match_agent(self):
+        """test that the replay follows the consolidated results and index fan-out settings"""
+        self.write_config({"consolidated_results": True, "result_fanout": "index"})
+        expected = self.expected()
+        assert expected
+        assert self.run_replay("device") == expected
+        assert self.run_replay("batch") == expected
+
+    def test_staggered_windows_match_agent(self):
+        """test that both engines shift the window boundaries as the agent does with stagger_windows"""
+        self.write_config({"stagger_windows": True})
+        assert self.agent.devices["devices/campus/building/rtu4/all"].window_offset
+        expected = self.expected()
+        assert expected != publish_samples(build_agent(ARGUMENTS), self.columns)
+        assert self.run_replay("device") == expected
+        assert self.run_replay("batch") == expected
+
+    def test_replay_command_does_not_import_volttron(self):
+        """test that the replay subcommand of the script runs without importing VOLTTRON"""
+        output = os.path.join(self.directory.name, "results.csv")
+        argv = ["volttron-economizer-rcx", "replay", self.history, "--config", self.config, "--output", output]
+        code = "; ".join(["import sys", "from economizer import cli", "sys.argv = {!r}".format(argv),
+                          "status = cli.main()",
+                          "print(status, sorted(name for name in sys.modules if name.split('.')[0] == 'volttron'))"])
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert result.stdout.splitlines()[-1] == "0 []"
+        assert os.path.exists(output)
+
+    def test_epoch_seconds_naive_is_utc(self):
+        """test that history timestamps without a timezone are read as UTC"""
+        assert replay.epoch_seconds(["2023-01-01T00:00:00", "2023-01-01T01:00:00-05:00"]) == [1672531200.0,
+                                                                                           1672552800.0]
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import json
+import unittest
+
+from datetime import datetime, timedelta as td, timezone
+
+from economizer import constants
+from economizer.diagnostics.EconCorrectlyOn import EconCorrectlyOn
+
+from economizer_helpers import POINTS, build_agent, generate_samples
+
+
+class TestResultRecord(unittest.TestCase):
+    """
+    Contains the tests for the result records
+    """
+
+    def test_record(self):
+        """test the table, date and the payload serialized at publish time"""
+        timestamp = datetime(2023, 1, 1, 12, tzinfo=timezone.utc)
+        record = constants.table_publish_format("analysis", timestamp, constants.ECON2, constants.EI, {"low": 1.5})
+        assert record.table == "Not Economizing When Unit Should Dx/energy impact"
+        assert record.date == "2023-01-01 12:00:00+00:00"
+        assert json.loads(record.payload()) == {"low": 1.5}
+        assert record.decoded() == {"low": 1.5}
+        assert record.device is None
+
+    def test_constant_payloads_encoded_once(self):
+        """test that the constant payloads are serialized when the diagnostic is configured"""
+        econ = EconCorrectlyOn()
+        econ.set_class_values("analysis", [], td(minutes=30), 15, 20.0, 80.0, 6000.0, 10.0)
+        assert isinstance(econ.insufficient_data, constants.EncodedPayload)
+        assert econ.insufficient_data.text == '{"low": 13.2, "normal": 13.2, "high": 13.2}'
+        assert str(econ.insufficient_data) == str({"low": 13.2, "normal": 13.2, "high": 13.2})
+        econ.run_diagnostic(datetime(2023, 1, 1, tzinfo=timezone.utc))
+        record = econ.results_publish[0]
+        assert record.values is econ.not_cooling_dict
+        assert record.payload() is econ.not_cooling_dict.text
+
+    def test_device_records(self):
+        """test that the device stamps its records and reuses the pre condition payloads"""
+        agent = build_agent({"data_window": 5, "no_required_data": 3})
+        topic = "devices/campus/building/rtu4/all"
+        device = agent.devices[topic]
+        columns = generate_samples(300, 12)
+        records = []
+        for row in range(300):
+            message = {point: float(column[row]) for point, column in zip(POINTS, columns[1:])}
+            device.new_data_message(datetime.fromtimestamp(int(columns[0][row]), timezone.utc), [message])
+            records.extend(device.results_publish)
+            device.results_publish.clear()
+        assert records
+        assert all(record.device == topic for record in records)
+        pre_conditions = [record for record in records if isinstance(record.values, constants.EncodedPayload)
+                          and isinstance(record.values.value, str)]
+        assert pre_conditions
+        payloads = {id(payload) for payload in device.pre_condition_payloads.values()}
+        assert {id(record.values) for record in pre_conditions} <= payloads
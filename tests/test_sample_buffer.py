@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import unittest
+
+from datetime import datetime, timedelta as td
+
+from economizer.diagnostics.SampleBuffer import MICROSECONDS, BufferedDiagnostic, SampleBuffer
+from economizer.timestamps import LocalClock
+
+
+class TestSampleBuffer(unittest.TestCase):
+    """
+    Contains the tests for the shared sample buffer
+    """
+
+    def test_rows_are_shared(self):
+        """test that diagnostics sharing a buffer read the same stored sample"""
+        buffer = SampleBuffer()
+        first = BufferedDiagnostic(buffer)
+        second = BufferedDiagnostic(buffer)
+        row = buffer.append(datetime.fromtimestamp(60), 70.0, 75.0, 72.0, 20.0, 0.5)
+        first.accept(row)
+        second.accept(row)
+        assert len(buffer) == 1
+        assert first.mat_values.tolist() == second.mat_values.tolist() == [72.0]
+        assert second.fan_spd_values.tolist() == [0.5]
+
+    def test_unreferenced_rows_are_reused(self):
+        """test that the buffer reuses released rows instead of growing"""
+        buffer = SampleBuffer(capacity=4)
+        diagnostic = BufferedDiagnostic(buffer)
+        for minute in range(10):
+            diagnostic.accept(buffer.append(datetime.fromtimestamp(60 * minute), minute, 0.0, 0.0, 0.0))
+            if minute % 2:
+                diagnostic.clear_rows()
+        assert buffer.capacity == 4
+        assert len(buffer) <= 4
+
+    def test_grow_keeps_retained_rows(self):
+        """test that growing the buffer keeps the accepted samples in order"""
+        buffer = SampleBuffer(capacity=4)
+        diagnostic = BufferedDiagnostic(buffer)
+        for minute in range(10):
+            diagnostic.accept(buffer.append(datetime.fromtimestamp(60 * minute), minute, 0.0, 0.0, 0.0))
+        assert buffer.capacity == 16
+        assert diagnostic.oat_values.tolist() == list(range(10))
+        assert diagnostic.first_time() == datetime.fromtimestamp(0)
+        assert diagnostic.last_time() == datetime.fromtimestamp(540)
+
+    def test_features_are_derived_once(self):
+        """test that the derived features match the per-sample formulas and survive a wrap and a grow"""
+        buffer = SampleBuffer(capacity=4)
+        buffer.set_desired_oaf(0.1)
+        diagnostic = BufferedDiagnostic(buffer)
+        samples = [(60.0 + minute, 75.0, 70.0 - minute) for minute in range(6)]
+        for minute, (oat, rat, mat) in enumerate(samples):
+            diagnostic.accept(buffer.append(datetime.fromtimestamp(60 * minute), oat, rat, mat, 0.0))
+            assert diagnostic.oa_ma_values.tolist() == [o - m for o, _, m in samples[:minute + 1]]
+        assert buffer.derived == buffer.end
+        assert diagnostic.ra_ma_values.tolist() == [r - m for _, r, m in samples]
+        assert diagnostic.oaf_values.tolist() == [(m - r) / (o - r) for o, r, m in samples]
+        assert diagnostic.mixed_air_delta_values(0.1).tolist() == [m - (o * 0.1 + r * 0.9) for o, r, m in samples]
+        buffer.set_desired_oaf(0.2)
+        assert diagnostic.mixed_air_delta_values(0.2).tolist() == [m - (o * 0.2 + r * 0.8) for o, r, m in samples]
+
+    def test_zero_oaf_denominator(self):
+        """test that a sample with OAT equal to RAT is guarded when derived and raises when averaged"""
+        buffer = SampleBuffer()
+        diagnostic = BufferedDiagnostic(buffer)
+        diagnostic.accept(buffer.append(datetime.fromtimestamp(60), 70.0, 70.0, 72.0, 0.0))
+        assert buffer.column("oa_ra", diagnostic.rows).tolist() == [0.0]
+        with self.assertRaises(ZeroDivisionError):
+            diagnostic.oaf_values
+
+    def test_times_are_epoch_microseconds(self):
+        """test that sample times are stored as integers and converted back to the same local time"""
+        buffer = SampleBuffer()
+        buffer.clock = LocalClock("US/Pacific")
+        diagnostic = BufferedDiagnostic(buffer)
+        # the window spans the end of daylight saving time
+        first = buffer.clock.local_time(1667721600.25)
+        last = buffer.clock.local_time(1667721600.25 + 7200)
+        for cur_time in (first, last):
+            diagnostic.accept(buffer.append(cur_time, 70.0, 75.0, 72.0, 0.0))
+        assert buffer.timestamp.dtype.kind == "i"
+        assert diagnostic.timestamp == [1667721600250000, 1667728800250000]
+        assert diagnostic.elapsed_time() == 2 * 3600 * MICROSECONDS
+        assert (diagnostic.first_time(), diagnostic.last_time()) == (first, last)
+        assert str(diagnostic.first_time()) == str(first) and str(diagnostic.last_time()) == str(last)
+        assert last - first == td(hours=2)
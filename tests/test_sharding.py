@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import time
+import unittest
+
+from datetime import datetime, timezone
+
+from economizer import sharding
+from economizer.sharding import shard_index
+
+from economizer_helpers import POINTS, build_agent, generate_samples, publish_samples
+
+ARGUMENTS = {"data_window": 5, "no_required_data": 3, "open_damper_time": 1}
+DEVICE = {
+    "campus": "campus",
+    "building": "building",
+    "unit": {"rtu{}".format(unit): {"subdevices": []} for unit in range(4)}
+}
+
+
+def publish_all(agent, samples):
+    """Publish the same samples for every unit, interleaved"""
+    for row in range(len(samples[0])):
+        for unit in range(4):
+            publish_samples(agent, [column[row:row + 1] for column in samples],
+                            "devices/campus/building/rtu{}/all".format(unit))
+    return agent.vip.pubsub.published
+
+
+class TestSharding(unittest.TestCase):
+    """
+    Contains the tests for sharding devices across worker processes
+    """
+
+    def test_shard_index(self):
+        """test that the shard of a topic does not depend on the process"""
+        assert shard_index("devices/campus/building/rtu0/all", 4) == shard_index("devices/campus/building/rtu0/all", 4)
+        assert {shard_index("devices/campus/building/rtu{}/all".format(unit), 3) for unit in range(30)} == {0, 1, 2}
+
+    def test_workers_match_agent(self):
+        """test that sharded processing publishes the same results per device as the agent"""
+        samples = generate_samples(200, 13)
+        expected = publish_all(build_agent(ARGUMENTS, DEVICE), samples)
+
+        agent = build_agent(dict(ARGUMENTS, worker_processes=2, shard_batch_size=16), DEVICE)
+        try:
+            assert agent.devices == {}
+            publish_all(agent, samples)
+            assert agent.shard_pool.samples == 800
+            agent.service_shards()
+            agent.publish_publishes(agent.shard_pool.collect(wait=True))
+            agent.publish_queue.flush()
+            published = agent.vip.pubsub.published
+            for unit in range(4):
+                unit_path = "/campus/building/rtu{}/".format(unit)
+                assert [result for result in published if unit_path in result[0]] == \
+                       [result for result in expected if unit_path in result[0]]
+            assert len(published) == len(expected)
+            metrics = agent.get_metrics()
+            assert sorted(metrics) == sorted(agent.device_publish)
+            assert all(device["counters"]["messages"] == 200 for device in metrics.values())
+        finally:
+            agent.shard_pool.shutdown()
+
+    def test_workers_snapshot(self):
+        """test that the windows captured from the workers can be restored in the agent"""
+        samples = generate_samples(7, 14)
+        expected = build_agent(ARGUMENTS, DEVICE)
+        publish_all(expected, samples)
+
+        agent = build_agent(dict(ARGUMENTS, worker_processes=2), DEVICE)
+        try:
+            publish_all(agent, samples)
+            states = agent.capture_states()
+            assert agent.restore_states(states) == 4
+        finally:
+            agent.shard_pool.shutdown()
+        restored = build_agent(ARGUMENTS, DEVICE)
+        assert restored.restore_states(states) == 4
+        for topic, device in expected.devices.items():
+            assert restored.devices[topic].temp_sensor.timestamp == device.temp_sensor.timestamp
+            assert restored.devices[topic].window_start == device.window_start
+
+    def test_workers_expire_windows_in_order(self):
+        """test that expired windows are closed without waiting and published after the earlier batches"""
+        samples = generate_samples(7, 15)
+        expected = build_agent(ARGUMENTS, DEVICE)
+        publish_all(expected, samples)
+        expected.close_expired_windows(time.time() + 3600)
+        expected.publish_queue.flush()
+
+        agent = build_agent(dict(ARGUMENTS, worker_processes=2, shard_batch_size=4), DEVICE)
+        try:
+            publish_all(agent, samples)
+            assert agent.shard_pool.close_expired_windows(time.time() + 3600) is None
+            agent.publish_publishes(agent.shard_pool.collect(wait=True))
+            agent.publish_queue.flush()
+            assert agent.shard_pool.pending_batches() == 0
+        finally:
+            agent.shard_pool.shutdown()
+        published = agent.vip.pubsub.published
+        for unit in range(4):
+            unit_path = "/campus/building/rtu{}/".format(unit)
+            assert [(topic, message) for topic, _, message in published if unit_path in topic] == \
+                   [(topic, message) for topic, _, message in expected.vip.pubsub.published if unit_path in topic]
+
+    def test_bad_sample_is_skipped(self):
+        """test that a sample failing in a worker does not lose the rest of its batch"""
+        samples = generate_samples(7, 16)
+        expected = build_agent(ARGUMENTS, DEVICE)
+        publish_all(expected, samples)
+        expected.publish_queue.flush()
+
+        agent = build_agent(ARGUMENTS, DEVICE)
+        sharding.init_worker(agent.config, agent.device_publish)
+        batch = []
+        for row in range(len(samples[0])):
+            message = {point: float(column[row]) for point, column in zip(POINTS, samples[1:])}
+            date = datetime.fromtimestamp(int(samples[0][row]), timezone.utc).isoformat()
+            for unit in range(4):
+                batch.append(("devices/campus/building/rtu{}/all".format(unit), date, [message]))
+            if row == 3:
+                batch.append(("devices/campus/building/rtu0/all", "not a date", [message]))
+        publishes = sharding.process_batch(batch)
+        assert [(topic, message) for topic, _, message in publishes] == \
+               [(topic, message) for topic, _, message in expected.vip.pubsub.published]
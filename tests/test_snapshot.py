@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from gevent.event import AsyncResult
+
+from economizer import snapshot
+
+from economizer_helpers import build_agent, generate_samples, publish_samples
+
+ARGUMENTS = {"data_window": 15, "no_required_data": 5, "open_damper_time": 1}
+TOPIC = "devices/campus/building/rtu4/all"
+
+
+def split(columns, row):
+    return [column[:row] for column in columns], [column[row:] for column in columns]
+
+
+class TestSnapshot(unittest.TestCase):
+    """
+    Contains the tests for resuming device windows from a snapshot
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "state", "economizer.npz")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_resumes(self, arguments, seed):
+        columns = generate_samples(600, seed)
+        expected = publish_samples(build_agent(arguments), columns)
+        # stop part way through a window
+        first, second = split(columns, 307)
+        arguments = dict(arguments, snapshot_path=self.path)
+        agent = build_agent(arguments)
+        published = list(publish_samples(agent, first))
+        device = agent.devices[TOPIC]
+        assert device.window_start is not None and device.temp_sensor.sample_count()
+        agent.write_snapshot(wait=True)
+
+        restarted = build_agent(arguments)
+        restarted.read_snapshot()
+        published += publish_samples(restarted, second)
+        assert expected
+        assert published == expected
+
+    def test_resume_window(self):
+        """test that a restarted agent continues the saved windows as if it never stopped"""
+        self.assert_resumes(ARGUMENTS, seed=1)
+
+    def test_resume_window_statistics(self):
+        """test resuming the windows of diagnostics keeping running statistics"""
+        self.assert_resumes(dict(ARGUMENTS, window_statistics=True), seed=2)
+
+    def test_cold_start_differs(self):
+        """test that without the snapshot the restart loses the open windows"""
+        columns = generate_samples(600, 1)
+        expected = publish_samples(build_agent(ARGUMENTS), columns)
+        first, second = split(columns, 307)
+        published = list(publish_samples(build_agent(ARGUMENTS), first))
+        published += publish_samples(build_agent(ARGUMENTS), second)
+        assert published != expected
+
+    def test_snapshot_is_arrays(self):
+        """test that the snapshot is written without pickled objects"""
+        agent = build_agent(dict(ARGUMENTS, snapshot_path=self.path))
+        publish_samples(agent, generate_samples(100, 3))
+        agent.write_snapshot()
+        agent.snapshot_write.get()
+        with np.load(self.path, allow_pickle=False) as snapshot_file:
+            for name in snapshot_file.files:
+                assert snapshot_file[name].dtype != object
+        assert list(snapshot.load_snapshot(self.path)) == [TOPIC]
+        assert not os.path.exists(self.path + ".partial")
+
+    def test_snapshot_skipped_while_writing(self):
+        """test that a periodic snapshot is skipped while the previous file is still being written"""
+        agent = build_agent(dict(ARGUMENTS, snapshot_path=self.path))
+        publish_samples(agent, generate_samples(100, 3))
+        writing = AsyncResult()
+        agent.snapshot_write = writing
+        agent.write_snapshot()
+        assert agent.snapshot_write is writing
+        assert not os.path.exists(self.path)
+        writing.set(None)
+        agent.write_snapshot()
+        agent.snapshot_write.get()
+        assert list(snapshot.load_snapshot(self.path)) == [TOPIC]
+
+    def test_damaged_snapshot_ignored(self):
+        """test that a truncated snapshot or one missing an array is discarded"""
+        agent = build_agent(dict(ARGUMENTS, snapshot_path=self.path))
+        publish_samples(agent, generate_samples(100, 3))
+        state = snapshot.capture_device(agent.devices[TOPIC])
+        snapshot.save_snapshot(self.path, {TOPIC: state})
+        with open(self.path, "rb") as snapshot_file:
+            content = snapshot_file.read()
+        with open(self.path, "wb") as snapshot_file:
+            snapshot_file.write(content[:len(content) // 2])
+        assert snapshot.load_snapshot(self.path) == {}
+        restarted = build_agent(dict(ARGUMENTS, snapshot_path=self.path))
+        restarted.read_snapshot()
+        assert restarted.devices[TOPIC].window_start is None
+
+        del state["flags"]
+        snapshot.save_snapshot(self.path, {TOPIC: state})
+        assert snapshot.load_snapshot(self.path) == {}
+        snapshot.write_arrays(self.path, {"version": np.array([snapshot.SNAPSHOT_VERSION])})
+        assert snapshot.load_snapshot(self.path) == {}
+
+    def test_old_snapshot_ignored(self):
+        """test that a snapshot older than max_age is not loaded"""
+        agent = build_agent(ARGUMENTS)
+        publish_samples(agent, generate_samples(100, 3))
+        snapshot.save_snapshot(self.path, {TOPIC: snapshot.capture_device(agent.devices[TOPIC])})
+        assert snapshot.load_snapshot(self.path, max_age=3600.0)
+        old = os.path.getmtime(self.path)
+        os.utime(self.path, (old, old))
+        assert snapshot.load_snapshot(self.path, max_age=-1.0) == {}
+        assert snapshot.load_snapshot(os.path.join(self.directory.name, "missing.npz")) == {}
+
+    def test_statistics_mode_mismatch(self):
+        """test that a state captured in the other window mode is not restored"""
+        agent = build_agent(ARGUMENTS)
+        publish_samples(agent, generate_samples(100, 3))
+        state = snapshot.capture_device(agent.devices[TOPIC])
+        statistics_agent = build_agent(dict(ARGUMENTS, window_statistics=True))
+        assert not snapshot.restore_device(statistics_agent.devices[TOPIC], state)
+        assert statistics_agent.restore_states({TOPIC: state}) == 0
+        assert build_agent(ARGUMENTS).restore_states({TOPIC: state}) == 1
+
+    def test_buffer_restored_across_capacity(self):
+        """test restoring more retained rows than the capacity of the new buffer"""
+        agent = build_agent(ARGUMENTS)
+        publish_samples(agent, generate_samples(307, 1))
+        device = agent.devices[TOPIC]
+        restored = build_agent(ARGUMENTS).devices[TOPIC]
+        restored.buffer.capacity = 2
+        assert snapshot.restore_device(restored, snapshot.capture_device(device))
+        assert len(restored.buffer) == len(device.buffer) > 2
+        assert restored.buffer.capacity >= len(restored.buffer)
+        assert restored.temp_sensor.timestamp == device.temp_sensor.timestamp
+        assert np.array_equal(restored.temp_sensor.mat_values, device.temp_sensor.mat_values)
+        assert restored.unit_status == device.unit_status
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import unittest
+
+from datetime import datetime, timedelta as td, timezone
+
+import dateutil.tz
+from dateutil import parser
+
+from economizer.timestamps import LocalClock, parse_timestamp
+
+
+class TestTimestamps(unittest.TestCase):
+    """
+    Contains the tests for the header Date fast path
+    """
+
+    def test_parse_timestamp(self):
+        """test the ISO-8601 fast path and the dateutil fallback"""
+        expected = datetime(2023, 1, 1, 8, tzinfo=timezone.utc)
+        assert parse_timestamp("2023-01-01T08:00:00.000000+00:00") == expected
+        assert parse_timestamp("2023-01-01T08:00:00Z") == expected
+        assert parse_timestamp("Sun, 01 Jan 2023 08:00:00 GMT") == expected
+
+    def test_local_time_matches_dateutil(self):
+        """test the cached conversion against dateutil across a daylight saving change"""
+        clock = LocalClock("US/Pacific")
+        zone = dateutil.tz.gettz("US/Pacific")
+        start = datetime(2023, 3, 12, 8, tzinfo=timezone.utc)
+        for minute in range(0, 6 * 60, 7):
+            header = (start + td(minutes=minute)).isoformat()
+            local, epoch = clock.parse(header)
+            expected = parser.parse(header).astimezone(zone)
+            assert str(local) == str(expected)
+            assert local.minute == expected.minute
+            assert epoch == expected.timestamp()
+
+    def test_local_time_transition_within_hour(self):
+        """test a daylight saving change that falls on the half hour"""
+        clock = LocalClock("America/St_Johns")
+        zone = dateutil.tz.gettz("America/St_Johns")
+        start = datetime(2023, 3, 12, 5, tzinfo=timezone.utc)
+        for minute in range(0, 2 * 60, 5):
+            header = (start + td(minutes=minute)).isoformat()
+            local, epoch = clock.parse(header)
+            expected = parser.parse(header).astimezone(zone)
+            assert str(local) == str(expected)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import unittest
+
+from economizer.wheel import TimerWheel, topic_offset
+
+from economizer_helpers import build_agent, generate_samples, publish_samples
+
+ARGUMENTS = {"data_window": 15, "no_required_data": 5, "open_damper_time": 1}
+DEVICE = {
+    "campus": "campus",
+    "building": "building",
+    "unit": {"rtu{}".format(unit): {"subdevices": []} for unit in range(6)}
+}
+
+
+def unit_topic(unit):
+    return "devices/campus/building/rtu{}/all".format(unit)
+
+
+class TestTimerWheel(unittest.TestCase):
+    """
+    Contains the tests for the timer wheel
+    """
+
+    def test_topic_offset(self):
+        """test that the offsets are deterministic and cover the range"""
+        assert topic_offset(unit_topic(0), 15) == topic_offset(unit_topic(0), 15)
+        assert {topic_offset(unit_topic(unit), 4) for unit in range(40)} == {0, 1, 2, 3}
+        assert topic_offset(unit_topic(0), 0) == 0
+
+    def test_items_wait_for_their_slot(self):
+        """test that an item is returned when the wheel reaches the slot of its topic"""
+        wheel = TimerWheel(slots=10)
+        wheel.schedule(unit_topic(0), "rtu0")
+        slot = topic_offset(unit_topic(0), 10)
+        ticks = [wheel.tick() for _ in range(10)]
+        assert ticks[slot] == ["rtu0"]
+        assert sum(len(due) for due in ticks) == 1
+        assert len(wheel) == 0
+
+    def test_limit_carries_backlog(self):
+        """test that at most limit items are taken per tick and the rest follow on the next ticks"""
+        wheel = TimerWheel(slots=1, limit=2)
+        for item in range(5):
+            wheel.schedule(unit_topic(item), item)
+        assert wheel.tick() == [0, 1]
+        wheel.schedule(unit_topic(5), 5)
+        assert wheel.tick() == [2, 3]
+        assert wheel.tick() == [4, 5]
+        assert wheel.tick() == []
+        assert wheel.metrics() == {"pending": 0, "backlog": 0, "max_backlog": 3, "scheduled": 6, "evaluated": 6}
+
+    def test_topic_queued_once(self):
+        """test that a topic already waiting on the wheel is not queued again"""
+        wheel = TimerWheel(slots=4)
+        assert wheel.schedule("device", 1)
+        assert not wheel.schedule("device", 2)
+        assert len(wheel) == 1
+        assert sum((wheel.tick() for _ in range(4)), []) == [1]
+        assert wheel.schedule("device", 3)
+
+    def test_drain(self):
+        """test that drain returns every queued item"""
+        wheel = TimerWheel(slots=8, limit=1)
+        for unit in range(6):
+            wheel.schedule(unit_topic(unit), unit)
+        assert sorted(wheel.drain()) == list(range(6))
+        assert len(wheel) == 0
+
+
+class TestStaggeredWindows(unittest.TestCase):
+    """
+    Contains the tests for spreading the window evaluations of the devices
+    """
+
+    def test_staggered_boundaries(self):
+        """test that every device closes its windows on the minute of its offset"""
+        agent = build_agent(dict(ARGUMENTS, stagger_windows=True), DEVICE)
+        offsets = {device.window_offset for device in agent.devices.values()}
+        assert len(offsets) > 1
+        assert all(0 <= offset < 15 for offset in offsets)
+        samples = generate_samples(20, 21)
+        samples[1][:] = 60.0
+        samples[2][:] = 72.0
+        samples[3][:] = 68.0
+        samples[6][:] = 1.0
+        for unit in range(6):
+            device = agent.devices[unit_topic(unit)]
+            offset = device.window_offset or 15
+            # the samples start on minute 0 of the hour
+            publish_samples(agent, [column[1:offset] for column in samples], unit_topic(unit))
+            assert "windows" not in device.metrics.counters
+            publish_samples(agent, [column[offset:offset + 1] for column in samples], unit_topic(unit))
+            assert device.metrics.counters["windows"] == 1
+        agent = build_agent(ARGUMENTS, DEVICE)
+        assert {device.window_offset for device in agent.devices.values()} == {0}
+
+    def test_wheel_matches_inline(self):
+        """test that windows evaluated on the wheel publish the same results as closing them inline"""
+        samples = generate_samples(400, 22)
+        arguments = dict(ARGUMENTS, stagger_windows=True)
+        expected = build_agent(arguments, DEVICE)
+        agent = build_agent(dict(arguments, evaluation_limit=2, evaluation_tick=6.0), DEVICE)
+        assert len(agent.wheel.slots) == 10
+        for row in range(400):
+            for unit in range(6):
+                sample = [column[row:row + 1] for column in samples]
+                publish_samples(expected, sample, unit_topic(unit))
+                publish_samples(agent, sample, unit_topic(unit))
+            agent.evaluate_windows()
+        assert agent.wheel.metrics()["scheduled"] > 0
+        # windows still due on the wheel are closed when it is replaced
+        agent.setup_wheel()
+        agent.publish_queue.flush()
+        for unit in range(6):
+            unit_path = "/rtu{}/".format(unit)
+            assert [result for result in agent.vip.pubsub.published if unit_path in result[0]] == \
+                   [result for result in expected.vip.pubsub.published if unit_path in result[0]]
+        assert len(agent.vip.pubsub.published) == len(expected.vip.pubsub.published)
+
+    def test_wheel_matches_direct_random(self):
+        """test over random samples that the wheel publishes exactly what evaluating every window directly does"""
+        for seed in range(50, 53):
+            samples = generate_samples(180, seed)
+            arguments = dict(ARGUMENTS, data_window=30)
+            expected = build_agent(arguments, DEVICE)
+            agent = build_agent(dict(arguments, evaluation_limit=3, evaluation_tick=2.0), DEVICE)
+            for row in range(180):
+                for unit in range(6):
+                    sample = [column[row:row + 1] for column in samples]
+                    publish_samples(expected, sample, unit_topic(unit))
+                    publish_samples(agent, sample, unit_topic(unit))
+                agent.evaluate_windows()
+            assert agent.wheel.metrics()["scheduled"] > 0
+            agent.setup_wheel()
+            agent.publish_queue.flush()
+            assert sorted(agent.vip.pubsub.published) == sorted(expected.vip.pubsub.published)
+
+    def test_limit_defers_evaluations(self):
+        """test that due windows wait on the wheel until their turn"""
+        agent = build_agent(dict(ARGUMENTS, evaluation_limit=1, evaluation_tick=60.0), DEVICE)
+        samples = generate_samples(16, 23)
+        samples[1][:] = 60.0
+        samples[2][:] = 72.0
+        samples[3][:] = 68.0
+        samples[6][:] = 1.0
+        for unit in range(6):
+            publish_samples(agent, samples, unit_topic(unit))
+        due = [device for device in agent.devices.values() if device.close_due is not None]
+        assert len(due) == 6
+        assert agent.get_wheel_metrics()["pending"] == 6
+        published = len(agent.vip.pubsub.published)
+        agent.evaluate_windows()
+        agent.publish_queue.flush()
+        assert len(agent.vip.pubsub.published) > published
+        assert sum(device.close_due is None for device in agent.devices.values()) == 1
+        assert agent.get_wheel_metrics()["backlog"] == 5
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import json
+import unittest
+
+from datetime import datetime, timedelta as td
+
+from economizer import constants
+from economizer.diagnostics.EconCorrectlyOff import EconCorrectlyOff
+from economizer.diagnostics.SampleBuffer import MICROSECONDS, SampleBuffer
+from economizer.diagnostics.WindowStatistics import WindowStatistics
+
+from economizer_helpers import build_agent, generate_samples, publish_samples
+
+
+class TestWindowStatistics(unittest.TestCase):
+    """
+    Contains the tests for the statistics window mode
+    """
+
+    def test_energy_matches_row_mode(self):
+        """test the accumulated energy impact against the row based calculation"""
+        rows = EconCorrectlyOff()
+        stats = EconCorrectlyOff()
+        for econ in (rows, stats):
+            econ.set_class_values("test", [], td(minutes=1), 1, 20.0, 10.0, 6000.0, 10.0)
+        stats.use_statistics(WindowStatistics(6000.0, 10.0, 0.1))
+        samples = [(60.0, 72.0, 65.0, 30.0, 0.5), (70.0, 71.0, 74.0, 40.0, 1.0), (55.0, 70.0, 62.0, 25.0, 0.75)]
+        for minute, (oat, rat, mat, oad, spd) in enumerate(samples):
+            for econ in (rows, stats):
+                econ.accept(econ.buffer.append(datetime.fromtimestamp(60 * minute), oat, rat, mat, oad, spd))
+        assert stats.sample_count() == 3
+        assert len(stats.rows) == 0
+        assert stats.first_time() == rows.first_time()
+        assert stats.last_time() == rows.last_time()
+        assert abs(stats.energy_impact_calculation(0.1) - rows.energy_impact_calculation(0.1)) < 0.01
+
+    def test_zero_oaf_denominator(self):
+        """test that the mean OAF fails like the row based calculation"""
+        statistics = WindowStatistics()
+        statistics.add(60 * MICROSECONDS, 50.0, 50.0, 25.0, 100.0)
+        with self.assertRaises(ZeroDivisionError):
+            statistics.mean_oaf()
+        statistics.clear()
+        statistics.add(60 * MICROSECONDS, 80.0, 70.0, 72.0, 100.0)
+        assert statistics.mean_oaf() == 0.2
+
+    def test_agent_results_match_row_mode(self):
+        """test that statistics mode publishes the same diagnostics with bounded memory"""
+        arguments = {"data_window": 30, "no_required_data": 10, "open_damper_time": 0}
+        columns = generate_samples(1500, 5)
+        expected = publish_samples(build_agent(arguments), columns)
+        agent = build_agent(dict(arguments, window_statistics=True))
+        published = publish_samples(agent, columns)
+        assert len(published) == len(expected)
+        for (topic, date, message), (expected_topic, expected_date, expected_message) in zip(published, expected):
+            assert (topic, date) == (expected_topic, expected_date)
+            message, expected_message = json.loads(message), json.loads(expected_message)
+            if topic.endswith(constants.EI):
+                for sensitivity, value in expected_message.items():
+                    assert abs(message[sensitivity] - value) <= 0.011
+            else:
+                assert message == expected_message
+        assert agent.devices["devices/campus/building/rtu4/all"].buffer.capacity == SampleBuffer().capacity
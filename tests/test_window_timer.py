@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import unittest
+
+import numpy as np
+
+from economizer import constants
+
+from economizer_helpers import build_agent, generate_samples, publish_samples
+
+ARGUMENTS = {"data_window": 15, "no_required_data": 5, "open_damper_time": 1}
+TOPIC = "devices/campus/building/rtu4/all"
+
+
+def healthy_samples(size, start_minute=1):
+    """Samples that pass every precondition, starting a few minutes past the hour"""
+    columns = generate_samples(size, 8)
+    columns[0] = columns[0] + 60 * start_minute
+    columns[1][:] = 60.0
+    columns[2][:] = 72.0
+    columns[3][:] = 68.0
+    columns[6][:] = 1.0
+    return columns
+
+
+class TestExpiredWindows(unittest.TestCase):
+    """
+    Contains the tests for closing the windows of devices that stop publishing
+    """
+
+    def test_window_closes_after_deadline(self):
+        """test that an open window is closed once it is past data_window"""
+        agent = build_agent(ARGUMENTS)
+        publish_samples(agent, healthy_samples(8))
+        device = agent.devices[TOPIC]
+        published = len(agent.vip.pubsub.published)
+        assert device.window_start is not None
+        deadline = device.window_deadline()
+        # data_window and one scrape interval after the last message
+        assert deadline == device.last_arrival + 900 + 60
+        assert not device.close_expired_window(deadline)
+        agent.close_expired_windows(deadline - 1)
+        assert device.window_start is not None
+
+        agent.close_expired_windows(deadline + 30)
+        agent.publish_queue.flush()
+        results = agent.vip.pubsub.published[published:]
+        assert results
+        # timestamped with the last sample, or the device time of the deadline check
+        last_sample = agent.clock.local_time(device.last_epoch)
+        checked = agent.clock.local_time(device.last_epoch + deadline + 30 - device.last_arrival)
+        assert {date for _, date, _ in results} <= {str(last_sample), str(checked)}
+        assert device.window_start is None and device.window_opened() is None
+        assert not device.temp_sensor.sample_count() and len(device.buffer) == 0
+        assert device.metrics.counters["expired_windows"] == 1
+        assert not device.close_expired_window(deadline + 60)
+
+    def test_insufficient_data_on_time(self):
+        """test that a short window reports insufficient data when its deadline passes"""
+        agent = build_agent(ARGUMENTS)
+        publish_samples(agent, healthy_samples(2))
+        device = agent.devices[TOPIC]
+        assert device.close_expired_window(device.window_deadline() + 1)
+        tables = [record.values for record in device.results_publish]
+        assert device.temp_sensor.insufficient_data in tables
+
+    def test_precondition_window(self):
+        """test that a window holding only failed preconditions reports them when it expires"""
+        agent = build_agent(ARGUMENTS)
+        columns = healthy_samples(3)
+        columns[6][:] = 0.0
+        publish_samples(agent, columns)
+        device = agent.devices[TOPIC]
+        assert device.window_start is None and device.unit_status.count == 3
+        assert device.window_opened() == device.unit_status.first
+        assert device.close_expired_window(device.window_deadline() + 1)
+        payload = device.pre_condition_payloads[constants.FAN_OFF]
+        assert [record.values for record in device.results_publish] == [payload] * len(constants.DX_LIST)
+        assert not device.unit_status
+
+    def test_publishing_device_not_closed(self):
+        """test that the check never closes the window of a device publishing on schedule"""
+        columns = healthy_samples(120)
+        # every 4 minutes, so windows close on elapsed time as well as on the boundary
+        columns[0] = columns[0][0] + 4 * (columns[0] - columns[0][0])
+        expected = publish_samples(build_agent(ARGUMENTS), columns)
+        agent = build_agent(ARGUMENTS)
+        device = agent.devices[TOPIC]
+        for row in range(len(columns[0])):
+            if row:
+                # checked right before the next message arrives, on the device clock
+                agent.close_expired_windows(float(columns[0][row]))
+            publish_samples(agent, [column[row:row + 1] for column in columns])
+            device.last_arrival = float(columns[0][row])
+        assert "expired_windows" not in device.metrics.counters
+        assert agent.vip.pubsub.published == expected
+
+    def test_stopped_device_closed(self):
+        """test that the window of a device is closed once it misses its messages for data_window"""
+        agent = build_agent(ARGUMENTS)
+        publish_samples(agent, healthy_samples(8))
+        device = agent.devices[TOPIC]
+        assert not device.close_expired_window(device.last_arrival + 900)
+        assert device.close_expired_window(device.last_arrival + 961)
+
+    def test_idle_device(self):
+        """test that devices without an open window are left alone"""
+        agent = build_agent(ARGUMENTS)
+        device = agent.devices[TOPIC]
+        assert device.window_deadline() is None
+        assert not device.close_expired_window(np.inf)
+        agent.close_expired_windows()
+        agent.publish_queue.flush()
+        assert agent.vip.pubsub.published == []